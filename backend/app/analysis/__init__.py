@@ -1,11 +1,12 @@
-"""Video analysis package: processor (YOLO wrapper), rules (angle/reps), engine (orchestrator).
+"""Video analysis package: processor (YOLO wrapper), filters (smoothing), rules (angle/reps), engine (orchestrator).
 
 This package is designed to be testable: processor can be mocked by tests to return
 precomputed angle sequences.
 """
 
 from .engine import analyze_video
-from .rules import compute_angle, count_reps
+from .filters import filter_angles
+from .rules import compute_angle, compute_angles, count_reps
 from .processor import YOLOPoseWrapper
 
-__all__ = ["analyze_video", "compute_angle", "count_reps", "YOLOPoseWrapper"]
+__all__ = ["analyze_video", "filter_angles", "compute_angle", "compute_angles", "count_reps", "YOLOPoseWrapper"]
@@ -0,0 +1,123 @@
+"""Armazenamento dos vídeos enviados por conteúdo (uploads/<sha256><ext>).
+
+O mesmo vídeo enviado de novo (retentativa, toque duplo) reaproveita o arquivo existente.
+Cada dono (ex.: "patient:4") registra uma referência em `video_blob_refs`; `refcount` conta
+os donos e `gc` remove os arquivos sem referências depois de um período de carência.
+"""
+from datetime import datetime, timedelta
+import os
+import re
+from pathlib import Path
+from typing import List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.analysis import keypoints, renditions
+from app.core import uploads
+from app.models.video_blob import VideoBlob, VideoBlobRef
+
+
+_SHA_NAME = re.compile(r"^([0-9a-f]{64})(\.[A-Za-z0-9]{1,15})?$")
+
+
+def normalize_ext(filename: Optional[str]) -> str:
+    ext = Path(filename).suffix.lower() if filename else ""
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,15}", ext) else ""
+
+
+def blob_filename(sha256: str, ext: str = "") -> str:
+    return f"{sha256}{ext}"
+
+
+def blob_path(sha256: str, ext: str = "") -> Path:
+    return uploads.UPLOAD_ROOT / blob_filename(sha256, ext)
+
+
+def sha_from_filename(filename: Optional[str]) -> Optional[str]:
+    """SHA-256 de um nome de upload endereçado por conteúdo (None para nomes antigos uuid)."""
+    match = _SHA_NAME.match(Path(filename).name) if filename else None
+    return match.group(1) if match else None
+
+
+def store_file(tmp: Path, sha256: str, ext: str = "") -> Path:
+    """Move o temporário recebido para o nome por conteúdo; descarta se o blob já existe."""
+    dest = blob_path(sha256, ext)
+    if dest.exists():
+        tmp.unlink(missing_ok=True)
+    else:
+        os.replace(tmp, dest)
+    return dest
+
+
+def register(session: Session, sha256: str, ext: str, size: int) -> VideoBlob:
+    blob = session.get(VideoBlob, sha256)
+    if blob is None:
+        blob = VideoBlob(sha256=sha256, ext=ext, size=size)
+        session.add(blob)
+        try:
+            session.commit()
+        except IntegrityError:
+            # registrado em paralelo por outro upload do mesmo conteúdo
+            session.rollback()
+            blob = session.get(VideoBlob, sha256)
+    return blob
+
+
+def acquire(session: Session, sha256: str, owner: str) -> int:
+    """Adiciona a referência de `owner` ao blob (idempotente); retorna o refcount."""
+    exists = session.exec(
+        select(VideoBlobRef).where(VideoBlobRef.sha256 == sha256).where(VideoBlobRef.owner == owner)
+    ).first()
+    blob = session.get(VideoBlob, sha256)
+    if exists is None:
+        session.add(VideoBlobRef(sha256=sha256, owner=owner))
+        blob.refcount += 1
+        blob.updated_at = datetime.utcnow()
+        session.add(blob)
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            session.refresh(blob)
+    return blob.refcount
+
+
+def release_owner(session: Session, owner: str) -> int:
+    """Remove todas as referências de `owner` (sem commit); retorna quantas foram removidas."""
+    refs = list(session.exec(select(VideoBlobRef).where(VideoBlobRef.owner == owner)).all())
+    now = datetime.utcnow()
+    for ref in refs:
+        blob = session.get(VideoBlob, ref.sha256)
+        if blob is not None:
+            blob.refcount = max(0, blob.refcount - 1)
+            blob.updated_at = now
+            session.add(blob)
+        session.delete(ref)
+    return len(refs)
+
+
+def gc(session: Session, grace_seconds: float = 3600.0, now: Optional[datetime] = None) -> List[str]:
+    """Apaga os blobs sem referências há mais de `grace_seconds`; retorna os sha256 removidos.
+
+    A carência cobre o intervalo entre gravar o arquivo e registrar a primeira referência.
+    """
+    now = now or datetime.utcnow()
+    orphans = list(
+        session.exec(
+            select(VideoBlob)
+            .where(VideoBlob.refcount <= 0)
+            .where(VideoBlob.updated_at < now - timedelta(seconds=grace_seconds))
+        ).all()
+    )
+    removed: List[str] = []
+    for blob in orphans:
+        blob_path(blob.sha256, blob.ext).unlink(missing_ok=True)
+        for path in renditions.all_paths(blob_filename(blob.sha256, blob.ext)):
+            path.unlink(missing_ok=True)
+        keypoints.path_for(blob_filename(blob.sha256, blob.ext)).unlink(missing_ok=True)
+        session.delete(blob)
+        removed.append(blob.sha256)
+    if orphans:
+        session.commit()
+    return removed
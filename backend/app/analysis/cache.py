@@ -0,0 +1,68 @@
+"""Cache dos resultados de análise por (hash do vídeo, modelo, articulação, limiares, amostragem).
+
+Um vídeo já analisado com a mesma configuração devolve o feedback guardado, sem agendar
+nova inferência.
+"""
+from datetime import datetime
+import json
+from typing import Any, Dict, NamedTuple, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.models.analysis_cache import AnalysisCacheEntry
+
+
+class CacheKey(NamedTuple):
+    video_sha256: str
+    model_name: str
+    joint: str
+    down_threshold: float
+    up_threshold: float
+    options: str = ""
+
+
+def _where(key: CacheKey):
+    return (
+        select(AnalysisCacheEntry)
+        .where(AnalysisCacheEntry.video_sha256 == key.video_sha256)
+        .where(AnalysisCacheEntry.model_name == key.model_name)
+        .where(AnalysisCacheEntry.joint == key.joint)
+        .where(AnalysisCacheEntry.down_threshold == key.down_threshold)
+        .where(AnalysisCacheEntry.up_threshold == key.up_threshold)
+        .where(AnalysisCacheEntry.options == key.options)
+    )
+
+
+def lookup(session: Session, key: CacheKey) -> Optional[Dict[str, Any]]:
+    entry = session.exec(_where(key)).first()
+    if entry is None:
+        return None
+    entry.hits += 1
+    session.add(entry)
+    session.commit()
+    return json.loads(entry.payload)
+
+
+def store(session: Session, key: CacheKey, feedback: Dict[str, Any]) -> None:
+    if session.exec(_where(key)).first() is not None:
+        return
+    session.add(AnalysisCacheEntry(**key._asdict(), payload=json.dumps(feedback, ensure_ascii=False)))
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+
+
+def reuse(feedback: Dict[str, Any], patient_id: str, exercise_id: str, filename: str) -> Dict[str, Any]:
+    """Feedback em cache adaptado para um novo envio (paciente, exercício, vídeo, horário)."""
+    out = dict(feedback)
+    out.update({
+        "ID_Paciente": patient_id,
+        "ID_Exercicio": exercise_id,
+        "Timestamp": datetime.utcnow().isoformat() + "Z",
+        "video_filename": filename,
+        "progress": 100,
+        "cached": True,
+    })
+    return out
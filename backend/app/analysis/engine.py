@@ -1,9 +1,42 @@
 """Orchestrator: uses processor + rules to analyze a submitted video and produce feedback logs."""
 from typing import Dict, Any, List, Tuple, Optional, Callable
 from datetime import datetime
+import inspect
+from .filters import filter_angles
+from .keypoints import load as load_keypoints, samples_from_keypoints
 from .processor import YOLOPoseWrapper
 from .rules import count_reps, segment_reps
 
+# Limiares de amplitude (graus) usados para segmentar as repetições
+DOWN_THRESHOLD = 90.0
+UP_THRESHOLD = 160.0
+# Articulação analisada
+JOINT = "knee"
+# Versão do cálculo (filtro, regras, pré-processamento): entra na chave do cache de
+# resultados (`runtime._cache_key`); incremente ao mudar algo que altere o feedback.
+ANALYSIS_VERSION = 2
+
+# implementação padrão; um `detect_joint_angles` trocado (subclasse, monkeypatch nos testes)
+# continua sendo o ponto de extensão e tem prioridade sobre `detect_joint_samples`
+_DEFAULT_DETECT_ANGLES = YOLOPoseWrapper.detect_joint_angles
+
+
+def _overrides_detect_angles(processor: Any) -> bool:
+    method = getattr(processor, "detect_joint_angles", None)
+    return method is not None and getattr(method, "__func__", method) is not _DEFAULT_DETECT_ANGLES
+
+
+def _accepted_kwargs(fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Só os kwargs que `fn` aceita (substitutos antigos não recebem progress_cb/sample_rate)."""
+    try:
+        params = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return kwargs
+    if any(p.kind is p.VAR_KEYWORD for p in params):
+        return kwargs
+    names = {p.name for p in params}
+    return {k: v for k, v in kwargs.items() if k in names}
+
 
 def analyze_video(
     patient_id: str,
@@ -12,19 +45,92 @@ def analyze_video(
     processor: YOLOPoseWrapper = None,
     min_reps: int = 2,
     progress_cb: Optional[Callable[[int, int, int], None]] = None,
+    sample_rate: Optional[float] = None,
+    adaptive: bool = False,
+    smooth: bool = True,
+    down_threshold: float = DOWN_THRESHOLD,
+    up_threshold: float = UP_THRESHOLD,
+    keypoints_path: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Analyze video and return structured feedback.
 
-    - processor.detect_joint_angles should return list of (timestamp, angle)
-    - rules.count_reps will count repetitions
+    - processor.detect_joint_samples gives the angle sequence; a replaced
+      `detect_joint_angles` (subclass or test double) takes precedence and only receives
+      the keyword arguments it accepts
+    - with `smooth`, `filters.filter_angles` removes jitter and fills short gaps before the rules
+    - rules.segment_reps counts repetitions using `down_threshold`/`up_threshold`
+    - sample_rate/adaptive are forwarded to the processor (taxa de análise em amostras/s)
+    - with `keypoints_path` the processor also saves the per-frame keypoints (see `rescore`)
     """
     if processor is None:
         processor = YOLOPoseWrapper()
 
-    # attempt to get angle sequence (timestamp, angle_degrees)
-    seq: List[Tuple[float, float]] = processor.detect_joint_angles(video_path, joint="knee", progress_cb=progress_cb)
+    detect_kwargs: Dict[str, Any] = {}
+    if sample_rate:
+        detect_kwargs["sample_rate"] = sample_rate
+    if adaptive:
+        detect_kwargs["adaptive"] = True
+        detect_kwargs["thresholds"] = (down_threshold, up_threshold)
+
+    # attempt to get angle samples (timestamp, angle_degrees | None, confidence)
+    detect_samples = getattr(processor, "detect_joint_samples", None)
+    if detect_samples is not None and not _overrides_detect_angles(processor):
+        if keypoints_path:
+            detect_kwargs["keypoints_path"] = keypoints_path
+        samples = detect_samples(video_path, joint=JOINT, progress_cb=progress_cb, **detect_kwargs)
+    else:
+        detect_angles = processor.detect_joint_angles
+        kwargs = _accepted_kwargs(detect_angles, {"joint": JOINT, "progress_cb": progress_cb, **detect_kwargs})
+        samples = [(t, angle, 1.0) for t, angle in detect_angles(video_path, **kwargs)]
+    return score_samples(
+        patient_id,
+        exercise_id,
+        samples,
+        min_reps=min_reps,
+        smooth=smooth,
+        down_threshold=down_threshold,
+        up_threshold=up_threshold,
+    )
+
+
+def rescore(
+    patient_id: str,
+    exercise_id: str,
+    keypoints_path: str,
+    joint: str = JOINT,
+    min_reps: int = 2,
+    smooth: bool = True,
+    down_threshold: float = DOWN_THRESHOLD,
+    up_threshold: float = UP_THRESHOLD,
+) -> Dict[str, Any]:
+    """Re-run the rules on keypoints saved by a previous analysis (no video, no YOLO)."""
+    samples = samples_from_keypoints(load_keypoints(keypoints_path), joint)
+    return score_samples(
+        patient_id,
+        exercise_id,
+        samples,
+        min_reps=min_reps,
+        smooth=smooth,
+        down_threshold=down_threshold,
+        up_threshold=up_threshold,
+    )
+
+
+def score_samples(
+    patient_id: str,
+    exercise_id: str,
+    samples: List[Tuple[float, Optional[float], float]],
+    min_reps: int = 2,
+    smooth: bool = True,
+    down_threshold: float = DOWN_THRESHOLD,
+    up_threshold: float = UP_THRESHOLD,
+) -> Dict[str, Any]:
+    """Turn (timestamp, angle | None, confidence) samples into the feedback dict."""
+    if smooth:
+        samples = filter_angles(samples)
+    seq: List[Tuple[float, float]] = [(t, angle) for t, angle, _ in samples if angle is not None]
 
-    rep_segments = segment_reps(seq, down_threshold=90.0, up_threshold=160.0)
+    rep_segments = segment_reps(seq, down_threshold=down_threshold, up_threshold=up_threshold)
     reps = len(rep_segments)
 
     status = "Sucesso" if reps >= min_reps else "Falha"
@@ -39,7 +145,7 @@ def analyze_video(
         bottom = seg.get("bottom")
         end = seg.get("end")
 
-        ok_amplitude = (min_a is not None and max_a is not None and min_a <= 90.0 and max_a >= 160.0)
+        ok_amplitude = (min_a is not None and max_a is not None and min_a <= down_threshold and max_a >= up_threshold)
         note = "Amplitude adequada" if ok_amplitude else f"Amplitude reduzida (min={min_a}, max={max_a})"
 
         rep_details.append({
@@ -0,0 +1,121 @@
+"""Filtro em streaming entre o processor e as regras de repetição.
+
+`AngleFilter` recebe as amostras (timestamp, ângulo | None, confiança) uma a uma e devolve
+amostras suavizadas com o filtro One-Euro, preservando a confiança:
+
+- amostras sem ângulo ou com confiança < `min_conf` são lacunas; lacunas curtas
+  (<= `max_gap_s`) são preenchidas por interpolação ponderada pela confiança das pontas;
+- lacunas longas não são preenchidas e reiniciam o filtro (sem "arrastar" o ângulo);
+- memória constante por frame: só o estado do filtro e as amostras da lacuna atual
+  (limitadas por `max_gap_s`).
+
+O filtro age no ângulo da articulação, não nas coordenadas dos keypoints: as regras só
+consomem esse ângulo, então suavizar um sinal por frame (em vez de 2 coordenadas x 3
+keypoints x 2 lados) ataca diretamente o cruzamento duplo dos limiares, com o mesmo
+comportamento nas lacunas. Os keypoints gravados em .npz (`keypoints`) ficam brutos, e
+`engine.rescore` pode refiltrar com outros parâmetros.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+Sample = Tuple[float, Optional[float], float]
+
+
+class OneEuroFilter:
+    """One-Euro (Casiez et al.): passa-baixa cujo corte sobe com a velocidade do sinal.
+
+    Pouca suavização em movimentos rápidos (sem atraso na descida/subida) e muita quando
+    o sinal está parado (remove o jitter que os keypoints passam para o ângulo).
+    """
+
+    def __init__(self, min_cutoff: float = 1.5, beta: float = 0.05, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self) -> None:
+        self._t: Optional[float] = None
+        self._x: Optional[float] = None
+        self._dx = 0.0
+
+    @staticmethod
+    def _alpha(cutoff: float, dt: float) -> float:
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, t: float, x: float) -> float:
+        if self._t is None or t <= self._t:
+            self._t, self._x, self._dx = t, x, 0.0
+            return x
+        dt = t - self._t
+        dx = (x - self._x) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx = a_d * dx + (1 - a_d) * self._dx
+        cutoff = self.min_cutoff + self.beta * abs(self._dx)
+        a = self._alpha(cutoff, dt)
+        self._x = a * x + (1 - a) * self._x
+        self._t = t
+        return self._x
+
+
+class AngleFilter:
+    """Estágio de filtro em streaming: `push` para cada amostra e `flush` no fim do vídeo."""
+
+    def __init__(
+        self,
+        min_cutoff: float = 1.5,
+        beta: float = 0.05,
+        d_cutoff: float = 1.0,
+        max_gap_s: float = 0.3,
+        min_conf: float = 0.3,
+    ):
+        self.one_euro = OneEuroFilter(min_cutoff, beta, d_cutoff)
+        self.max_gap_s = max_gap_s
+        self.min_conf = min_conf
+        self._last: Optional[Sample] = None  # última amostra válida (bruta)
+        self._gap: List[float] = []  # timestamps da lacuna atual
+
+    def _emit(self, t: float, angle: float, conf: float) -> Sample:
+        return t, self.one_euro(t, angle), conf
+
+    def push(self, t: float, angle: Optional[float], conf: float = 1.0) -> List[Sample]:
+        if angle is None or conf < self.min_conf or (isinstance(angle, float) and math.isnan(angle)):
+            if self._last is not None:
+                if t - self._last[0] <= self.max_gap_s:
+                    self._gap.append(t)
+                else:
+                    # lacuna longa: descarta e recomeça o filtro na próxima amostra válida
+                    self._gap.clear()
+                    self._last = None
+                    self.one_euro.reset()
+            return []
+
+        out: List[Sample] = []
+        if self._gap and self._last is not None:
+            t0, a0, c0 = self._last
+            span = t - t0
+            for tg in self._gap:
+                f = (tg - t0) / span if span > 0 else 0.5
+                w0, w1 = c0 * (1 - f), conf * f
+                total = (w0 + w1) or 1.0
+                out.append(self._emit(tg, (w0 * a0 + w1 * angle) / total, (w0 * c0 + w1 * conf) / total))
+        self._gap.clear()
+        self._last = (t, float(angle), conf)
+        out.append(self._emit(t, float(angle), conf))
+        return out
+
+    def flush(self) -> List[Sample]:
+        # lacuna no fim do vídeo não tem ponta final para interpolar
+        self._gap.clear()
+        return []
+
+
+def filter_angles(samples: Iterable[Sample], **kwargs) -> Iterator[Sample]:
+    """Aplica `AngleFilter` a uma sequência (ou stream) de (timestamp, ângulo | None, confiança)."""
+    stage = AngleFilter(**kwargs)
+    for t, angle, conf in samples:
+        yield from stage.push(t, angle, conf)
+    yield from stage.flush()
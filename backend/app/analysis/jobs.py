@@ -0,0 +1,249 @@
+"""Fila persistente de jobs de análise (tabela `analysis_jobs`).
+
+Os jobs passam por queued -> running -> done | failed. Um worker "reivindica" um job com um
+lease (dono + validade) e o renova enquanto processa; se o processo morrer, o lease vence e
+`requeue_expired` devolve o job para a fila na próxima inicialização.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import update
+from sqlmodel import Session, func, or_, select
+
+from app.models.analysis_job import AnalysisJob
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Depois de tantas tentativas interrompidas o job é marcado como failed (evita loop de crash)
+MAX_ATTEMPTS = 3
+
+
+def enqueue(
+    session: Session,
+    patient_id: str,
+    exercise_id: str,
+    video_path: str,
+    video_filename: str,
+    priority_class: str = "interactive",
+    fairness_key: Optional[str] = None,
+    frame_count: Optional[int] = None,
+) -> AnalysisJob:
+    job = AnalysisJob(
+        patient_id=str(patient_id),
+        exercise_id=str(exercise_id),
+        video_path=video_path,
+        video_filename=video_filename,
+        priority_class=priority_class,
+        fairness_key=fairness_key or f"patient:{patient_id}",
+        frame_count=frame_count,
+        status=QUEUED,
+    )
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+def claim(session: Session, job_id: int, owner: str, lease_seconds: float) -> bool:
+    """Tenta reivindicar um job queued de forma atômica (UPDATE condicional)."""
+    now = datetime.utcnow()
+    result = session.exec(
+        update(AnalysisJob)
+        .where(AnalysisJob.id == job_id)
+        .where(AnalysisJob.status == QUEUED)
+        .values(
+            status=RUNNING,
+            lease_owner=owner,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=AnalysisJob.attempts + 1,
+            started_at=now,
+            updated_at=now,
+        )
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def queued_jobs(session: Session, per_key: int = 5) -> List[AnalysisJob]:
+    """Candidatos para o escalonador: por (classe, chave de fair share), os `per_key` menores
+    jobs (frame_count) mais o mais antigo, para que um envio em massa de um único
+    paciente/clínica não esconda os jobs dos demais.
+    """
+    partition = (AnalysisJob.priority_class, AnalysisJob.fairness_key)
+    ranked = (
+        select(
+            AnalysisJob.id,
+            func.row_number().over(
+                partition_by=partition,
+                order_by=(AnalysisJob.frame_count.is_(None), AnalysisJob.frame_count, AnalysisJob.queued_at),
+            ).label("rn_short"),
+            func.row_number().over(
+                partition_by=partition,
+                order_by=(AnalysisJob.queued_at, AnalysisJob.id),
+            ).label("rn_old"),
+        )
+        .where(AnalysisJob.status == QUEUED)
+        .subquery()
+    )
+    return list(
+        session.exec(
+            select(AnalysisJob)
+            .join(ranked, ranked.c.id == AnalysisJob.id)
+            .where(or_(ranked.c.rn_short <= per_key, ranked.c.rn_old == 1))
+            .order_by(AnalysisJob.queued_at, AnalysisJob.id)
+        ).all()
+    )
+
+
+def claim_next(
+    session: Session,
+    owner: str,
+    lease_seconds: float,
+    choose: Optional[Callable[[List[AnalysisJob]], Optional[AnalysisJob]]] = None,
+) -> Optional[AnalysisJob]:
+    """Reivindica o próximo job queued; None se a fila estiver vazia.
+
+    Sem `choose`, pega o mais antigo (FIFO). Com `choose`, o escalonador escolhe entre os
+    candidatos de `queued_jobs`.
+    """
+    while True:
+        if choose:
+            pending = queued_jobs(session)
+        else:
+            pending = list(
+                session.exec(
+                    select(AnalysisJob)
+                    .where(AnalysisJob.status == QUEUED)
+                    .order_by(AnalysisJob.queued_at, AnalysisJob.id)
+                    .limit(1)
+                ).all()
+            )
+        if not pending:
+            return None
+        job = choose(pending) if choose else pending[0]
+        if job is None:
+            return None
+        if claim(session, job.id, owner, lease_seconds):
+            session.refresh(job)
+            return job
+        # outro worker levou este job; tenta o próximo
+
+
+def renew_leases(session: Session, owner: str, job_ids: List[int], lease_seconds: float) -> int:
+    """Estende o lease dos jobs em execução deste worker."""
+    if not job_ids:
+        return 0
+    now = datetime.utcnow()
+    result = session.exec(
+        update(AnalysisJob)
+        .where(AnalysisJob.id.in_(job_ids))
+        .where(AnalysisJob.status == RUNNING)
+        .where(AnalysisJob.lease_owner == owner)
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+    )
+    session.commit()
+    return result.rowcount
+
+
+def finish(session: Session, job_id: int, owner: str, status: str, error: Optional[str] = None) -> bool:
+    """Marca o job como done/failed (somente se o lease ainda pertence a `owner`)."""
+    now = datetime.utcnow()
+    result = session.exec(
+        update(AnalysisJob)
+        .where(AnalysisJob.id == job_id)
+        .where(AnalysisJob.status == RUNNING)
+        .where(AnalysisJob.lease_owner == owner)
+        .values(
+            status=status,
+            error=error,
+            lease_owner=None,
+            lease_expires_at=None,
+            finished_at=now,
+            updated_at=now,
+        )
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def _interrupt(session: Session, job: AnalysisJob, now: datetime) -> bool:
+    """Devolve um job interrompido para a fila, ou marca failed depois de MAX_ATTEMPTS (sem commit).
+
+    Retorna True se o job foi marcado como failed.
+    """
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.updated_at = now
+    failed = job.attempts >= MAX_ATTEMPTS
+    if failed:
+        job.status = FAILED
+        job.error = f"Análise interrompida {job.attempts} vezes; desistindo"
+        job.finished_at = now
+    else:
+        job.status = QUEUED
+        job.queued_at = now
+    session.add(job)
+    return failed
+
+
+def latest_for_video(session: Session, patient_id: str, video_filename: str) -> Optional[AnalysisJob]:
+    """Job mais recente de um vídeo do paciente (qualquer estado)."""
+    return session.exec(
+        select(AnalysisJob)
+        .where(AnalysisJob.patient_id == str(patient_id))
+        .where(AnalysisJob.video_filename == str(video_filename))
+        .order_by(AnalysisJob.id.desc())
+        .limit(1)
+    ).first()
+
+
+def release(session: Session, job_id: int, owner: str) -> Optional[AnalysisJob]:
+    """Devolve à fila um job de `owner` cuja execução foi interrompida (ex.: o processo do pool morreu).
+
+    Conta como uma tentativa, igual a um lease vencido. Retorna o job se ele foi marcado como
+    failed (MAX_ATTEMPTS), senão None.
+    """
+    job = session.exec(
+        select(AnalysisJob)
+        .where(AnalysisJob.id == job_id)
+        .where(AnalysisJob.status == RUNNING)
+        .where(AnalysisJob.lease_owner == owner)
+    ).first()
+    if job is None:
+        return None
+    failed = _interrupt(session, job, datetime.utcnow())
+    session.commit()
+    if failed:
+        session.refresh(job)
+        return job
+    return None
+
+
+def requeue_expired(
+    session: Session,
+    now: Optional[datetime] = None,
+    on_failed: Optional[Callable[[AnalysisJob], None]] = None,
+) -> int:
+    """Devolve para a fila os jobs running cujo lease venceu (ex.: após reinício do servidor).
+
+    Os que esgotaram MAX_ATTEMPTS viram failed e são passados a `on_failed` depois do commit
+    (o runtime grava o feedback de erro do vídeo).
+    """
+    now = now or datetime.utcnow()
+    expired = list(
+        session.exec(
+            select(AnalysisJob)
+            .where(AnalysisJob.status == RUNNING)
+            .where(AnalysisJob.lease_expires_at < now)
+        ).all()
+    )
+    failed = [job for job in expired if _interrupt(session, job, now)]
+    session.commit()
+    if on_failed is not None:
+        for job in failed:
+            on_failed(job)
+    return len(expired)
@@ -0,0 +1,143 @@
+"""Keypoints por frame salvos em disco, para reprocessar as regras sem reabrir o vídeo.
+
+Cada análise grava uploads/keypoints/<nome>.npz com:
+- frame_idx (int32, N), timestamps (float32, N): frames analisados;
+- xy (float32, N x 17 x 2), conf (float16, N x 17): keypoints COCO da primeira pessoa
+  (zeros quando não há pessoa). xy fica em float32: em float16 o passo passa de 0,5 px
+  acima de 1024 px e os ângulos recalculados não batem com os da análise;
+- present (bool, N): se havia pessoa no frame;
+- meta: fps, largura/altura do vídeo lido e o modelo.
+
+`samples_from_keypoints` recalcula (timestamp, ângulo | None, confiança) de qualquer
+articulação em poucos milissegundos (ver `engine.rescore`).
+"""
+from __future__ import annotations
+
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.analysis.rules import JOINT_KEYPOINTS, compute_angles
+from app.core import uploads
+
+
+class KeypointSeries(NamedTuple):
+    frame_idx: np.ndarray
+    timestamps: np.ndarray
+    xy: np.ndarray
+    conf: np.ndarray
+    present: np.ndarray
+    meta: Dict[str, Any]
+
+
+def keypoints_dir() -> Path:
+    return uploads.UPLOAD_ROOT / "keypoints"
+
+
+def path_for(video_filename: str) -> Path:
+    return keypoints_dir() / f"{Path(video_filename).stem}.npz"
+
+
+class KeypointRecorder:
+    """Acumula os keypoints frame a frame (xy float32, conf float16) e grava o .npz ao final."""
+
+    def __init__(self) -> None:
+        self._frame_idx: List[int] = []
+        self._timestamps: List[float] = []
+        self._xy: List[np.ndarray] = []
+        self._conf: List[np.ndarray] = []
+        self._present: List[bool] = []
+
+    def add(self, frame_idx: int, timestamp: float, xy: Any = None, conf: Any = None) -> None:
+        present = xy is not None
+        self._frame_idx.append(frame_idx)
+        self._timestamps.append(timestamp)
+        self._xy.append(np.asarray(xy, dtype=np.float32)[:17] if present else np.zeros((17, 2), np.float32))
+        if present and conf is not None:
+            self._conf.append(np.asarray(conf, dtype=np.float16)[:17])
+        else:
+            # sem confiança do modelo: 1.0 para keypoints detectados
+            self._conf.append(np.full(17, 1.0 if present else 0.0, np.float16))
+        self._present.append(present)
+
+    def save(self, path: Path, **meta: Any) -> Path:
+        n = len(self._frame_idx)
+        save(
+            path,
+            np.asarray(self._frame_idx, dtype=np.int32),
+            np.asarray(self._timestamps, dtype=np.float32),
+            np.stack(self._xy) if n else np.zeros((0, 17, 2), np.float32),
+            np.stack(self._conf) if n else np.zeros((0, 17), np.float16),
+            np.asarray(self._present, dtype=bool),
+            **meta,
+        )
+        return path
+
+
+def save(
+    path: Path,
+    frame_idx: np.ndarray,
+    timestamps: np.ndarray,
+    xy: np.ndarray,
+    conf: np.ndarray,
+    present: np.ndarray,
+    **meta: Any,
+) -> None:
+    """Grava o .npz de forma atômica (temporário + rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.stem}.{uuid.uuid4().hex[:8]}.npz")
+    try:
+        np.savez_compressed(
+            tmp,
+            frame_idx=frame_idx,
+            timestamps=timestamps,
+            xy=xy.astype(np.float32),
+            conf=conf.astype(np.float16),
+            present=present,
+            meta_keys=np.asarray(list(meta.keys()), dtype=str),
+            meta_values=np.asarray([str(v) for v in meta.values()], dtype=str),
+        )
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def load(path: Path) -> KeypointSeries:
+    with np.load(path, allow_pickle=False) as data:
+        meta = dict(zip(data["meta_keys"].tolist(), data["meta_values"].tolist()))
+        return KeypointSeries(
+            data["frame_idx"],
+            data["timestamps"],
+            data["xy"],
+            data["conf"],
+            data["present"],
+            meta,
+        )
+
+
+def samples_from_keypoints(series: KeypointSeries, joint: str = "knee") -> List[Tuple[float, Optional[float], float]]:
+    """(timestamp, ângulo médio | None, confiança) de `joint` para cada frame salvo."""
+    n = len(series.timestamps)
+    if n == 0:
+        return []
+    if joint not in JOINT_KEYPOINTS:
+        raise ValueError(f"Articulação desconhecida: {joint}")
+    present = series.present.astype(bool)
+    angles = np.full(n, np.nan)
+    if present.any():
+        # .npz antigos têm xy em float16
+        _, _, mean = compute_angles(series.xy[present].astype(np.float32), joint)
+        angles[present] = mean
+    conf = series.conf.astype(np.float32)
+    sides = [conf[:, list(triple)].min(axis=1) for triple in JOINT_KEYPOINTS[joint]]
+    joint_conf = np.where(present, np.mean(sides, axis=0), 0.0)
+    timestamps = series.timestamps.astype(np.float64)
+    return [
+        (float(t), None if np.isnan(a) else float(a), float(c))
+        for t, a, c in zip(timestamps, angles, joint_conf)
+    ]
@@ -1,21 +1,37 @@
 """Wrapper around Ultralytics YOLO pose estimation.
 
 In production this would run inference on the video and return joint keypoints over time.
-For testing we will mock `YOLOPoseWrapper.detect_joint_angles` to return synthetic sequences.
+For testing we will mock `YOLOPoseWrapper.detect_joint_angles` to return synthetic sequences:
+`engine.analyze_video` calls a replaced `detect_joint_angles` instead of `detect_joint_samples`
+(passing only the keyword arguments it accepts).
 """
-from typing import List, Tuple, Optional, Callable
+from typing import Any, Dict, List, Tuple, Optional, Callable
 import datetime
 import os
 
+from app.analysis.keypoints import KeypointRecorder
+
 try:
     from ultralytics import YOLO  # type: ignore
 except Exception:
     YOLO = None  # tests can mock this
 
 
+DEFAULT_MODEL = "yolov8n-pose"
+
+
+def _default_batch_size() -> int:
+    try:
+        return max(1, int(os.getenv("MOVEON_YOLO_BATCH", "1")))
+    except ValueError:
+        return 1
+
+
 class YOLOPoseWrapper:
-    def __init__(self, model: Optional[str] = None):
-        self.model_name = model or "yolov8n-pose"
+    def __init__(self, model: Optional[str] = None, batch_size: Optional[int] = None):
+        self.model_name = model or DEFAULT_MODEL
+        # Quantos frames são enviados ao modelo em uma única chamada
+        self.batch_size = max(1, int(batch_size)) if batch_size else _default_batch_size()
         self._model = None
         if YOLO is not None:
             try:
@@ -23,94 +39,473 @@ class YOLOPoseWrapper:
             except Exception:
                 self._model = None
 
-    def detect_joint_angles(
+    @staticmethod
+    def _inference_kwargs() -> Dict[str, Any]:
+        device = os.getenv("MOVEON_YOLO_DEVICE")  # e.g. "0" for CUDA GPU, "cpu" for CPU
+        half_env = os.getenv("MOVEON_YOLO_HALF")  # "1" to enable half precision (GPU)
+        half = (half_env == "1")
+
+        kwargs: Dict[str, Any] = {"verbose": False}
+        if device:
+            kwargs["device"] = device
+        if half_env is not None:
+            kwargs["half"] = half
+        return kwargs
+
+    @staticmethod
+    def _split_results(yolo_results: Any) -> List[Any]:
+        """Normaliza a saída do modelo para uma lista com um resultado por frame."""
+        if hasattr(yolo_results, 'keypoints'):
+            # Ultralytics >=8.0.0 (objeto Results único)
+            return [yolo_results]
+        # Ultralytics <8.0.0 / lista de Results (um por imagem)
+        return list(yolo_results)
+
+    @staticmethod
+    def _first_person(result: Any):
+        """(keypoints (17, 2), confiança (17,) ou None) da primeira pessoa detectada, ou None."""
+        kps = getattr(result, 'keypoints', None)
+        if kps is None or not hasattr(kps, 'xy'):
+            return None
+        keypoints = kps.xy.cpu().numpy()
+        if keypoints is None or len(keypoints) == 0:
+            return None
+        conf = getattr(kps, 'conf', None)
+        if conf is not None:
+            conf = conf.cpu().numpy()
+            conf = conf[0] if len(conf) else None
+        return keypoints[0], conf
+
+    @staticmethod
+    def _first_person_keypoints(result: Any):
+        """Keypoints (17, 2) da primeira pessoa detectada, ou None."""
+        person = YOLOPoseWrapper._first_person(result)
+        return person[0] if person is not None else None
+
+    @staticmethod
+    def _roi_from_keypoints(
+        xy: Any,
+        conf: Any,
+        frame_shape: Tuple[int, ...],
+        margin: float = 0.25,
+        min_points: int = 5,
+        min_conf: float = 0.3,
+    ) -> Optional[Tuple[int, int, int, int]]:
+        """Região (x0, y0, x1, y1) em torno dos keypoints visíveis, ampliada por `margin`.
+
+        None se houver poucos keypoints confiáveis (rastreamento perdido) ou se a região
+        cobrir quase o frame inteiro (recortar não traria ganho).
+        """
+        import numpy as np
+
+        xy = np.asarray(xy, dtype=np.float32)
+        visible = _visible_keypoints(xy, conf, min_conf)
+        if int(visible.sum()) < min_points:
+            return None
+        height, width = frame_shape[:2]
+        (x0, y0), (x1, y1) = xy[visible].min(axis=0), xy[visible].max(axis=0)
+        pad = margin * max(x1 - x0, y1 - y0, 32.0)
+        box = (
+            max(0, int(x0 - pad)),
+            max(0, int(y0 - pad)),
+            min(width, int(np.ceil(x1 + pad))),
+            min(height, int(np.ceil(y1 + pad))),
+        )
+        if box[2] - box[0] < 16 or box[3] - box[1] < 16:
+            return None
+        if (box[2] - box[0]) * (box[3] - box[1]) > 0.8 * width * height:
+            return None
+        return box
+
+    @staticmethod
+    def _tracked(xy: Any, conf: Any, crop_shape: Tuple[int, ...], min_points: int = 5, border: float = 2.0) -> bool:
+        """A pessoa continua inteira no recorte? (keypoints suficientes e nenhum colado na borda)."""
+        import numpy as np
+
+        xy = np.asarray(xy, dtype=np.float32)
+        visible = _visible_keypoints(xy, conf)
+        if int(visible.sum()) < min_points:
+            return False
+        height, width = crop_shape[:2]
+        pts = xy[visible]
+        return bool(
+            pts[:, 0].min() > border and pts[:, 1].min() > border
+            and pts[:, 0].max() < width - border and pts[:, 1].max() < height - border
+        )
+
+    @staticmethod
+    def _joint_angles(kps: List[Any], joint: str) -> List[Optional[float]]:
+        """Ângulo médio (esquerdo/direito) de `joint` para cada frame, calculado em um único passe."""
+        import numpy as np
+        from app.analysis.rules import JOINT_KEYPOINTS, compute_angles
+
+        out: List[Optional[float]] = [None] * len(kps)
+        valid = [i for i, kp in enumerate(kps) if kp is not None and kp.shape[0] >= 17]
+        if joint not in JOINT_KEYPOINTS or not valid:
+            return out
+        # COCO: 11=left_hip, 13=left_knee, 15=left_ankle
+        #        12=right_hip, 14=right_knee, 16=right_ankle
+        _, _, mean = compute_angles(np.stack([kps[i][:17] for i in valid]), joint)
+        for i, angle in zip(valid, mean.tolist()):
+            out[i] = angle
+        return out
+
+    @staticmethod
+    def _joint_confidences(confs: List[Any], joint: str) -> List[float]:
+        """Confiança do ângulo de `joint` por frame: média (esq./dir.) da menor confiança dos 3 keypoints.
+
+        0.0 sem pessoa; 1.0 quando o modelo não informa confiança.
+        """
+        from app.analysis.rules import JOINT_KEYPOINTS
+
+        triples = JOINT_KEYPOINTS.get(joint)
+        out: List[float] = []
+        for conf in confs:
+            if conf is False:
+                out.append(0.0)
+            elif conf is None or triples is None:
+                out.append(1.0)
+            else:
+                sides = [min(float(conf[i]) for i in triple) for triple in triples]
+                out.append(sum(sides) / len(sides))
+        return out
+
+    def detect_joint_angles(self, video_path: str, joint: str = "knee", **kwargs: Any) -> List[Tuple[float, float]]:
+        """Detect joint angle sequence for `joint` from a video.
+
+        Returns list of (timestamp_seconds, angle_degrees) for the frames where the joint was
+        found; see `detect_joint_samples` for the parameters.
+        """
+        return [(t, angle) for t, angle, _ in self.detect_joint_samples(video_path, joint=joint, **kwargs) if angle is not None]
+
+    def detect_joint_samples(
         self,
         video_path: str,
         joint: str = "knee",
-        progress_cb: Optional[Callable[[int, int, int], None]] = None,
-    ) -> List[Tuple[float, float]]:
-        """Detect joint angle sequence for `joint` from a video.
+        progress_cb: Optional[Callable[..., None]] = None,
+        batch_size: Optional[int] = None,
+        sample_rate: Optional[float] = None,
+        adaptive: bool = False,
+        thresholds: Tuple[float, float] = (90.0, 160.0),
+        adaptive_band: float = 20.0,
+        queue_size: Optional[int] = None,
+        roi: Optional[bool] = None,
+        keypoints_path: Optional[str] = None,
+    ) -> List[Tuple[float, Optional[float], float]]:
+        """Detect joint angle samples for `joint` from a video.
 
-        Returns list of (timestamp_seconds, angle_degrees).
+        Returns list of (timestamp_seconds, angle_degrees | None, confidence) for every analysed
+        frame; frames without the joint have angle None (used by `filters` to fill short gaps).
         Usa Ultralytics YOLO para extrair keypoints e calcular o ângulo do joelho ao longo do vídeo.
+        Os frames são agrupados em lotes de `batch_size` (padrão: `self.batch_size`) e cada lote
+        é enviado ao modelo em uma única chamada.
+
+        `sample_rate` limita a taxa de análise (amostras/s): os frames pulados são avançados com
+        `cap.grab()`, sem `retrieve` nem conversão para BGR (o codec ainda demuxa e, para a
+        maioria dos formatos, decodifica os frames de referência). Com `adaptive=True` a amostragem volta a ser densa
+        (todos os frames) enquanto o último ângulo medido estiver a menos de `adaptive_band`
+        graus de um dos `thresholds` (down, up) usados por `rules.segment_reps`.
+        Os timestamps são sempre `índice_do_frame / fps` do vídeo original.
+
+        A decodificação roda em uma thread própria que alimenta uma fila limitada
+        (`queue_size`, padrão MOVEON_DECODE_QUEUE=8); quando a fila enche o decoder espera,
+        então a memória fica constante mesmo em vídeos longos. No modo adaptativo a leitura é
+        feita no próprio laço de inferência (sem thread), para que a escolha dos frames pulados
+        não dependa do escalonamento das threads. Se `progress_cb` aceitar um
+        quarto argumento, ele recebe também as métricas do pipeline (profundidade da fila e
+        tempo médio por frame de cada estágio).
+
+        Com `roi=True` (padrão: MOVEON_YOLO_ROI=1) a inferência roda num recorte em torno da
+        pessoa, calculado a partir dos keypoints do lote anterior mais uma margem
+        (MOVEON_YOLO_ROI_MARGIN, padrão 0.25), com `imgsz` menor (MOVEON_YOLO_ROI_IMGSZ, padrão
+        320). Frames em que o recorte perde a pessoa são refeitos com o frame inteiro, e o
+        rastreamento recomeça.
+
+        Com `keypoints_path`, os keypoints e confianças de cada frame analisado são gravados
+        nesse arquivo .npz (ver `keypoints`), para reprocessar as regras sem o vídeo.
         """
         if self._model is None:
             raise NotImplementedError("Ultralytics YOLO model not available in this environment")
 
         import cv2
-        import numpy as np
-        from app.analysis.rules import compute_angle
 
+        import queue
+        import threading
         import time
 
+        batch_size = max(1, int(batch_size)) if batch_size else self.batch_size
+        queue_size = max(1, int(queue_size)) if queue_size else _default_queue_size()
+        kwargs = self._inference_kwargs()
+        use_roi, roi_imgsz, roi_margin = _roi_settings(roi)
+        roi_box: Optional[Tuple[int, int, int, int]] = None
+
         cap = cv2.VideoCapture(video_path)
         fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
         frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         results = []
-        frame_idx = 0
+        recorder = KeypointRecorder() if keypoints_path else None
+        frames_done = 0  # frames consumidos (decodificados ou pulados) já processados
+
+        stride = 1
+        if sample_rate and sample_rate > 0:
+            stride = max(1, int(round(fps / float(sample_rate))))
+        down_threshold, up_threshold = thresholds
+        # amostragem densa perto dos limiares (modo adaptativo). Nesse modo a leitura é
+        # síncrona, feita pelo próprio consumidor: a decisão de pular um frame usa o ângulo
+        # do último lote já inferido (atraso fixo de no máximo `batch_size` frames),
+        # não depende de quanto uma thread de decoder conseguiu adiantar.
+        dense = threading.Event()
+
+        frame_queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        stats = {
+            "queue_size": queue_size,
+            "decoded_frames": 0,
+            "inferred_frames": 0,
+            "decode_s": 0.0,
+            "inference_s": 0.0,
+            "angles_s": 0.0,
+            "wait_s": 0.0,
+            "roi_frames": 0,
+            "roi_fallbacks": 0,
+        }
+
+        def _read_frames():
+            """Lê/pula frames e gera (índice, frame); termina com (consumidos, None)."""
+            frame_idx = 0
+            last_sampled_idx: Optional[int] = None
+            while not stop.is_set():
+                step = 1 if dense.is_set() else stride
+                t0 = time.perf_counter()
+                if last_sampled_idx is None or frame_idx - last_sampled_idx >= step:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    stats["decode_s"] += time.perf_counter() - t0
+                    stats["decoded_frames"] += 1
+                    last_sampled_idx = frame_idx
+                    frame_idx += 1
+                    yield frame_idx - 1, frame
+                else:
+                    # pula o frame: grab() avança sem retrieve/conversão para BGR
+                    if not cap.grab():
+                        break
+                    frame_idx += 1
+            yield frame_idx, None
 
+        def _decoder() -> None:
+            """Produtor em thread: enfileira o que `_read_frames` gera (ou o erro da leitura)."""
+            frame_idx = 0
+            error: Optional[BaseException] = None
+            try:
+                for item in _read_frames():
+                    frame_idx = item[0]
+                    if item[1] is None:
+                        break
+                    while not stop.is_set():
+                        try:
+                            frame_queue.put(item, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+            except BaseException as exc:  # noqa: BLE001
+                error = exc
+            finally:
+                while not stop.is_set():
+                    try:
+                        frame_queue.put((frame_idx, error), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+
+        send_stats = _accepts_stats(progress_cb)
         last_progress_pct = -1
         last_progress_time = 0.0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            # YOLO inference
-            device = os.getenv("MOVEON_YOLO_DEVICE")  # e.g. "0" for CUDA GPU, "cpu" for CPU
-            half_env = os.getenv("MOVEON_YOLO_HALF")  # "1" to enable half precision (GPU)
-            half = (half_env == "1")
-
-            kwargs = {"verbose": False}
-            if device:
-                kwargs["device"] = device
-            if half_env is not None:
-                kwargs["half"] = half
-
-            yolo_results = self._model(frame, **kwargs)
-            keypoints = None
-            if hasattr(yolo_results, 'keypoints') and yolo_results.keypoints is not None:
-                # Ultralytics >=8.0.0
-                keypoints = yolo_results.keypoints.xy.cpu().numpy() if hasattr(yolo_results.keypoints, 'xy') else None
-            elif hasattr(yolo_results[0], 'keypoints') and yolo_results[0].keypoints is not None:
-                # Ultralytics <8.0.0
-                keypoints = yolo_results[0].keypoints.xy.cpu().numpy() if hasattr(yolo_results[0].keypoints, 'xy') else None
-            if keypoints is not None and len(keypoints) > 0:
-                # Assume first person
-                kp = keypoints[0]
-                # COCO: 11=left_hip, 13=left_knee, 15=left_ankle
-                #        12=right_hip, 14=right_knee, 16=right_ankle
-                if joint == "knee":
-                    # Média dos dois joelhos
-                    angles = []
-                    # Left
-                    if kp.shape[0] >= 17:
-                        a = tuple(kp[11])  # left_hip
-                        b = tuple(kp[13])  # left_knee
-                        c = tuple(kp[15])  # left_ankle
-                        angle_left = compute_angle(a, b, c)
-                        angles.append(angle_left)
-                        a = tuple(kp[12])  # right_hip
-                        b = tuple(kp[14])  # right_knee
-                        c = tuple(kp[16])  # right_ankle
-                        angle_right = compute_angle(a, b, c)
-                        angles.append(angle_right)
-                    if angles:
-                        angle = float(np.mean(angles))
-                        timestamp = frame_idx / fps
-                        results.append((timestamp, angle))
-            frame_idx += 1
-
-            if progress_cb is not None and frame_count > 0:
-                pct = int((frame_idx / frame_count) * 100)
-                now = time.monotonic()
-                pct_jump = pct - last_progress_pct
-                if pct != last_progress_pct and (pct_jump >= 5 or (now - last_progress_time) >= 1.5):
-                    last_progress_pct = pct
-                    last_progress_time = now
-                    try:
-                        progress_cb(pct, frame_idx, frame_count)
-                    except Exception:
-                        # progress updates must never break analysis
-                        pass
-        cap.release()
+
+        def _report_progress() -> None:
+            nonlocal last_progress_pct, last_progress_time
+            if progress_cb is None or frame_count <= 0:
+                return
+            pct = int((frames_done / frame_count) * 100)
+            now = time.monotonic()
+            pct_jump = pct - last_progress_pct
+            if pct != last_progress_pct and (pct_jump >= 5 or (now - last_progress_time) >= 1.5):
+                last_progress_pct = pct
+                last_progress_time = now
+                try:
+                    if send_stats:
+                        progress_cb(pct, frames_done, frame_count, _pipeline_stats(stats, frame_queue))
+                    else:
+                        progress_cb(pct, frames_done, frame_count)
+                except Exception:
+                    # progress updates must never break analysis
+                    pass
+
+        def _near_threshold(angle: float) -> bool:
+            return (
+                down_threshold < angle <= down_threshold + adaptive_band
+                or up_threshold - adaptive_band <= angle < up_threshold
+            )
+
+        def _infer(frames: List[Any], extra: Dict[str, Any]) -> List[Any]:
+            # YOLO inference (um lote por chamada)
+            yolo_results = self._model(frames if len(frames) > 1 else frames[0], **kwargs, **extra)
+            per_frame = self._split_results(yolo_results)
+            return [self._first_person(per_frame[i]) if i < len(per_frame) else None for i in range(len(frames))]
+
+        def _run_batch(batch: List[Tuple[int, Any]]) -> None:
+            nonlocal frames_done, roi_box
+            import numpy as np
+
+            t0 = time.perf_counter()
+            people: List[Any] = [None] * len(batch)
+            box = roi_box if use_roi else None
+            if box is not None:
+                x0, y0, x1, y1 = box
+                crops = [np.ascontiguousarray(f[y0:y1, x0:x1]) for _, f in batch]
+                for i, person in enumerate(_infer(crops, {"imgsz": roi_imgsz})):
+                    if person is None:
+                        continue
+                    xy, conf = person
+                    # pessoa ainda inteira no recorte? senão refaz com o frame inteiro
+                    if self._tracked(xy, conf, crops[i].shape):
+                        # só os keypoints detectados voltam para coordenadas do frame; os não
+                        # detectados ficam em (0, 0), como no caminho do frame inteiro
+                        detected = np.any(xy != 0, axis=1, keepdims=True)
+                        people[i] = (np.where(detected, xy + np.array([x0, y0], dtype=np.float32), xy), conf)
+                stats["roi_frames"] += sum(p is not None for p in people)
+            missing = [i for i, p in enumerate(people) if p is None]
+            if missing:
+                for i, person in zip(missing, _infer([batch[i][1] for i in missing], {})):
+                    people[i] = person
+                if box is not None:
+                    stats["roi_fallbacks"] += len(missing)
+            if use_roi:
+                # região do próximo lote: keypoints do último frame com pessoa
+                last = next((p for p in reversed(people) if p is not None), None)
+                roi_box = (
+                    self._roi_from_keypoints(last[0], last[1], batch[-1][1].shape, roi_margin)
+                    if last is not None else None
+                )
+            t1 = time.perf_counter()
+            kps = [p[0] if p is not None else None for p in people]
+            angles = self._joint_angles(kps, joint)
+            confidences = self._joint_confidences([p[1] if p is not None else False for p in people], joint)
+            if recorder is not None:
+                for (idx, _), person in zip(batch, people):
+                    recorder.add(idx, idx / fps, *(person or (None, None)))
+            for (idx, _), angle, conf in zip(batch, angles, confidences):
+                results.append((idx / fps, angle, conf if angle is not None else 0.0))
+                if angle is not None and adaptive:
+                    if _near_threshold(angle):
+                        dense.set()
+                    else:
+                        dense.clear()
+            stats["inference_s"] += t1 - t0
+            stats["angles_s"] += time.perf_counter() - t1
+            stats["inferred_frames"] += len(batch)
+            frames_done = batch[-1][0] + 1
+
+        if adaptive:
+            decoder = None
+            frames = _read_frames()
+            next_frame = lambda: next(frames)  # noqa: E731
+        else:
+            decoder = threading.Thread(target=_decoder, name="moveon-decoder", daemon=True)
+            decoder.start()
+            next_frame = frame_queue.get
+        try:
+            batch: List[Tuple[int, Any]] = []
+            frame_shape: Optional[Tuple[int, ...]] = None
+            while True:
+                t0 = time.perf_counter()
+                idx, payload = next_frame()
+                stats["wait_s"] += time.perf_counter() - t0
+                if payload is None or isinstance(payload, BaseException):
+                    # fim do vídeo (ou erro no decoder)
+                    if batch:
+                        _run_batch(batch)
+                    if isinstance(payload, BaseException):
+                        raise payload
+                    frames_done = idx
+                    _report_progress()
+                    break
+                frame_shape = payload.shape
+                batch.append((idx, payload))
+                if len(batch) >= batch_size:
+                    _run_batch(batch)
+                    batch = []
+                    _report_progress()
+        finally:
+            stop.set()
+            if decoder is not None:
+                decoder.join()
+            cap.release()
+        if recorder is not None:
+            height, width = frame_shape[:2] if frame_shape else (0, 0)
+            recorder.save(keypoints_path, fps=fps, width=width, height=height, model=self.model_name)
         return results
+
+
+def _default_queue_size() -> int:
+    try:
+        return max(1, int(os.getenv("MOVEON_DECODE_QUEUE", "8")))
+    except ValueError:
+        return 8
+
+
+def _visible_keypoints(xy: Any, conf: Any, min_conf: float = 0.3):
+    """Máscara dos keypoints detectados (não detectados vêm como (0, 0)) e com confiança >= min_conf."""
+    import numpy as np
+
+    visible = np.any(np.asarray(xy) != 0, axis=1)
+    if conf is not None:
+        visible &= np.asarray(conf) >= min_conf
+    return visible
+
+
+def _roi_settings(roi: Optional[bool]) -> Tuple[bool, int, float]:
+    """(usar recorte, imgsz do recorte, margem) a partir do argumento ou do ambiente."""
+    if roi is None:
+        roi = os.getenv("MOVEON_YOLO_ROI") == "1"
+    try:
+        imgsz = max(32, int(os.getenv("MOVEON_YOLO_ROI_IMGSZ", "320")) // 32 * 32)
+    except ValueError:
+        imgsz = 320
+    try:
+        margin = max(0.0, float(os.getenv("MOVEON_YOLO_ROI_MARGIN", "0.25")))
+    except ValueError:
+        margin = 0.25
+    return bool(roi), imgsz, margin
+
+
+def _accepts_stats(cb: Optional[Callable[..., None]]) -> bool:
+    """True se o callback de progresso aceita um 4º argumento (métricas do pipeline)."""
+    if cb is None:
+        return False
+    import inspect
+
+    try:
+        params = list(inspect.signature(cb).parameters.values())
+    except (TypeError, ValueError):
+        return False
+    if any(p.kind is p.VAR_POSITIONAL for p in params):
+        return True
+    positional = [p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+    return len(positional) >= 4
+
+
+def _pipeline_stats(stats: Dict[str, Any], frame_queue: Any) -> Dict[str, Any]:
+    """Resumo das métricas do pipeline (tempos médios por frame em ms)."""
+    decoded = stats["decoded_frames"] or 1
+    inferred = stats["inferred_frames"] or 1
+    return {
+        "queue_depth": frame_queue.qsize(),
+        "queue_size": stats["queue_size"],
+        "decode_ms": round(stats["decode_s"] * 1000 / decoded, 2),
+        "inference_ms": round(stats["inference_s"] * 1000 / inferred, 2),
+        "angles_ms": round(stats["angles_s"] * 1000 / inferred, 2),
+        "wait_ms": round(stats["wait_s"] * 1000 / inferred, 2),
+        "roi_frames": stats.get("roi_frames", 0),
+        "roi_fallbacks": stats.get("roi_fallbacks", 0),
+    }
@@ -0,0 +1,231 @@
+"""Registro em memória do progresso das análises em andamento.
+
+Guarda apenas o último feedback intermediário de cada vídeo (chave paciente + vídeo).
+Os endpoints de feedback de vídeo combinam este registro com o `storage`, onde só os
+estados terminais (concluído, erro, adiado) são gravados de forma durável.
+
+O registro é por processo: quando a análise termina em outro processo (worker do pool,
+outro processo do servidor) ou por um caminho de falha, `finish` não roda aqui. Quem lê o
+`storage` chama `settle` com o estado terminal gravado, que descarta o progresso em memória
+se ele for mais antigo.
+
+Clientes podem acompanhar um vídeo com `watch` (usado pelo endpoint SSE). Todos os clientes
+do mesmo vídeo compartilham um único canal: cada atualização é registrada uma vez e acorda
+um evento por event loop, não um por cliente.
+"""
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import threading
+
+
+_lock = threading.Lock()
+_latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+
+class _Channel:
+    """Assinatura compartilhada de um vídeo: último estado + número de sequência."""
+
+    def __init__(self) -> None:
+        self.seq = 0
+        self.latest: Optional[Dict[str, Any]] = None
+        self.done = False
+        self.subscribers = 0
+        # um asyncio.Event por event loop com clientes esperando
+        self.waiters: Dict[asyncio.AbstractEventLoop, asyncio.Event] = {}
+
+
+_channels: Dict[Tuple[str, str], _Channel] = {}
+
+
+def _key(feedback: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    patient_id = feedback.get("ID_Paciente") or feedback.get("patient_id")
+    video_filename = feedback.get("video_filename") or feedback.get("filename")
+    if patient_id is None or not video_filename:
+        return None
+    return str(patient_id), str(video_filename)
+
+
+def timestamp(feedback: Dict[str, Any]) -> Optional[datetime]:
+    """Timestamp (UTC, sem fuso) de um feedback, ou None."""
+    value = feedback.get("Timestamp") or feedback.get("date") or feedback.get("created_at")
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).rstrip("Z"))
+    except ValueError:
+        return None
+
+
+def _notify_locked(key: Tuple[str, str], feedback: Dict[str, Any], done: bool) -> List[Tuple[Any, Any]]:
+    channel = _channels.get(key)
+    if channel is None:
+        return []
+    channel.seq += 1
+    channel.latest = dict(feedback)
+    channel.done = done
+    waiters = list(channel.waiters.items())
+    channel.waiters.clear()
+    return waiters
+
+
+def _wake(waiters: List[Tuple[Any, Any]]) -> None:
+    for loop, event in waiters:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # loop já encerrado
+            pass
+
+
+def publish(feedback: Dict[str, Any]) -> None:
+    """Substitui o estado intermediário do vídeo pelo `feedback` mais recente."""
+    key = _key(feedback)
+    if key is None:
+        return
+    with _lock:
+        _latest[key] = dict(feedback)
+        waiters = _notify_locked(key, feedback, done=False)
+    _wake(waiters)
+
+
+def finish(feedback: Dict[str, Any]) -> None:
+    """Estado terminal já persistido: remove o progresso em memória e avisa quem acompanha o vídeo."""
+    key = _key(feedback)
+    if key is None:
+        return
+    with _lock:
+        _latest.pop(key, None)
+        waiters = _notify_locked(key, feedback, done=True)
+    _wake(waiters)
+
+
+def settle(stored: Dict[str, Any]) -> bool:
+    """Estado terminal lido do `storage`: se não for mais antigo que o progresso em memória do
+    vídeo, descarta o progresso e avisa quem acompanha o vídeo (como `finish`).
+
+    Retorna True se o progresso em memória foi descartado, ou seja, `stored` é o estado atual.
+    """
+    key = _key(stored)
+    stored_at = timestamp(stored)
+    if key is None or stored_at is None:
+        return False
+    with _lock:
+        live = _latest.get(key)
+        if live is None:
+            return False
+        live_at = timestamp(live)
+        if live_at is not None and live_at > stored_at:
+            # análise nova do mesmo vídeo em andamento
+            return False
+        del _latest[key]
+        waiters = _notify_locked(key, stored, done=True)
+    _wake(waiters)
+    return True
+
+
+async def watch(
+    patient_id: Any,
+    video_filename: str,
+    stored: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+    heartbeat: float = 15.0,
+    poll: float = 2.0,
+) -> AsyncIterator[Optional[Tuple[Dict[str, Any], bool]]]:
+    """Gera `(feedback, terminal)` a cada atualização do vídeo, começando pelo estado atual.
+
+    `stored()` devolve o estado terminal persistido (ou None enquanto a análise não terminou).
+    Sem progresso em memória, o estado inicial vem dele; enquanto espera, ele é consultado a
+    cada `poll` segundos, para não ficar preso quando a análise termina fora deste processo.
+    Termina depois do estado terminal; gera None a cada `heartbeat` segundos sem novidades.
+    """
+    key = (str(patient_id), str(video_filename))
+    loop = asyncio.get_running_loop()
+    with _lock:
+        channel = _channels.setdefault(key, _Channel())
+        channel.subscribers += 1
+        seen = channel.seq
+        current = _latest.get(key)
+        current = dict(current) if current is not None else None
+    try:
+        seen_at = None  # timestamp do último estado enviado
+        if current is None and stored is not None:
+            final = await asyncio.to_thread(stored)
+            with _lock:
+                # pode ter chegado um estado mais novo durante a consulta
+                stale = channel.seq != seen
+            if final is not None and not stale:
+                yield final, True
+                return
+        elif current is not None:
+            seen_at = timestamp(current)
+            yield current, False
+
+        idle_since = loop.time()
+        while True:
+            with _lock:
+                if channel.seq != seen:
+                    seen = channel.seq
+                    item = (dict(channel.latest), channel.done)
+                    event = None
+                else:
+                    item = None
+                    event = channel.waiters.get(loop)
+                    if event is None:
+                        event = channel.waiters[loop] = asyncio.Event()
+            if item is not None:
+                seen_at = timestamp(item[0]) or seen_at
+                idle_since = loop.time()
+                yield item
+                if item[1]:
+                    return
+                continue
+            timeout = heartbeat - (loop.time() - idle_since)
+            if stored is not None:
+                timeout = min(timeout, poll)
+            try:
+                await asyncio.wait_for(event.wait(), timeout=max(0.0, timeout))
+                continue
+            except asyncio.TimeoutError:
+                pass
+            if stored is not None:
+                final = await asyncio.to_thread(stored)
+                # com progresso em memória, `settle` o troca pelo final e o laço o envia
+                if final is not None and not settle(final):
+                    final_at = timestamp(final)
+                    with _lock:
+                        stale = channel.seq != seen
+                    if not stale and (seen_at is None or (final_at is not None and final_at >= seen_at)):
+                        yield final, True
+                        return
+            if loop.time() - idle_since >= heartbeat:
+                idle_since = loop.time()
+                yield None
+    finally:
+        with _lock:
+            channel.subscribers -= 1
+            if channel.subscribers <= 0 and _channels.get(key) is channel:
+                del _channels[key]
+
+
+def get(patient_id: Any, video_filename: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        feedback = _latest.get((str(patient_id), str(video_filename)))
+    return dict(feedback) if feedback is not None else None
+
+
+def for_patient(patient_id: Any) -> List[Dict[str, Any]]:
+    """Estados intermediários de todos os vídeos do paciente."""
+    patient_id = str(patient_id)
+    with _lock:
+        return [dict(fb) for (pid, _), fb in _latest.items() if pid == patient_id]
+
+
+def subscriber_count(patient_id: Any, video_filename: str) -> int:
+    with _lock:
+        channel = _channels.get((str(patient_id), str(video_filename)))
+        return channel.subscribers if channel is not None else 0
+
+
+def clear() -> None:
+    with _lock:
+        _latest.clear()
@@ -0,0 +1,124 @@
+"""Reprocessamento em lote das regras sobre os keypoints salvos (sem vídeo, sem YOLO).
+
+Usado por `scripts.rescore_analyses` quando os critérios de amplitude mudam: cada vídeo com
+feedback em `video_feedbacks` e arquivo em uploads/keypoints/ é pontuado de novo em um pool
+de processos, e o resultado volta para o store de feedback à medida que cada lote termina.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import time
+
+from app.analysis import engine, keypoints, storage
+
+
+class Target(NamedTuple):
+    patient_id: str
+    exercise_id: str
+    video_filename: str
+    keypoints_path: str
+    timestamp: Optional[str] = None  # Timestamp do feedback original (mantém a ordem da lista)
+
+
+@dataclass
+class RescoreStats:
+    videos: int = 0
+    frames: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def videos_per_s(self) -> float:
+        return self.videos / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    @property
+    def frames_per_s(self) -> float:
+        return self.frames / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+def targets(patient_id: Optional[str] = None) -> List[Target]:
+    """Vídeos com feedback salvo e keypoints em disco (opcionalmente de um só paciente)."""
+    out: List[Target] = []
+    for pid, exercise_id, filename, timestamp in storage.stored_videos(patient_id):
+        path = keypoints.path_for(filename)
+        if path.exists():
+            out.append(Target(pid, exercise_id or "", filename, str(path), timestamp))
+    return out
+
+
+def rescore_target(target: Target, joint: str = engine.JOINT, **rules: Any) -> Dict[str, Any]:
+    """Feedback de um vídeo com os novos critérios.
+
+    `rules` vai para `engine.score_samples` (down_threshold, up_threshold, min_reps, smooth).
+    """
+    series = keypoints.load(target.keypoints_path)
+    samples = keypoints.samples_from_keypoints(series, joint)
+    feedback = engine.score_samples(target.patient_id, target.exercise_id, samples, **rules)
+    feedback.update({
+        "Timestamp": target.timestamp or feedback["Timestamp"],
+        "video_filename": target.video_filename,
+        "progress": 100,
+        "rescored_at": datetime.utcnow().isoformat() + "Z",
+        "rules": {"joint": joint, **rules},
+        "frames": len(series.timestamps),
+    })
+    return feedback
+
+
+def _rescore_chunk(chunk: List[Target], rules: Dict[str, Any]) -> List[Tuple[Target, Optional[Dict[str, Any]], Optional[str]]]:
+    """Executado no processo do pool: um lote de vídeos por tarefa (cada um leva ~ms)."""
+    out = []
+    for target in chunk:
+        try:
+            out.append((target, rescore_target(target, **rules), None))
+        except Exception as exc:  # noqa: BLE001
+            out.append((target, None, str(exc)))
+    return out
+
+
+def run(
+    items: List[Target],
+    workers: Optional[int] = None,
+    chunk_size: int = 16,
+    save: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_result: Optional[Callable[[Target, Optional[Dict[str, Any]], RescoreStats], None]] = None,
+    executor: Optional[Executor] = None,
+    **rules: Any,
+) -> RescoreStats:
+    """Pontua `items` em paralelo e grava cada resultado assim que seu lote fica pronto.
+
+    `rules` vai para `rescore_target` (joint, down_threshold, up_threshold, min_reps, smooth).
+    `save` (padrão `storage.save_feedback`) roda no processo principal; `on_result` recebe
+    cada vídeo concluído (feedback None em caso de erro) para relatórios de progresso.
+    """
+    save = save or storage.save_feedback
+    chunk_size = max(1, int(chunk_size))
+    stats = RescoreStats()
+    start = time.perf_counter()
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(_rescore_chunk, items[i:i + chunk_size], rules)
+            for i in range(0, len(items), chunk_size)
+        ]
+        for future in as_completed(futures):
+            for target, feedback, error in future.result():
+                if feedback is None:
+                    stats.failed += 1
+                    stats.errors.append(f"{target.patient_id}/{target.video_filename}: {error}")
+                else:
+                    save(feedback)
+                    stats.videos += 1
+                    stats.frames += feedback["frames"]
+                stats.elapsed_s = time.perf_counter() - start
+                if on_result is not None:
+                    on_result(target, feedback, stats)
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+    stats.elapsed_s = time.perf_counter() - start
+    return stats
@@ -0,0 +1,216 @@
+"""Renditions de um vídeo enviado, geradas em uma única passada de decodificação.
+
+- analysis: resolução reduzida (maior lado MOVEON_ANALYSIS_MAX_SIDE, padrão 640) e mesmo fps;
+  é o arquivo que o processor lê, então 4K/60fps HEVC do celular é decodificado uma vez só.
+- playback: maior lado MOVEON_PLAYBACK_MAX_SIDE (padrão 1280) em um codec tocável no navegador
+  (H.264 quando o OpenCV tiver o encoder, senão VP8/WebM); servido em /videos/{filename}/playback.
+  O OpenCV só escreve vídeo: a rendition de playback não tem a trilha de áudio do original.
+
+As duas são geradas juntas por um estágio em segundo plano depois do upload
+(`runtime.submit_renditions` -> `ensure`), fora do caminho da inferência. A análise nunca
+converte o vídeo: `analysis_source` usa a rendition de análise se ela já existe (reanálises,
+reenvios) e senão lê o original, pulando frames com a amostragem do processor.
+
+Os arquivos ficam em uploads/renditions/<nome>.analysis.mp4 e <nome>.playback.<ext>. Como os
+uploads são endereçados por conteúdo, cada vídeo é convertido uma única vez.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+from app.core import uploads
+
+
+ANALYSIS_FOURCC = "mp4v"
+# (fourcc, extensão) em ordem de preferência para o navegador
+PLAYBACK_CODECS = (("avc1", ".mp4"), ("VP80", ".webm"), ("mp4v", ".mp4"))
+
+
+class Renditions(NamedTuple):
+    analysis: Optional[Path]
+    playback: Optional[Path]
+    frames: int
+    decode_s: float
+
+
+def enabled() -> bool:
+    return os.getenv("MOVEON_RENDITIONS", "1") != "0"
+
+
+def _max_side(env: str, default: int) -> int:
+    try:
+        return max(16, int(os.getenv(env, str(default))))
+    except ValueError:
+        return default
+
+
+def analysis_max_side() -> Optional[int]:
+    """Maior lado da rendition lida pelo processor (None: renditions desligadas, lê o original)."""
+    return _max_side("MOVEON_ANALYSIS_MAX_SIDE", 640) if enabled() else None
+
+
+def renditions_dir() -> Path:
+    return uploads.UPLOAD_ROOT / "renditions"
+
+
+def analysis_path(video_filename: str) -> Path:
+    return renditions_dir() / f"{Path(video_filename).stem}.analysis.mp4"
+
+
+def playback_path(video_filename: str) -> Optional[Path]:
+    """Rendition de playback já gerada para o vídeo, se houver."""
+    stem = Path(video_filename).stem
+    for _, ext in PLAYBACK_CODECS:
+        path = renditions_dir() / f"{stem}.playback{ext}"
+        if path.exists():
+            return path
+    return None
+
+
+def all_paths(video_filename: str) -> list:
+    stem = Path(video_filename).stem
+    return [analysis_path(video_filename)] + [renditions_dir() / f"{stem}.playback{ext}" for _, ext in PLAYBACK_CODECS]
+
+
+def scaled_size(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """Reduz (nunca amplia) mantendo a proporção; dimensões pares para os encoders."""
+    scale = min(1.0, max_side / float(max(width, height)))
+    w = max(2, int(round(width * scale / 2)) * 2)
+    h = max(2, int(round(height * scale / 2)) * 2)
+    return w, h
+
+
+def _open_writer(path: Path, fourcc: str, fps: float, size: Tuple[int, int]):
+    import cv2
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    if writer.isOpened():
+        return writer
+    writer.release()
+    path.unlink(missing_ok=True)
+    return None
+
+
+def _open_playback_writer(tmp_stem: Path, fps: float, size: Tuple[int, int]):
+    codecs = PLAYBACK_CODECS
+    forced = os.getenv("MOVEON_PLAYBACK_CODEC")
+    if forced:
+        codecs = tuple(c for c in PLAYBACK_CODECS if c[0] == forced) or PLAYBACK_CODECS
+    for fourcc, ext in codecs:
+        path = tmp_stem.with_name(tmp_stem.name + ext)
+        writer = _open_writer(path, fourcc, fps, size)
+        if writer is not None:
+            return writer, path, ext
+    return None, None, None
+
+
+def make_renditions(
+    video_path: str,
+    video_filename: Optional[str] = None,
+    playback: bool = True,
+    analysis: bool = True,
+) -> Renditions:
+    """Decodifica `video_path` uma vez e grava as renditions pedidas (análise e/ou playback)."""
+    import cv2
+    import time
+
+    video_filename = video_filename or Path(video_path).name
+    out_dir = renditions_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Não foi possível abrir o vídeo: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    analysis_size = scaled_size(width, height, analysis_max_side() or _max_side("MOVEON_ANALYSIS_MAX_SIDE", 640))
+    playback_size = scaled_size(width, height, _max_side("MOVEON_PLAYBACK_MAX_SIDE", 1280))
+
+    token = uuid.uuid4().hex[:8]
+    tmp_analysis = out_dir / f".{Path(video_filename).stem}.{token}.analysis.mp4"
+    analysis_writer = None
+    if analysis:
+        analysis_writer = _open_writer(tmp_analysis, ANALYSIS_FOURCC, fps, analysis_size)
+        if analysis_writer is None:
+            cap.release()
+            raise RuntimeError("Encoder de vídeo indisponível para a rendition de análise")
+    playback_writer, tmp_playback, playback_ext = (None, None, None)
+    if playback:
+        playback_writer, tmp_playback, playback_ext = _open_playback_writer(
+            out_dir / f".{Path(video_filename).stem}.{token}.playback", fps, playback_size
+        )
+        if playback_writer is None and analysis_writer is None:
+            cap.release()
+            raise RuntimeError("Encoder de vídeo indisponível para a rendition de playback")
+
+    frames = 0
+    decode_s = 0.0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            ret, frame = cap.read()
+            decode_s += time.perf_counter() - t0
+            if not ret:
+                break
+            frames += 1
+            # INTER_AREA: melhor qualidade ao reduzir
+            if analysis_writer is not None:
+                analysis_writer.write(
+                    frame if analysis_size == (width, height)
+                    else cv2.resize(frame, analysis_size, interpolation=cv2.INTER_AREA)
+                )
+            if playback_writer is not None:
+                playback_writer.write(
+                    frame if playback_size == (width, height)
+                    else cv2.resize(frame, playback_size, interpolation=cv2.INTER_AREA)
+                )
+    except BaseException:
+        if analysis_writer is not None:
+            analysis_writer.release()
+            tmp_analysis.unlink(missing_ok=True)
+        if playback_writer is not None:
+            playback_writer.release()
+            tmp_playback.unlink(missing_ok=True)
+        raise
+    finally:
+        cap.release()
+
+    final_analysis = None
+    if analysis_writer is not None:
+        analysis_writer.release()
+        final_analysis = analysis_path(video_filename)
+        os.replace(tmp_analysis, final_analysis)
+    final_playback = None
+    if playback_writer is not None:
+        playback_writer.release()
+        final_playback = out_dir / f"{Path(video_filename).stem}.playback{playback_ext}"
+        os.replace(tmp_playback, final_playback)
+    return Renditions(final_analysis, final_playback, frames, decode_s)
+
+
+def analysis_source(video_path: str, video_filename: Optional[str] = None) -> str:
+    """Caminho que o processor deve ler: a rendition de análise, se já existe, ou o original.
+
+    Nunca converte: converter aqui decodificaria e recodificaria todos os frames antes da
+    inferência, o que a amostragem do processor (grab dos frames pulados) evita.
+    """
+    if not enabled():
+        return video_path
+    existing = analysis_path(video_filename or Path(video_path).name)
+    return str(existing) if existing.exists() else video_path
+
+
+def ensure(video_path: str, video_filename: Optional[str] = None) -> Optional[Renditions]:
+    """Gera, numa única passada, as renditions que ainda não existem (None se nada a fazer)."""
+    if not enabled():
+        return None
+    video_filename = video_filename or Path(video_path).name
+    analysis = not analysis_path(video_filename).exists()
+    playback = playback_path(video_filename) is None
+    if not (analysis or playback):
+        return None
+    return make_renditions(video_path, video_filename, playback=playback, analysis=analysis)
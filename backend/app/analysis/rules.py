@@ -1,7 +1,17 @@
 """Business rules and helper math for angle-based validation and repetition counting."""
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 import math
 
+import numpy as np
+
+
+# Índices COCO (a, b, c) de cada articulação: ângulo em b, lados (esquerdo, direito)
+JOINT_KEYPOINTS: Dict[str, Tuple[Tuple[int, int, int], Tuple[int, int, int]]] = {
+    "knee": ((11, 13, 15), (12, 14, 16)),  # quadril, joelho, tornozelo
+    "hip": ((5, 11, 13), (6, 12, 14)),  # ombro, quadril, joelho
+    "elbow": ((5, 7, 9), (6, 8, 10)),  # ombro, cotovelo, punho
+}
+
 
 def compute_angle(a: Tuple[float, float], b: Tuple[float, float], c: Tuple[float, float]) -> float:
     """Compute angle ABC (in degrees) given three 2D points a,b,c.
@@ -24,6 +34,35 @@ def compute_angle(a: Tuple[float, float], b: Tuple[float, float], c: Tuple[float
     return math.degrees(angle_rad)
 
 
+def _angles_at(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Versão vetorizada de `compute_angle` para arrays de pontos (..., 2)."""
+    ba = a - b
+    bc = c - b
+    dot = ba[..., 0] * bc[..., 0] + ba[..., 1] * bc[..., 1]
+    mag = np.hypot(ba[..., 0], ba[..., 1]) * np.hypot(bc[..., 0], bc[..., 1])
+    degenerate = mag == 0
+    cosv = np.clip(dot / np.where(degenerate, 1.0, mag), -1.0, 1.0)
+    return np.where(degenerate, 0.0, np.degrees(np.arccos(cosv)))
+
+
+def compute_angles(kps: np.ndarray, joint: str = "knee") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute left/right/mean `joint` angles for a keypoint sequence in one NumPy pass.
+
+    kps: array (T, 17, 2) (or a single frame (17, 2)) with COCO keypoints (x, y).
+    Returns (left, right, mean) arrays of shape (T,), in degrees. Zero-length vectors yield
+    0.0, exactly like `compute_angle`, which remains the scalar reference.
+    """
+    if joint not in JOINT_KEYPOINTS:
+        raise ValueError(f"Articulação não suportada: {joint}")
+    pts = np.asarray(kps, dtype=np.float64)
+    if pts.ndim < 2 or pts.shape[-2] < 17 or pts.shape[-1] != 2:
+        raise ValueError(f"Esperado array (T, 17, 2) de keypoints, recebido {pts.shape}")
+    (la, lb, lc), (ra, rb, rc) = JOINT_KEYPOINTS[joint]
+    left = _angles_at(pts[..., la, :], pts[..., lb, :], pts[..., lc, :])
+    right = _angles_at(pts[..., ra, :], pts[..., rb, :], pts[..., rc, :])
+    return left, right, (left + right) / 2.0
+
+
 def count_reps(angle_sequence: List[Tuple[float, float]], down_threshold: float = 90.0, up_threshold: float = 160.0) -> int:
     """Count repetitions based on angle sequence.
 
@@ -75,3 +114,89 @@ def segment_reps(angle_sequence: List[Tuple[float, float]], down_threshold: floa
                 state = "up"
 
     return reps
+
+
+def _rep_bounds(angles: np.ndarray, down_threshold: float, up_threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Índices (início, fim) de cada repetição completa, equivalentes à máquina de estados de `segment_reps`.
+
+    Só as amostras que cruzam um limiar importam: o início é a primeira amostra <= down após
+    estar em "up" e o fim é a primeira amostra >= up depois dele. Assume down < up.
+    """
+    is_down = angles <= down_threshold
+    events = np.flatnonzero(is_down | (angles >= up_threshold))
+    if events.size == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    kinds = is_down[events]
+    # primeira amostra de cada sequência de eventos do mesmo tipo (D...D, U...U)
+    change = np.empty(kinds.size, dtype=bool)
+    change[0] = True
+    np.not_equal(kinds[1:], kinds[:-1], out=change[1:])
+    firsts = events[change]
+    if not kinds[change][0]:
+        # começa em "up": eventos up iniciais não mudam o estado
+        firsts = firsts[1:]
+    ends = firsts[1::2]
+    starts = firsts[0::2][:ends.size]
+    return starts, ends
+
+
+def count_reps_array(
+    timestamps: np.ndarray,
+    angles: np.ndarray,
+    down_threshold: float = 90.0,
+    up_threshold: float = 160.0,
+) -> int:
+    """Versão vetorizada de `count_reps` para arrays de timestamps e ângulos."""
+    angles = np.asarray(angles, dtype=np.float64)
+    if down_threshold >= up_threshold:
+        return count_reps(list(zip(np.asarray(timestamps).tolist(), angles.tolist())), down_threshold, up_threshold)
+    _, ends = _rep_bounds(angles, down_threshold, up_threshold)
+    return int(ends.size)
+
+
+def segment_reps_array(
+    timestamps: np.ndarray,
+    angles: np.ndarray,
+    down_threshold: float = 90.0,
+    up_threshold: float = 160.0,
+) -> List[Dict[str, float]]:
+    """Versão vetorizada de `segment_reps` para arrays de timestamps e ângulos.
+
+    Encontra os cruzamentos de limiar com operações vetorizadas e só percorre em Python os
+    pontos de cruzamento. Retorna os mesmos dicts de `segment_reps`.
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    angles = np.asarray(angles, dtype=np.float64)
+    if ts.shape != angles.shape or angles.ndim != 1:
+        raise ValueError("timestamps e angles devem ser arrays 1-D do mesmo tamanho")
+    if down_threshold >= up_threshold:
+        return segment_reps(list(zip(ts.tolist(), angles.tolist())), down_threshold, up_threshold)
+
+    starts, ends = _rep_bounds(angles, down_threshold, up_threshold)
+    if starts.size == 0:
+        return []
+
+    # min/max em [início, fim] de cada repetição (segmentos disjuntos e ordenados)
+    bounds = np.empty(2 * starts.size, dtype=np.intp)
+    bounds[0::2] = starts
+    bounds[1::2] = ends + 1
+    padded = np.append(angles, angles[-1])
+    mins = np.minimum.reduceat(padded, bounds)[0::2]
+    maxs = np.maximum.reduceat(padded, bounds)[0::2]
+
+    # fundo = primeira amostra que atinge o mínimo do segmento
+    lengths = ends - starts + 1
+    seg_of = np.repeat(np.arange(starts.size), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    pos = np.repeat(starts, lengths) + offsets
+    hits = np.flatnonzero(angles[pos] == mins[seg_of])
+    _, first_hit = np.unique(seg_of[hits], return_index=True)
+    bottoms = pos[hits[first_hit]]
+
+    return [
+        {"start": s, "bottom": b, "end": e, "min_angle": mn, "max_angle": mx}
+        for s, b, e, mn, mx in zip(
+            ts[starts].tolist(), ts[bottoms].tolist(), ts[ends].tolist(), mins.tolist(), maxs.tolist()
+        )
+    ]
@@ -2,21 +2,69 @@
 
 Goals:
 - Reuse a single YOLO model instance (avoid re-loading per request)
-- Run analysis asynchronously (background thread pool) so uploads return quickly
+- Run analysis asynchronously (background pool) so uploads return quickly
+
+The pool backend is chosen with MOVEON_ANALYSIS_BACKEND:
+- "thread" (default): ThreadPoolExecutor sharing one processor in this process
+- "process": ProcessPoolExecutor; each worker loads its own YOLOPoseWrapper once, at
+  worker init, and sends progress/final feedback back to the parent.
+
+Progress updates only go to the in-memory registry (`app.analysis.progress`); the terminal
+state of each analysis (done, error, deferred) is persisted with `storage.save_feedback`.
+
+Jobs are durable: `submit_analysis` only inserts a row in `analysis_jobs` (see
+`app.analysis.jobs`) and a dispatcher thread claims queued jobs with a lease, runs them on
+the pool and renews the lease while they run. `start_workers` (startup hook) requeues jobs
+whose lease expired, so a restart never leaves an analysis stuck as "Pendente".
+
+If a pool process dies (os._exit, OOM kill) the ProcessPoolExecutor is broken for good: it
+is discarded and rebuilt on the next submit, and the jobs it was running go back to the
+queue like an expired lease (failed with an "Erro" feedback after MAX_ATTEMPTS).
+
+Every terminal failure reaches the feedback store: a job that fails without a terminal
+feedback of its own (expired leases past MAX_ATTEMPTS, exceptions raised by the pool) gets
+an "Erro" entry through `_save_job_error`, which also clears its in-memory progress.
+
+Which queued job runs next is decided by `AnalysisScheduler`: priority class first
+("interactive" uploads before "batch" re-analyses), then a fair share per patient or
+physiotherapist (MOVEON_FAIRNESS_KEY), then the shortest job (CAP_PROP_FRAME_COUNT).
+
+Uploads are content-addressed (`app.analysis.blobs`) and finished analyses are cached by
+(video hash, model, joint, thresholds, sampling) in `app.analysis.cache`, so a duplicate
+upload gets the cached feedback without scheduling inference.
+
+After the upload, `submit_renditions` produces the low-resolution analysis rendition and the
+web playback rendition in one decode pass, on its own background thread, off the analysis
+path (`app.analysis.renditions`). The analysis reads the analysis rendition when it already
+exists and the original (with stride/grab sampling) otherwise; it never transcodes.
 
 This is intentionally lightweight (no Redis/Celery) to fit the current project.
 """
 
 from __future__ import annotations
 
-from concurrent.futures import ThreadPoolExecutor, Future
-from typing import Any, Dict, Optional
+from collections import defaultdict, deque
+from functools import partial
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import multiprocessing
+import socket
 import threading
+import time
 import os
+import uuid
 from datetime import datetime
 
-from app.analysis import engine, storage
-from app.analysis.processor import YOLOPoseWrapper
+from sqlmodel import Session, SQLModel, func, select
+
+from app.analysis import blobs, cache, engine, jobs, keypoints, progress, renditions, storage
+from app.analysis.processor import DEFAULT_MODEL, YOLOPoseWrapper, _roi_settings
+from app.core import database
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.models.analysis_job import AnalysisJob
+from app.models.video_blob import VideoBlob, VideoBlobRef
+from app.models.patient import Patient
 
 
 _processor_lock = threading.Lock()
@@ -32,7 +80,128 @@ def get_processor() -> YOLOPoseWrapper:
         return _cached_processor
 
 
-_executor = ThreadPoolExecutor(max_workers=int(os.getenv("MOVEON_ANALYSIS_WORKERS", "1")))
+def _analysis_sampling() -> Dict[str, Any]:
+    """Taxa de análise configurada via MOVEON_ANALYSIS_FPS / MOVEON_ANALYSIS_ADAPTIVE."""
+    opts: Dict[str, Any] = {}
+    rate = os.getenv("MOVEON_ANALYSIS_FPS")
+    if rate:
+        try:
+            opts["sample_rate"] = float(rate)
+        except ValueError:
+            pass
+    if os.getenv("MOVEON_ANALYSIS_ADAPTIVE") == "1":
+        opts["adaptive"] = True
+    return opts
+
+
+_executor_lock = threading.Lock()
+_executor: Optional[Executor] = None
+# renditions (análise + playback): uma thread própria, fora do pool de análise
+_renditions_executor: Optional[ThreadPoolExecutor] = None
+_renditions_pending: set = set()
+_updates_queue: Any = None  # multiprocessing.Queue (backend "process")
+_updates_thread: Optional[threading.Thread] = None
+
+# Fila para enviar feedbacks ao processo pai (definida no initializer do worker)
+_worker_updates: Any = None
+
+
+def _backend() -> str:
+    backend = (os.getenv("MOVEON_ANALYSIS_BACKEND") or "thread").strip().lower()
+    return backend if backend in ("thread", "process") else "thread"
+
+
+def _init_worker(model_name: Optional[str], updates_queue: Any) -> None:
+    """Initializer dos processos do pool: carrega o modelo uma única vez por worker."""
+    global _cached_processor, _worker_updates
+    _worker_updates = updates_queue
+    with _processor_lock:
+        _cached_processor = YOLOPoseWrapper(model=model_name)
+
+
+def _save_final(feedback: Dict[str, Any]) -> None:
+    """Persiste o estado terminal da análise e descarta o progresso em memória do vídeo."""
+    storage.save_feedback(feedback)
+    progress.finish(feedback)
+
+
+def _send_update(kind: str, feedback: Dict[str, Any]) -> None:
+    """Executado no worker: envia ("progress" | "final", feedback) ao processo pai."""
+    _worker_updates.put((kind, feedback))
+
+
+def _drain_updates(updates_queue: Any) -> None:
+    """Thread do processo pai: aplica os feedbacks enviados pelos workers."""
+    while True:
+        item = updates_queue.get()
+        if item is None:
+            break
+        kind, feedback = item
+        try:
+            if kind == "progress":
+                progress.publish(feedback)
+            else:
+                _save_final(feedback)
+        except Exception:
+            # falha ao gravar um feedback não pode derrubar a thread
+            pass
+
+
+def get_executor() -> Executor:
+    """Pool de análise (criado sob demanda conforme MOVEON_ANALYSIS_BACKEND)."""
+    global _executor, _updates_queue, _updates_thread
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.getenv("MOVEON_ANALYSIS_WORKERS", "1"))
+            if _backend() == "process":
+                ctx = multiprocessing.get_context(os.getenv("MOVEON_ANALYSIS_MP_START", "spawn"))
+                if _updates_queue is None:
+                    # a fila e a thread sobrevivem à troca de um pool quebrado
+                    _updates_queue = ctx.Queue()
+                    _updates_thread = threading.Thread(
+                        target=_drain_updates, args=(_updates_queue,), name="moveon-analysis-updates", daemon=True
+                    )
+                    _updates_thread.start()
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=ctx,
+                    initializer=_init_worker,
+                    initargs=(os.getenv("MOVEON_YOLO_MODEL"), _updates_queue),
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers)
+        return _executor
+
+
+def _discard_executor(executor: Executor) -> None:
+    """Descarta um pool quebrado (BrokenProcessPool); o próximo `get_executor` cria outro."""
+    global _executor
+    with _executor_lock:
+        if _executor is not executor:
+            return  # já trocado por outra thread
+        _executor = None
+    executor.shutdown(wait=False)
+
+
+def shutdown(wait: bool = True) -> None:
+    """Encerra o dispatcher e o pool de análise (e a thread que recebe os feedbacks dos workers).
+
+    Jobs ainda em execução mantêm o lease no banco e voltam para a fila quando ele vencer.
+    """
+    global _executor, _updates_queue, _updates_thread, _renditions_executor
+    _stop_dispatcher()
+    with _executor_lock:
+        executor, updates_queue, updates_thread = _executor, _updates_queue, _updates_thread
+        _executor, _updates_queue, _updates_thread = None, None, None
+        renditions_executor, _renditions_executor = _renditions_executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+    if renditions_executor is not None:
+        renditions_executor.shutdown(wait=wait)
+    if updates_queue is not None:
+        updates_queue.put(None)
+        if updates_thread is not None and wait:
+            updates_thread.join()
 
 
 def _pending_feedback(patient_id: str, exercise_id: str, filename: str, note: str) -> Dict[str, Any]:
@@ -56,10 +225,11 @@ def _progress_feedback(
     progress: int,
     frames_done: int,
     frames_total: int,
+    pipeline: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     progress_clamped = max(0, min(int(progress), 100))
     note = f"Analisando vídeo: {frames_done}/{frames_total} frames ({progress_clamped}%)"
-    return {
+    feedback = {
         "ID_Paciente": patient_id,
         "ID_Exercicio": exercise_id,
         "Timestamp": datetime.utcnow().isoformat() + "Z",
@@ -72,6 +242,10 @@ def _progress_feedback(
         "frames_done": frames_done,
         "frames_total": frames_total,
     }
+    if pipeline:
+        # profundidade da fila do decoder e tempo médio por frame de cada estágio
+        feedback["pipeline"] = pipeline
+    return feedback
 
 
 def _error_feedback(patient_id: str, exercise_id: str, filename: str, err: str) -> Dict[str, Any]:
@@ -87,14 +261,30 @@ def _error_feedback(patient_id: str, exercise_id: str, filename: str, err: str)
     }
 
 
-def analyze_and_log(patient_id: str, exercise_id: str, video_path: str, filename: str) -> Dict[str, Any]:
-    """Run analysis (blocking) and write a final log entry."""
+def analyze_and_log(
+    patient_id: str,
+    exercise_id: str,
+    video_path: str,
+    filename: str,
+    save: Optional[Callable[[Dict[str, Any]], None]] = None,
+    report: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """Run analysis (blocking) and write a final log entry.
+
+    `save` receives the terminal feedback (done, error or deferred) and defaults to persisting
+    it; `report` receives the intermediate progress feedbacks and defaults to the in-memory
+    registry (`progress.publish`).
+    """
+    if save is None:
+        save = _save_final
+    if report is None:
+        report = progress.publish
     try:
         proc = get_processor()
 
         last_progress = -1
 
-        def _on_progress(pct: int, done: int, total: int) -> None:
+        def _on_progress(pct: int, done: int, total: int, stats: Optional[Dict[str, Any]] = None) -> None:
             nonlocal last_progress
             try:
                 pct_i = int(pct)
@@ -106,19 +296,26 @@ def analyze_and_log(patient_id: str, exercise_id: str, video_path: str, filename
             if pct_i >= 100:
                 return
             last_progress = pct_i
-            storage.save_feedback(_progress_feedback(patient_id, exercise_id, filename, pct_i, done, total))
+            report(_progress_feedback(patient_id, exercise_id, filename, pct_i, done, total, stats))
 
+        # rendition de análise se o estágio pós-upload já a gerou; senão o original
+        source = renditions.analysis_source(video_path, filename)
         feedback = engine.analyze_video(
             patient_id,
             exercise_id,
-            video_path,
+            source,
             processor=proc,
             progress_cb=_on_progress,
+            # keypoints por frame, para reprocessar as regras sem rodar o YOLO de novo
+            keypoints_path=str(keypoints.path_for(filename)),
+            **_analysis_sampling(),
         )
         if isinstance(feedback, dict):
             feedback.setdefault("video_filename", filename)
             feedback.setdefault("progress", 100)
-        storage.save_feedback(feedback)
+            # entra na chave do cache: resultado do original não é servido como o da rendition
+            feedback.setdefault("analysis_source", "original" if source == video_path else "rendition")
+        save(feedback)
         return feedback
     except NotImplementedError:
         feedback = _pending_feedback(
@@ -127,14 +324,550 @@ def analyze_and_log(patient_id: str, exercise_id: str, video_path: str, filename
             filename,
             "Inference unavailable in this environment; análise adiada",
         )
-        storage.save_feedback(feedback)
+        save(feedback)
         return feedback
     except Exception as exc:  # noqa: BLE001
         feedback = _error_feedback(patient_id, exercise_id, filename, str(exc))
-        storage.save_feedback(feedback)
+        save(feedback)
         return feedback
 
 
-def submit_analysis(patient_id: str, exercise_id: str, video_path: str, filename: str) -> Future:
-    """Submit analysis to background thread pool."""
-    return _executor.submit(analyze_and_log, patient_id, exercise_id, video_path, filename)
+def _analyze_in_worker(patient_id: str, exercise_id: str, video_path: str, filename: str) -> Dict[str, Any]:
+    """Executado dentro de um processo do pool: feedbacks voltam ao pai pela fila."""
+    return analyze_and_log(
+        patient_id,
+        exercise_id,
+        video_path,
+        filename,
+        save=partial(_send_update, "final"),
+        report=partial(_send_update, "progress"),
+    )
+
+
+def _analyze_for_job(job: AnalysisJob) -> Tuple[Executor, Future]:
+    """Envia o job ao pool; se o pool estiver quebrado (um worker morreu), recria e tenta de novo."""
+    for attempt in range(2):
+        executor = get_executor()
+        target = _analyze_in_worker if isinstance(executor, ProcessPoolExecutor) else analyze_and_log
+        try:
+            return executor, executor.submit(target, job.patient_id, job.exercise_id, job.video_path, job.video_filename)
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            if attempt:
+                raise
+
+
+# ---------------------------------------------------------------------------
+# Escalonador: classe de prioridade -> fair share -> menor job primeiro
+# ---------------------------------------------------------------------------
+
+# Classes de prioridade em ordem (a primeira é atendida antes)
+PRIORITY_CLASSES = ("interactive", "batch")
+
+# Custo assumido quando o vídeo não informa CAP_PROP_FRAME_COUNT (~30s a 30fps)
+_DEFAULT_FRAME_COUNT = 900
+
+
+class AnalysisScheduler:
+    """Escolhe o próximo job entre os candidatos queued.
+
+    1. classe de prioridade (jobs "batch" esperando mais que `max_wait_seconds` sobem de classe);
+    2. fair share: a chave (paciente/fisioterapeuta) com menos jobs rodando e menos frames
+       atendidos; uma chave que volta à fila começa no menor valor entre as ativas;
+    3. menor job primeiro (frame_count), desempatando pelo mais antigo.
+
+    Também mede o tempo de espera na fila por classe.
+    """
+
+    def __init__(self, max_wait_seconds: float = 600.0, window: int = 500):
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+        self._served: Dict[str, float] = {}
+        self._running: Dict[str, int] = defaultdict(int)
+        self._waits: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+        self._wait_counts: Dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def _cost(job: AnalysisJob) -> int:
+        return job.frame_count or _DEFAULT_FRAME_COUNT
+
+    def _class_rank(self, job: AnalysisJob, now: datetime) -> int:
+        try:
+            rank = PRIORITY_CLASSES.index(job.priority_class)
+        except ValueError:
+            rank = len(PRIORITY_CLASSES)
+        if rank > 0 and (now - job.queued_at).total_seconds() >= self.max_wait_seconds:
+            rank = 0  # aging: evita starvation das classes de menor prioridade
+        return rank
+
+    def choose(self, candidates: List[AnalysisJob], now: Optional[datetime] = None) -> Optional[AnalysisJob]:
+        if not candidates:
+            return None
+        now = now or datetime.utcnow()
+        with self._lock:
+            active = {j.fairness_key for j in candidates} | {k for k, n in self._running.items() if n > 0}
+            for key in list(self._served):
+                if key not in active:
+                    del self._served[key]
+            baseline = min(self._served.values(), default=0.0)
+            for key in active:
+                self._served.setdefault(key, baseline)
+
+            best_rank = min(self._class_rank(j, now) for j in candidates)
+            pool = [j for j in candidates if self._class_rank(j, now) == best_rank]
+            key = min(
+                {j.fairness_key for j in pool},
+                key=lambda k: (self._running.get(k, 0), self._served[k], k or ""),
+            )
+            return min(
+                (j for j in pool if j.fairness_key == key),
+                key=lambda j: (self._cost(j), j.queued_at, j.id),
+            )
+
+    def on_start(self, job: AnalysisJob, now: Optional[datetime] = None) -> None:
+        now = now or datetime.utcnow()
+        wait = max(0.0, (now - job.queued_at).total_seconds())
+        with self._lock:
+            self._running[job.fairness_key] += 1
+            self._served[job.fairness_key] = self._served.get(job.fairness_key, 0.0) + self._cost(job)
+            self._waits[job.priority_class].append(wait)
+            self._wait_counts[job.priority_class] += 1
+
+    def on_finish(self, fairness_key: Optional[str]) -> None:
+        with self._lock:
+            if self._running.get(fairness_key, 0) > 0:
+                self._running[fairness_key] -= 1
+
+    def wait_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Tempo de espera na fila (s) por classe, nas últimas `window` execuções."""
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for cls in set(PRIORITY_CLASSES) | set(self._waits):
+                waits = sorted(self._waits.get(cls, ()))
+                entry: Dict[str, Any] = {"started": self._wait_counts.get(cls, 0)}
+                if waits:
+                    entry.update({
+                        "wait_avg_s": round(sum(waits) / len(waits), 3),
+                        "wait_p50_s": round(waits[len(waits) // 2], 3),
+                        "wait_p95_s": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3),
+                        "wait_max_s": round(waits[-1], 3),
+                    })
+                out[cls] = entry
+        return out
+
+
+_scheduler = AnalysisScheduler(max_wait_seconds=float(os.getenv("MOVEON_JOB_MAX_WAIT_SECONDS", "600")))
+
+
+# ---------------------------------------------------------------------------
+# Fila persistente + dispatcher
+# ---------------------------------------------------------------------------
+
+# Identifica este processo como dono dos leases
+_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+_dispatcher_lock = threading.Lock()
+_dispatcher_thread: Optional[threading.Thread] = None
+_dispatcher_stop = threading.Event()
+_wakeup = threading.Event()
+_running_jobs: Dict[int, Future] = {}
+_running_keys: Dict[int, Optional[str]] = {}
+_running_lock = threading.Lock()
+_tables_engine = None  # engine em que as tabelas da fila/cache já foram garantidas
+
+
+def _lease_seconds() -> float:
+    return float(os.getenv("MOVEON_JOB_LEASE_SECONDS", "60"))
+
+
+def _poll_seconds() -> float:
+    return float(os.getenv("MOVEON_JOB_POLL_SECONDS", "2"))
+
+
+def _ensure_table() -> None:
+    global _tables_engine
+    if _tables_engine is not database.engine:
+        SQLModel.metadata.create_all(
+            database.engine,
+            tables=[AnalysisJob.__table__, VideoBlob.__table__, VideoBlobRef.__table__, AnalysisCacheEntry.__table__],
+        )
+        _tables_engine = database.engine
+
+
+def _cache_key(video_sha256: str, from_original: bool = False) -> cache.CacheKey:
+    """Chave do cache para a configuração de análise atual (mesmo env dos workers).
+
+    Além de modelo/articulação/limiares, entra tudo o que muda o resultado: versão do cálculo
+    (filtro de ângulos e regras, `engine.ANALYSIS_VERSION`), taxa de análise, recorte ROI e
+    tamanho da rendition de análise. Entradas gravadas com outra configuração não casam.
+    `from_original`: a análise leu o original (a rendition ainda não existia).
+    """
+    sampling = _analysis_sampling()
+    options = [f"v={engine.ANALYSIS_VERSION}"]
+    if sampling.get("sample_rate"):
+        options.append(f"fps={sampling['sample_rate']:g}")
+    if sampling.get("adaptive"):
+        options.append("adaptive")
+    use_roi, roi_imgsz, roi_margin = _roi_settings(None)
+    if use_roi:
+        options.append(f"roi={roi_imgsz}/{roi_margin:g}")
+    max_side = None if from_original else renditions.analysis_max_side()
+    options.append(f"side={max_side}" if max_side else "original")
+    return cache.CacheKey(
+        video_sha256,
+        os.getenv("MOVEON_YOLO_MODEL") or DEFAULT_MODEL,
+        engine.JOINT,
+        engine.DOWN_THRESHOLD,
+        engine.UP_THRESHOLD,
+        ",".join(options),
+    )
+
+
+def _cache_result(job_id: int, feedback: Any) -> None:
+    """Guarda no cache o feedback de uma análise concluída de um upload endereçado por conteúdo."""
+    if not isinstance(feedback, dict):
+        return
+    with Session(database.engine) as session:
+        job = session.get(AnalysisJob, job_id)
+        sha256 = blobs.sha_from_filename(job.video_filename) if job else None
+        if sha256:
+            cache.store(session, _cache_key(sha256, feedback.get("analysis_source") == "original"), feedback)
+
+
+def _job_status(future: Future) -> tuple:
+    """Mapeia o resultado da análise para (status do job, erro)."""
+    try:
+        feedback = future.result()
+    except BaseException as exc:  # noqa: BLE001
+        return jobs.FAILED, str(exc) or type(exc).__name__
+    status = feedback.get("Status_Execucao") if isinstance(feedback, dict) else None
+    if status == "Erro":
+        return jobs.FAILED, "; ".join(feedback.get("Observacoes_Tecnicas") or []) or "Erro na análise"
+    if status == "Pendente":
+        # inferência indisponível: análise adiada, não é reexecutada automaticamente
+        return jobs.FAILED, "Análise adiada (inferência indisponível)"
+    return jobs.DONE, None
+
+
+def _save_job_error(job: AnalysisJob, error: Optional[str]) -> None:
+    """Job que terminou failed sem feedback terminal: grava o "Erro" e limpa o progresso em memória."""
+    _save_final(_error_feedback(job.patient_id, job.exercise_id, job.video_filename, error or "Erro na análise"))
+
+
+def _requeue_expired(session: Session, now: Optional[datetime] = None) -> int:
+    """`jobs.requeue_expired` gravando o "Erro" dos jobs que esgotaram as tentativas."""
+    return jobs.requeue_expired(session, now, on_failed=lambda job: _save_job_error(job, job.error))
+
+
+def _fail_job(job: AnalysisJob, error: str) -> None:
+    """Marca como failed um job reivindicado que não chegou a rodar (ex.: submit falhou)."""
+    try:
+        with Session(database.engine) as session:
+            jobs.finish(session, job.id, _owner, jobs.FAILED, error)
+        _save_job_error(job, error)
+    finally:
+        _scheduler.on_finish(job.fairness_key)
+
+
+def _on_job_done(job: AnalysisJob, executor: Executor, future: Future) -> None:
+    try:
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            # o processo do pool morreu (os._exit, OOM) e levou o pool junto: recria o pool e
+            # devolve o job à fila, como um lease vencido (failed depois de MAX_ATTEMPTS)
+            _discard_executor(executor)
+            with Session(database.engine) as session:
+                failed = jobs.release(session, job.id, _owner)
+            if failed is not None:
+                _save_job_error(failed, failed.error)
+            else:
+                progress.publish(_pending_feedback(
+                    job.patient_id, job.exercise_id, job.video_filename, "Análise interrompida; vídeo de volta à fila"
+                ))
+            return
+        status, error = _job_status(future)
+        if status == jobs.DONE:
+            try:
+                _cache_result(job.id, future.result())
+            except Exception:
+                # cache é só otimização
+                pass
+        with Session(database.engine) as session:
+            finished = jobs.finish(session, job.id, _owner, status, error)
+        if finished and (future.cancelled() or future.exception() is not None):
+            # a análise não devolveu feedback (só os retornos dela são gravados)
+            _save_job_error(job, error)
+    finally:
+        with _running_lock:
+            _running_jobs.pop(job.id, None)
+            fairness_key = _running_keys.pop(job.id, None)
+        _scheduler.on_finish(fairness_key)
+        _wakeup.set()
+
+
+def _dispatch_once(max_running: int) -> int:
+    """Reivindica jobs enquanto houver vaga no pool; retorna quantos foram iniciados."""
+    started = 0
+    while True:
+        with _running_lock:
+            if len(_running_jobs) >= max_running:
+                return started
+        with Session(database.engine) as session:
+            job = jobs.claim_next(session, _owner, _lease_seconds(), choose=_scheduler.choose)
+            if job is None:
+                return started
+            session.expunge(job)
+        _scheduler.on_start(job)
+        try:
+            executor, future = _analyze_for_job(job)
+        except Exception as exc:  # noqa: BLE001
+            # sem isto o job ficaria running até o lease vencer e o fair share contaria um
+            # job que não roda
+            _fail_job(job, f"Falha ao iniciar a análise: {str(exc) or type(exc).__name__}")
+            continue
+        with _running_lock:
+            _running_jobs[job.id] = future
+            _running_keys[job.id] = job.fairness_key
+        future.add_done_callback(lambda f, job=job, executor=executor: _on_job_done(job, executor, f))
+        started += 1
+
+
+def _dispatch_loop() -> None:
+    max_running = max(1, int(os.getenv("MOVEON_ANALYSIS_WORKERS", "1")))
+    last_maintenance = 0.0
+    while not _dispatcher_stop.is_set():
+        try:
+            now = time.monotonic()
+            if now - last_maintenance >= _lease_seconds() / 3:
+                last_maintenance = now
+                with _running_lock:
+                    running_ids = list(_running_jobs)
+                with Session(database.engine) as session:
+                    jobs.renew_leases(session, _owner, running_ids, _lease_seconds())
+                    _requeue_expired(session)
+            _dispatch_once(max_running)
+        except Exception:
+            # erro transitório (ex.: banco ocupado); tenta de novo no próximo ciclo
+            pass
+        _wakeup.wait(timeout=_poll_seconds())
+        _wakeup.clear()
+
+
+def _ensure_dispatcher() -> None:
+    global _dispatcher_thread
+    with _dispatcher_lock:
+        if _dispatcher_thread is None or not _dispatcher_thread.is_alive():
+            _dispatcher_stop.clear()
+            _dispatcher_thread = threading.Thread(target=_dispatch_loop, name="moveon-analysis-dispatcher", daemon=True)
+            _dispatcher_thread.start()
+
+
+def _stop_dispatcher() -> None:
+    global _dispatcher_thread
+    with _dispatcher_lock:
+        thread, _dispatcher_thread = _dispatcher_thread, None
+    if thread is not None:
+        _dispatcher_stop.set()
+        _wakeup.set()
+        thread.join()
+
+
+def start_workers() -> int:
+    """Startup hook: devolve à fila os jobs com lease vencido e inicia o dispatcher.
+
+    Os jobs ainda não concluídos voltam ao registro de progresso como "Pendente", já que o
+    progresso em memória se perde ao reiniciar. Retorna quantos jobs foram recolocados na fila.
+    """
+    _ensure_table()
+    with Session(database.engine) as session:
+        requeued = _requeue_expired(session)
+        unfinished = session.exec(
+            select(AnalysisJob).where(AnalysisJob.status.in_([jobs.QUEUED, jobs.RUNNING]))
+        ).all()
+        for job in unfinished:
+            if progress.get(job.patient_id, job.video_filename) is None:
+                progress.publish(
+                    _pending_feedback(job.patient_id, job.exercise_id, job.video_filename, "Vídeo na fila de análise")
+                )
+    _ensure_dispatcher()
+    _wakeup.set()
+    return requeued
+
+
+def final_feedback(patient_id: str, filename: str) -> Optional[Dict[str, Any]]:
+    """Estado terminal persistido do vídeo, ou None enquanto a análise não terminou.
+
+    Usado por quem acompanha a análise (SSE) fora do processo que a executa: um job queued ou
+    running ainda não tem estado final (mesmo com um feedback antigo gravado); um job failed
+    sem feedback gravado depois dele vira um "Erro" com o erro do job.
+    """
+    _ensure_table()
+    with Session(database.engine) as session:
+        job = jobs.latest_for_video(session, patient_id, filename)
+        if job is not None:
+            session.expunge(job)
+    if job is not None and job.status in (jobs.QUEUED, jobs.RUNNING):
+        return None
+    stored = storage.load_feedback(patient_id, filename, job.exercise_id if job is not None else None)
+    if job is None or job.status != jobs.FAILED:
+        return stored
+    stored_at = progress.timestamp(stored) if stored is not None else None
+    if stored_at is not None and stored_at >= job.created_at:
+        return stored
+    feedback = _error_feedback(job.patient_id, job.exercise_id, job.video_filename, job.error or "Erro na análise")
+    if job.finished_at is not None:
+        feedback["Timestamp"] = job.finished_at.isoformat() + "Z"
+    return feedback
+
+
+def _probe_frame_count(video_path: str) -> Optional[int]:
+    """Número de frames informado pelo container (só lê o cabeçalho)."""
+    try:
+        import cv2
+
+        cap = cv2.VideoCapture(video_path)
+        try:
+            count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        finally:
+            cap.release()
+        return count if count > 0 else None
+    except Exception:
+        return None
+
+
+def _fairness_key(session: Session, patient_id: str) -> str:
+    """Chave de fair share: fisioterapeuta do paciente (padrão) ou o próprio paciente.
+
+    MOVEON_FAIRNESS_KEY=patient divide a capacidade por paciente.
+    """
+    if os.getenv("MOVEON_FAIRNESS_KEY", "physiotherapist") != "patient":
+        try:
+            patient = session.get(Patient, int(patient_id))
+        except Exception:
+            # id não numérico (ou tabela ausente): cai para a chave por paciente
+            patient = None
+        if patient is not None and patient.physiotherapist_id is not None:
+            return f"physio:{patient.physiotherapist_id}"
+    return f"patient:{patient_id}"
+
+
+def get_queue_metrics() -> Dict[str, Any]:
+    """Métricas da fila: jobs queued/running por classe e tempo de espera por classe."""
+    _ensure_table()
+    with Session(database.engine) as session:
+        rows = session.exec(
+            select(AnalysisJob.priority_class, AnalysisJob.status, func.count(AnalysisJob.id))
+            .where(AnalysisJob.status.in_([jobs.QUEUED, jobs.RUNNING]))
+            .group_by(AnalysisJob.priority_class, AnalysisJob.status)
+        ).all()
+    classes = _scheduler.wait_metrics()
+    for cls, status, count in rows:
+        classes.setdefault(cls, {"started": 0})[status] = count
+    for entry in classes.values():
+        entry.setdefault(jobs.QUEUED, 0)
+        entry.setdefault(jobs.RUNNING, 0)
+    return {"classes": classes}
+
+
+def store_upload(patient_id: str, tmp_path: Any, sha256: str, size: int, ext: str = "") -> str:
+    """Move um upload recebido para o armazenamento por conteúdo e registra o paciente como dono.
+
+    Retorna o nome final (`<sha256><ext>`).
+    """
+    _ensure_table()
+    blobs.store_file(tmp_path, sha256, ext)
+    with Session(database.engine) as session:
+        blobs.register(session, sha256, ext, size)
+        blobs.acquire(session, sha256, f"patient:{patient_id}")
+    return blobs.blob_filename(sha256, ext)
+
+
+def _make_renditions(video_path: str, filename: str) -> None:
+    try:
+        renditions.ensure(video_path, filename)
+    except Exception:
+        # renditions são só otimização: a análise e /videos/{filename}/playback usam o original
+        pass
+    finally:
+        with _executor_lock:
+            _renditions_pending.discard(filename)
+
+
+def submit_renditions(video_path: str, filename: str) -> bool:
+    """Agenda o estágio pós-upload que gera as renditions de análise e de playback numa única
+    passada, em segundo plano (no máximo um por vídeo).
+
+    Retorna False se as duas já existem, o estágio já está agendado ou as renditions estão
+    desligadas.
+    """
+    global _renditions_executor
+    if not renditions.enabled() or (
+        renditions.analysis_path(filename).exists() and renditions.playback_path(filename) is not None
+    ):
+        return False
+    with _executor_lock:
+        if filename in _renditions_pending:
+            return False
+        _renditions_pending.add(filename)
+        if _renditions_executor is None:
+            _renditions_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="moveon-renditions")
+        executor = _renditions_executor
+    executor.submit(_make_renditions, video_path, filename)
+    return True
+
+
+def cached_analysis(patient_id: str, exercise_id: str, filename: str) -> Optional[Dict[str, Any]]:
+    """Se o vídeo já foi analisado com a configuração atual, grava e retorna o feedback em cache."""
+    sha256 = blobs.sha_from_filename(filename)
+    if not sha256:
+        return None
+    _ensure_table()
+    with Session(database.engine) as session:
+        cached = cache.lookup(session, _cache_key(sha256))
+    if cached is None:
+        return None
+    feedback = cache.reuse(cached, patient_id, exercise_id, filename)
+    _save_final(feedback)
+    return feedback
+
+
+def submit_analysis(
+    patient_id: str,
+    exercise_id: str,
+    video_path: str,
+    filename: str,
+    priority: str = "interactive",
+) -> int:
+    """Enfileira a análise na fila persistente e retorna o id do job.
+
+    `priority` é a classe de prioridade ("interactive" para uploads, "batch" para reanálises).
+    """
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Classe de prioridade inválida: {priority}")
+    _ensure_table()
+    with Session(database.engine) as session:
+        # reenvio do mesmo vídeo para o mesmo exercício enquanto a análise anterior não
+        # terminou: reaproveita o job (o mesmo arquivo para outro exercício é outra análise)
+        unfinished = session.exec(
+            select(AnalysisJob.id)
+            .where(AnalysisJob.patient_id == str(patient_id))
+            .where(AnalysisJob.exercise_id == str(exercise_id))
+            .where(AnalysisJob.video_filename == filename)
+            .where(AnalysisJob.status.in_([jobs.QUEUED, jobs.RUNNING]))
+        ).first()
+    if unfinished is not None:
+        return unfinished
+    frame_count = _probe_frame_count(video_path)
+    with Session(database.engine) as session:
+        job = jobs.enqueue(
+            session,
+            patient_id,
+            exercise_id,
+            video_path,
+            filename,
+            priority_class=priority,
+            fairness_key=_fairness_key(session, patient_id),
+            frame_count=frame_count,
+        )
+        job_id = job.id
+    _ensure_dispatcher()
+    _wakeup.set()
+    return job_id
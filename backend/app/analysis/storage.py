@@ -1,21 +1,194 @@
 """Simple storage helper to persist analysis feedback locally.
 
-This writes JSON lines into uploads/analysis_logs.jsonl for easy inspection.
+O estado mais recente de cada vídeo fica na tabela `video_feedbacks` (upsert por
+paciente + exercício + vídeo), que é o que os endpoints de feedback leem. Cada feedback também é
+anexado em uploads/analysis_logs.jsonl para facilitar a inspeção.
 """
+from datetime import datetime
 from pathlib import Path
 import json
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 import threading
 
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, select
+
+from app.models.video_feedback import VideoFeedback
+
 
 _write_lock = threading.Lock()
+_table_engine = None  # engine em que a tabela já foi garantida
+
+
+def _logs_path() -> Path:
+    # lido na hora da chamada (como `_engine`) para que os testes possam trocar UPLOAD_ROOT
+    from app.core import uploads
+
+    return uploads.UPLOAD_ROOT / "analysis_logs.jsonl"
+
+
+def _engine():
+    # lido na hora da chamada para que os testes possam trocar `database.engine`
+    from app.core import database
+
+    return database.engine
+
+
+def _ensure_table(engine) -> None:
+    global _table_engine
+    if _table_engine is not engine:
+        SQLModel.metadata.create_all(engine, tables=[VideoFeedback.__table__])
+        _table_engine = engine
+
+
+def _video_filename(feedback: Dict[str, Any]) -> Optional[str]:
+    name = feedback.get("video_filename") or feedback.get("filename")
+    return str(name) if name else None
+
+
+def _progress(feedback: Dict[str, Any]) -> Optional[int]:
+    progress = feedback.get("progress")
+    if progress is None:
+        progress = feedback.get("Progress")
+    try:
+        return int(progress) if progress is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _upsert(session: Session, feedback: Dict[str, Any]) -> None:
+    patient_id = feedback.get("ID_Paciente") or feedback.get("patient_id")
+    if patient_id is None:
+        return
+    exercise_id = feedback.get("ID_Exercicio") or feedback.get("exercise_id")
+    video_filename = _video_filename(feedback)
+    values = dict(
+        exercise_id=str(exercise_id) if exercise_id is not None else None,
+        status=str(feedback.get("Status_Execucao", ""))[:20],
+        progress=_progress(feedback),
+        timestamp=feedback.get("Timestamp") or feedback.get("date") or feedback.get("created_at"),
+        payload=json.dumps(feedback, ensure_ascii=False),
+    )
+
+    row = None
+    if video_filename:
+        exercise = values["exercise_id"]
+        row = session.exec(
+            select(VideoFeedback)
+            .where(VideoFeedback.patient_id == str(patient_id))
+            .where(VideoFeedback.video_filename == video_filename)
+            .where(VideoFeedback.exercise_id == exercise if exercise is not None else VideoFeedback.exercise_id.is_(None))
+        ).first()
+    if row is None:
+        # feedbacks sem vídeo (formato antigo) viram uma linha cada
+        row = VideoFeedback(patient_id=str(patient_id), video_filename=video_filename, **values)
+    else:
+        for key, value in values.items():
+            setattr(row, key, value)
+        row.updated_at = datetime.utcnow()
+    session.add(row)
 
 
 def save_feedback(feedback: Dict[str, Any]):
-    base_dir = Path(__file__).resolve().parents[1]
-    upload_dir = base_dir / "uploads"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    out_file = upload_dir / "analysis_logs.jsonl"
+    engine = _engine()
+    out_file = _logs_path()
+    out_file.parent.mkdir(parents=True, exist_ok=True)
     with _write_lock:
         with out_file.open("a", encoding="utf-8") as f:
             f.write(json.dumps(feedback, ensure_ascii=False) + "\n")
+        _ensure_table(engine)
+        with Session(engine) as session:
+            _upsert(session, feedback)
+            try:
+                session.commit()
+            except IntegrityError:
+                # outro processo inseriu o mesmo vídeo entre o SELECT e o INSERT
+                session.rollback()
+                _upsert(session, feedback)
+                session.commit()
+
+
+def load_feedbacks(patient_id: Any) -> List[Dict[str, Any]]:
+    """Estado mais recente de cada vídeo do paciente (feedback completo), mais recentes primeiro."""
+    engine = _engine()
+    _ensure_table(engine)
+    with Session(engine) as session:
+        rows = session.exec(
+            select(VideoFeedback)
+            .where(VideoFeedback.patient_id == str(patient_id))
+            .order_by(VideoFeedback.timestamp.desc(), VideoFeedback.id.desc())
+        ).all()
+    out: List[Dict[str, Any]] = []
+    for row in rows:
+        try:
+            out.append(json.loads(row.payload))
+        except ValueError:
+            continue
+    return out
+
+
+def stored_videos(patient_id: Any = None) -> List[Tuple[str, Optional[str], str, Optional[str]]]:
+    """(paciente, exercício, vídeo, Timestamp) de cada vídeo com feedback salvo."""
+    engine = _engine()
+    _ensure_table(engine)
+    query = select(
+        VideoFeedback.patient_id, VideoFeedback.exercise_id, VideoFeedback.video_filename, VideoFeedback.timestamp
+    ).where(
+        VideoFeedback.video_filename.is_not(None)
+    )
+    if patient_id is not None:
+        query = query.where(VideoFeedback.patient_id == str(patient_id))
+    with Session(engine) as session:
+        return [tuple(row) for row in session.exec(query.order_by(VideoFeedback.patient_id, VideoFeedback.id)).all()]
+
+
+def load_feedback(patient_id: Any, video_filename: str, exercise_id: Any = None) -> Optional[Dict[str, Any]]:
+    """Último estado persistido de um vídeo (do exercício, se informado), ou None."""
+    engine = _engine()
+    _ensure_table(engine)
+    query = (
+        select(VideoFeedback)
+        .where(VideoFeedback.patient_id == str(patient_id))
+        .where(VideoFeedback.video_filename == str(video_filename))
+    )
+    if exercise_id is not None:
+        query = query.where(VideoFeedback.exercise_id == str(exercise_id))
+    with Session(engine) as session:
+        row = session.exec(query.order_by(VideoFeedback.updated_at.desc(), VideoFeedback.id.desc())).first()
+    if row is None:
+        return None
+    try:
+        return json.loads(row.payload)
+    except ValueError:
+        return None
+
+
+def import_jsonl(path: Optional[Path] = None) -> int:
+    """Importa um analysis_logs.jsonl existente para `video_feedbacks` (uso único na migração).
+
+    As linhas são aplicadas em ordem, então o último estado de cada vídeo prevalece.
+    Retorna quantas linhas foram importadas.
+    """
+    path = Path(path) if path else _logs_path()
+    if not path.exists():
+        return 0
+    engine = _engine()
+    _ensure_table(engine)
+    imported = 0
+    with _write_lock, Session(engine) as session, path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            _upsert(session, entry)
+            # flush para que o próximo estado do mesmo vídeo encontre a linha
+            session.flush()
+            imported += 1
+        session.commit()
+    return imported
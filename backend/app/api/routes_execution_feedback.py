@@ -7,6 +7,7 @@ from app.models.patient import Patient
 from app.models.exercise_execution import ExerciseExecution
 from app.models.feedback import Feedback
 from app.schemas.report import FeedbackDetail
+from app.services.report_cache import report_cache
 
 router = APIRouter()
 
@@ -75,6 +76,7 @@ def create_execution_feedback(
     session.add(feedback)
     session.commit()
     session.refresh(feedback)
+    report_cache.invalidate_patient(patient_id)
 
     return FeedbackDetail(
         id=feedback.id,
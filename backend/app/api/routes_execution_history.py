@@ -55,6 +55,16 @@ def get_execution_history(
         default=None,
         description="Data de fim (obrigatório se period_filter for 'custom')"
     ),
+    limit: Optional[int] = Query(
+        default=None,
+        ge=1,
+        le=200,
+        description="Tamanho da página (sem limite: o período inteiro)"
+    ),
+    cursor: Optional[str] = Query(
+        default=None,
+        description="Cursor da página seguinte (campo next_cursor da resposta anterior)"
+    ),
     session: Session = Depends(get_session)
 ):
     """
@@ -63,6 +73,7 @@ def get_execution_history(
     - Se o paciente **não existir**, retorna 404.
     - Se existir, retorna o histórico no período escolhido
       (ou mensagem avisando que não há dados).
+    - Com `limit`, retorna uma página e `next_cursor` para buscar a seguinte.
     """
     # Verifica se o paciente existe no banco
     paciente = session.get(Patient, patient_id)
@@ -74,13 +85,15 @@ def get_execution_history(
 
     # Busca o histórico
     try:
-        history_items, period_start, period_end, total_executions = (
+        history_items, period_start, period_end, total_executions, next_cursor = (
             ExecutionHistoryService.get_execution_history_summary(
                 session=session,
                 patient_id=patient_id,
                 period_filter=period_filter,
                 start_date=start_date,
-                end_date=end_date
+                end_date=end_date,
+                limit=limit,
+                cursor=cursor
             )
         )
 
@@ -93,7 +106,8 @@ def get_execution_history(
             total_executions=total_executions,
             executions=history_items,
             has_data=has_data,
-            message=None if has_data else "Ainda não foram registrados exercícios para este período."
+            message=None if has_data else "Ainda não foram registrados exercícios para este período.",
+            next_cursor=next_cursor
         )
 
         return response
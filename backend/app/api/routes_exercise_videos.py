@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Request
 from pathlib import Path
 
+from app.core.media import media_response
+
 router = APIRouter()
 
 
@@ -13,7 +14,7 @@ def _exercise_videos_dir() -> Path:
     "/exercise-videos/{filename}",
     summary="Serve vídeo de exemplo de exercício",
 )
-def get_exercise_video(filename: str):
+def get_exercise_video(filename: str, request: Request):
     if not filename or "/" in filename or "\\" in filename or ".." in filename:
         raise HTTPException(status_code=400, detail="Nome de arquivo inválido")
 
@@ -21,4 +22,5 @@ def get_exercise_video(filename: str):
     if not video_path.exists() or not video_path.is_file():
         raise HTTPException(status_code=404, detail="Vídeo não encontrado")
 
-    return FileResponse(str(video_path))
+    # o upload de um novo exemplo gera outro nome (uuid): o arquivo servido é imutável
+    return media_response(request, video_path, immutable=True)
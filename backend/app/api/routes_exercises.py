@@ -5,6 +5,7 @@ from pathlib import Path
 import uuid
 
 from app.core.database import get_session
+from app.core.uploads import UploadTooLarge, save_upload
 from app.services.exercise_service import ExerciseService
 from app.schemas.exercise import (
     ExerciseCreate,
@@ -213,8 +214,10 @@ async def upload_exercise_example_video(
 
     filename = f"{uuid.uuid4().hex}{suffix}"
     dest = uploads_dir / filename
-    content = await file.read()
-    dest.write_bytes(content)
+    try:
+        await save_upload(file, dest)
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
 
     existing = session.exec(
         select(ExerciseExampleVideo).where(ExerciseExampleVideo.exercise_id == exercise_id)
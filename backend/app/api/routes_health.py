@@ -9,6 +9,13 @@ def health_check():
     return {"status": "ok"}
 
 
+@router.get("/health/analysis", summary="Métricas da fila de análise de vídeos")
+def analysis_queue_metrics():
+    from app.analysis import runtime
+
+    return runtime.get_queue_metrics()
+
+
 @router.get("/hello/{name}", summary="Cumprimenta a pessoa pelo nome")
 def say_hello(name: str):
     return {"message": f"Olá, {name}!"}
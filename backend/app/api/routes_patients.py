@@ -13,6 +13,10 @@ from app.models.prescription import Prescription
 from app.models.exercise_execution import ExerciseExecution
 from app.models.pain_level import PainLevel
 from app.models.feedback import Feedback
+from app.models.video_feedback import VideoFeedback
+from app.analysis import blobs
+from app.services.daily_stats_service import DailyStatsService
+from app.services.report_cache import report_cache
 
 router = APIRouter()
 
@@ -200,6 +204,7 @@ def delete_patient_for_physiotherapist(
                 session.delete(f)
 
             session.delete(ex)
+        DailyStatsService.delete_patient(session, patient_id)
 
         # 3) Prescrições (após remover execuções)
         prescriptions = list(
@@ -208,9 +213,18 @@ def delete_patient_for_physiotherapist(
         for pr in prescriptions:
             session.delete(pr)
 
-        # 4) Paciente
+        # 4) Vídeos: feedbacks das análises e referências aos arquivos (coletados pelo GC)
+        video_feedbacks = list(
+            session.exec(select(VideoFeedback).where(VideoFeedback.patient_id == str(patient_id))).all()
+        )
+        for vf in video_feedbacks:
+            session.delete(vf)
+        blobs.release_owner(session, f"patient:{patient_id}")
+
+        # 5) Paciente
         session.delete(patient)
         session.commit()
+        report_cache.invalidate_patient(patient_id)
         return {"message": "Paciente removido permanentemente"}
     except Exception as e:  # noqa: BLE001
         if session.in_transaction():
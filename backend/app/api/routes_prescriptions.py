@@ -4,6 +4,8 @@ from typing import List
 
 from app.core.database import get_session
 from app.services.prescription_service import PrescriptionService
+from app.services.daily_stats_service import DailyStatsService
+from app.services.report_cache import report_cache
 from app.schemas.prescription import (
     ExercisePrescriptionRequest,
     PrescriptionResponse,
@@ -397,6 +399,7 @@ def reactivate_prescription_for_physio_patient(
     prescription.is_active = True
     session.add(prescription)
     session.commit()
+    report_cache.invalidate_patient(patient_id)
 
     return {"message": "Prescrição reativada com sucesso"}
 
@@ -457,8 +460,15 @@ def permanently_delete_prescription_for_physio_patient(
 
             session.delete(ex)
 
+        # Resumo diário: recalcula os dias que tinham execuções desta prescrição
+        session.flush()
+        DailyStatsService.rebuild(
+            session, prescription.patient_id, {ex.execution_date.date() for ex in executions}
+        )
+
         session.delete(prescription)
         session.commit()
+        report_cache.invalidate_patient(patient_id)
         return {"message": "Prescrição removida permanentemente"}
     except Exception as e:
         if session.in_transaction():
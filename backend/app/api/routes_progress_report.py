@@ -5,6 +5,7 @@ from datetime import datetime
 
 from app.core.database import get_session
 from app.services.progress_report_service import ProgressReportService
+from app.services.report_cache import period_key, report_cache
 from app.schemas.progress_report import (
     ProgressReportResponse,
     PeriodFilter
@@ -50,12 +51,16 @@ def get_progress_report(
     Se não houver dados suficientes, retorna uma mensagem informativa.
     """
     try:
-        report = ProgressReportService.generate_progress_report(
-            session=session,
-            patient_id=patient_id,
-            period_filter=period_filter,
-            start_date=start_date,
-            end_date=end_date
+        report = report_cache.get_or_create(
+            patient_id,
+            ("progress", period_key(period_filter, start_date, end_date)),
+            lambda: ProgressReportService.generate_progress_report(
+                session=session,
+                patient_id=patient_id,
+                period_filter=period_filter,
+                start_date=start_date,
+                end_date=end_date
+            ),
         )
         
         return report
@@ -3,11 +3,20 @@ from sqlmodel import Session
 
 from app.core.database import get_session
 from app.services.report_service import ReportService
+from app.services.report_cache import period_key, report_cache
 from app.schemas.report import ReportRequest, ReportResponse
 
 router = APIRouter()
 
 
+def _cached_report(session: Session, request: ReportRequest) -> ReportResponse:
+    return report_cache.get_or_create(
+        request.patient_id,
+        ("report", period_key(request.period_filter, request.start_date, request.end_date)),
+        lambda: ReportService.generate_report(session, request),
+    )
+
+
 @router.post(
     "/reports",
     response_model=ReportResponse,
@@ -33,7 +42,7 @@ def generate_report(
     e uma mensagem adequada será retornada.
     """
     try:
-        report = ReportService.generate_report(session, request)
+        report = _cached_report(session, request)
         
         if not report.has_data:
             # Retornar relatório vazio com mensagem
@@ -80,7 +89,7 @@ def get_patient_report(
             end_date=end_dt,
         )
         
-        report = ReportService.generate_report(session, request)
+        report = _cached_report(session, request)
         return report
     except ValueError as e:
         raise HTTPException(
@@ -1,16 +1,71 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Depends, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from pathlib import Path
-import uuid
+from sqlmodel import Session
 from datetime import datetime
 
 from app.analysis import engine
-from app.analysis import storage
+from app.analysis import progress
+from app.analysis import blobs
 from app.analysis import runtime
+from app.core.database import get_session
+from app.core import uploads
+from app.core.uploads import UploadTooLarge, receive_upload
+from app.models.upload_session import UploadSession
+from app.schemas.upload import UploadSessionCreate, UploadSessionResponse
+from app.services.upload_session_service import (
+    OPEN,
+    UploadIncomplete,
+    UploadOffsetConflict,
+    UploadSessionService,
+)
 
 router = APIRouter()
 
 
+def _start_analysis(patient_id: str, exercise_id: str, dest: Path, filename: str):
+    """Registra o status Pendente e enfileira a análise; retorna (feedback, job_id).
+
+    Se o mesmo conteúdo já foi analisado com a configuração atual, retorna o feedback em
+    cache (já gravado) e nenhum job é agendado. As renditions (análise + playback) são
+    agendadas à parte, sem esperar nem atrasar a análise.
+    """
+    try:
+        runtime.submit_renditions(str(dest), filename)
+    except Exception:
+        pass
+    try:
+        cached = runtime.cached_analysis(patient_id, exercise_id, filename)
+    except Exception:
+        cached = None
+    if cached is not None:
+        return cached, None
+
+    pending = {
+        "ID_Paciente": patient_id,
+        "ID_Exercicio": exercise_id,
+        "Timestamp": datetime.utcnow().isoformat() + "Z",
+        "Status_Execucao": "Pendente",
+        "Observacoes_Tecnicas": ["Vídeo recebido; análise em processamento"],
+        "Repetitions": 0,
+        "feedback": "A análise do vídeo está em processamento.",
+        "video_filename": filename,
+        "progress": 0,
+    }
+    # estado intermediário: só em memória (o terminal é persistido ao fim da análise)
+    progress.publish(pending)
+
+    # Análise em segundo plano: apenas enfileira na fila persistente de jobs
+    job_id = None
+    try:
+        job_id = runtime.submit_analysis(patient_id, exercise_id, str(dest), filename)
+    except Exception:
+        # se falhar enfileirar, não derruba upload
+        pass
+    return pending, job_id
+
+
 @router.post("/upload/video", summary="Faz upload de um vídeo")
 async def upload_video(
     file: UploadFile = File(...),
@@ -18,42 +73,168 @@ async def upload_video(
     exercise_id: str = Form(...),
 ):
     try:
-        base_dir = Path(__file__).resolve().parents[1]
-        upload_dir = base_dir / "uploads"
-        upload_dir.mkdir(parents=True, exist_ok=True)
-
-        ext = Path(file.filename).suffix if file.filename else ""
-        filename = f"{uuid.uuid4().hex}{ext}"
-        dest = upload_dir / filename
-
-        content = await file.read()
-        with dest.open("wb") as f:
-            f.write(content)
-
-        # Log status Pendente
-        pending = {
-            "ID_Paciente": patient_id,
-            "ID_Exercicio": exercise_id,
-            "Timestamp": datetime.utcnow().isoformat() + "Z",
-            "Status_Execucao": "Pendente",
-            "Observacoes_Tecnicas": ["Vídeo recebido; análise em processamento"],
-            "Repetitions": 0,
-            "feedback": "A análise do vídeo está em processamento.",
-            "video_filename": filename,
-            "progress": 0,
-        }
         try:
-            storage.save_feedback(pending)
-        except Exception:
-            pass
+            stored = await receive_upload(file, uploads.UPLOAD_ROOT)
+        except UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
 
-        # Análise em segundo plano
-        try:
-            runtime.submit_analysis(patient_id, exercise_id, str(dest), filename)
-        except Exception:
-            # se falhar enfileirar, não derruba upload
-            pass
+        # armazenado por conteúdo: o mesmo vídeo reenviado reaproveita o arquivo. Banco, disco
+        # e a leitura do cabeçalho do vídeo são bloqueantes: rodam fora do event loop
+        ext = blobs.normalize_ext(file.filename)
+        filename = await run_in_threadpool(runtime.store_upload, patient_id, stored.path, stored.sha256, stored.size, ext)
+        dest = uploads.UPLOAD_ROOT / filename
+
+        pending, job_id = await run_in_threadpool(_start_analysis, patient_id, exercise_id, dest, filename)
 
-        return JSONResponse(status_code=201, content={"filename": filename, "saved_path": str(dest), "analysis": pending})
+        return JSONResponse(
+            status_code=201,
+            content={
+                "filename": filename,
+                "saved_path": str(dest),
+                "size_bytes": stored.size,
+                "sha256": stored.sha256,
+                "analysis": pending,
+                "job_id": job_id,
+            },
+        )
+    except HTTPException:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+# ---------------------------------------------------------------------------
+# Upload retomável: cria a sessão, envia blocos com PATCH (Upload-Offset), consulta o
+# offset com HEAD e finaliza. Os bytes parciais ficam em uploads/partial até expirar.
+# ---------------------------------------------------------------------------
+
+def _session_response(upload: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        upload_id=upload.id,
+        offset=upload.offset,
+        length=upload.length,
+        status=upload.status,
+        expires_at=upload.expires_at,
+        video_filename=upload.video_filename,
+        job_id=upload.job_id,
+    )
+
+
+def _offset_headers(upload: UploadSession) -> dict:
+    return {
+        "Upload-Offset": str(upload.offset),
+        "Upload-Length": str(upload.length),
+        "Upload-Expires": upload.expires_at.isoformat() + "Z",
+        "Cache-Control": "no-store",
+    }
+
+
+def _get_upload(session: Session, upload_id: str, require_open: bool = True) -> UploadSession:
+    upload = UploadSessionService.get_session(session, upload_id)
+    if upload is None:
+        raise HTTPException(status_code=404, detail="Upload não encontrado")
+    if require_open and upload.status != OPEN:
+        raise HTTPException(status_code=410, detail=f"Upload não está mais aberto ({upload.status})")
+    return upload
+
+
+@router.post(
+    "/upload/sessions",
+    status_code=201,
+    response_model=UploadSessionResponse,
+    summary="Cria um upload de vídeo retomável",
+)
+def create_upload_session(
+    data: UploadSessionCreate,
+    request: Request,
+    response: Response,
+    session: Session = Depends(get_session),
+):
+    try:
+        upload = UploadSessionService.create_session(
+            session, data.patient_id, data.exercise_id, data.length, data.filename, data.sha256
+        )
+    except UploadTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    response.headers.update(_offset_headers(upload))
+    response.headers["Location"] = str(request.url_for("get_upload_session", upload_id=upload.id))
+    return _session_response(upload)
+
+
+@router.head("/upload/sessions/{upload_id}", summary="Consulta o offset de um upload retomável")
+def head_upload_session(upload_id: str, session: Session = Depends(get_session)):
+    upload = _get_upload(session, upload_id)
+    return Response(status_code=200, headers=_offset_headers(upload))
+
+
+@router.get(
+    "/upload/sessions/{upload_id}",
+    response_model=UploadSessionResponse,
+    summary="Estado de um upload retomável",
+)
+def get_upload_session(upload_id: str, session: Session = Depends(get_session)):
+    return _session_response(_get_upload(session, upload_id, require_open=False))
+
+
+@router.patch("/upload/sessions/{upload_id}", status_code=204, summary="Envia um bloco do upload retomável")
+async def patch_upload_session(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    session: Session = Depends(get_session),
+):
+    async with UploadSessionService.lock(upload_id):
+        upload = _get_upload(session, upload_id)
+        try:
+            await UploadSessionService.append(session, upload, upload_offset, request.stream())
+        except UploadOffsetConflict as exc:
+            raise HTTPException(status_code=409, detail=str(exc), headers={"Upload-Offset": str(exc.expected)})
+        except ValueError as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+    return Response(status_code=204, headers=_offset_headers(upload))
+
+
+@router.post(
+    "/upload/sessions/{upload_id}/finalize",
+    status_code=201,
+    summary="Finaliza o upload retomável e enfileira a análise",
+)
+async def finalize_upload_session(upload_id: str, session: Session = Depends(get_session)):
+    async with UploadSessionService.lock(upload_id):
+        upload = _get_upload(session, upload_id)
+        ext = blobs.normalize_ext(upload.original_filename)
+
+        def _store(path: Path, sha256: str, size: int) -> Path:
+            return uploads.UPLOAD_ROOT / runtime.store_upload(upload.patient_id, path, sha256, size, ext)
+
+        try:
+            # hash (se não veio somado dos PATCHs), blob e commits fora do event loop
+            stored = await run_in_threadpool(UploadSessionService.finalize, session, upload, _store)
+        except UploadIncomplete as exc:
+            raise HTTPException(status_code=409, detail=str(exc), headers=_offset_headers(upload))
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+
+    dest, filename = stored.path, stored.path.name
+
+    def _enqueue():
+        pending, job_id = _start_analysis(upload.patient_id, upload.exercise_id, dest, filename)
+        upload.job_id = job_id
+        session.add(upload)
+        session.commit()
+        return pending, job_id
+
+    pending, job_id = await run_in_threadpool(_enqueue)
+
+    return JSONResponse(
+        status_code=201,
+        content={
+            "upload_id": upload.id,
+            "filename": filename,
+            "saved_path": str(dest),
+            "size_bytes": stored.size,
+            "sha256": stored.sha256,
+            "analysis": pending,
+            "job_id": job_id,
+        },
+    )
@@ -1,10 +1,9 @@
-
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-from pathlib import Path
-import json
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any
+import json
 from sqlmodel import Session, select
+from app.analysis import progress, runtime, storage
 from app.core.database import engine
 from app.models.exercise_library import ExerciseLibrary
 from app.models.patient import Patient
@@ -12,71 +11,87 @@ from app.models.patient import Patient
 router = APIRouter()
 
 
+def _exercise_names(exercise_ids) -> Dict[str, str]:
+    """Mapeia id->nome apenas dos exercícios referenciados (uma consulta IN)."""
+    ids = {int(ex_id) for ex_id in exercise_ids if str(ex_id).isdigit()}
+    if not ids:
+        return {}
+    with Session(engine) as session:
+        rows = session.exec(select(ExerciseLibrary.id, ExerciseLibrary.name).where(ExerciseLibrary.id.in_(ids))).all()
+    return {str(ex_id): name for ex_id, name in rows}
+
+
 def _load_video_feedbacks_for_patient(patient_id: int) -> List[Dict[str, Any]]:
-    # Este módulo fica em backend/app/api; o log fica em backend/app/uploads
-    logs_path = Path(__file__).resolve().parents[1] / "uploads" / "analysis_logs.jsonl"
-    if not logs_path.exists():
-        return []
+    # Estado terminal de cada vídeo (feedback store) sobreposto pelo progresso em memória
+    # das análises em andamento. Progresso mais antigo que o estado gravado é de uma análise
+    # que terminou fora deste processo (ou falhou) e é descartado.
+    # (o mesmo arquivo enviado para dois exercícios são duas análises: chave vídeo + exercício)
+    def _video_key(entry):
+        return (
+            str(entry.get("video_filename") or entry.get("filename")),
+            str(entry.get("ID_Exercicio") or entry.get("exercise_id")),
+        )
 
-    # Carregar todos os exercícios em memória para mapear id->nome
-    exercise_map: Dict[str, str] = {}
-    with Session(engine) as session:
-        for ex in session.exec(select(ExerciseLibrary)).all():
-            exercise_map[str(ex.id)] = ex.name
-
-    latest_by_video: Dict[str, Dict[str, Any]] = {}
-    without_video: List[Dict[str, Any]] = []
-    with logs_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entry = json.loads(line)
-                pid = entry.get("ID_Paciente") or entry.get("patient_id")
-                if str(pid) != str(patient_id):
-                    continue
-
-                ex_id = entry.get("ID_Exercicio") or entry.get("exercise_id")
-                detalhes = entry.get("rep_details")
-                if detalhes is None and "Rep_Details" in entry:
-                    detalhes = entry["Rep_Details"]
-
-                video_filename = entry.get("video_filename") or entry.get("filename")
-
-                progress = entry.get("progress")
-                if progress is None:
-                    progress = entry.get("Progress")
-                frames_done = entry.get("frames_done")
-                frames_total = entry.get("frames_total")
-                normalized = {
-                    "exercise_id": ex_id,
-                    "exercise_name": exercise_map.get(str(ex_id), "Exercício"),
-                    "timestamp": entry.get("Timestamp") or entry.get("date") or entry.get("created_at"),
-                    "status": entry.get("Status_Execucao", ""),
-                    "observacoes": entry.get("Observacoes_Tecnicas", []),
-                    "repeticoes": entry.get("Repetitions", None),
-                    "feedback": entry.get("feedback", entry.get("result", "")),
-                    "detalhes": detalhes,
-                    "video_filename": video_filename,
-                    "video_url": f"/api/videos/{video_filename}" if video_filename else None,
-                    "progress": progress,
-                    "frames_done": frames_done,
-                    "frames_total": frames_total,
-                }
-
-                # JSONL is append-only; last entry for a filename is the latest state
-                if video_filename:
-                    latest_by_video[str(video_filename)] = normalized
-                else:
-                    without_video.append(normalized)
-            except Exception:
-                continue
+    stored = storage.load_feedbacks(patient_id)
+    stored_by_video = {_video_key(entry): entry for entry in stored}
+    live = [
+        entry for entry in progress.for_patient(patient_id)
+        if not (_video_key(entry) in stored_by_video and progress.settle(stored_by_video[_video_key(entry)]))
+    ]
+    live_videos = {_video_key(entry) for entry in live}
+    entries = live + [entry for entry in stored if _video_key(entry) not in live_videos]
+    exercise_map = _exercise_names(entry.get("ID_Exercicio") or entry.get("exercise_id") for entry in entries)
+
+    feedbacks: List[Dict[str, Any]] = []
+    for entry in entries:
+        try:
+            ex_id = entry.get("ID_Exercicio") or entry.get("exercise_id")
+            detalhes = entry.get("rep_details")
+            if detalhes is None and "Rep_Details" in entry:
+                detalhes = entry["Rep_Details"]
+
+            video_filename = entry.get("video_filename") or entry.get("filename")
+
+            pct = entry.get("progress")
+            if pct is None:
+                pct = entry.get("Progress")
+            frames_done = entry.get("frames_done")
+            frames_total = entry.get("frames_total")
+            feedbacks.append({
+                "exercise_id": ex_id,
+                "exercise_name": exercise_map.get(str(ex_id), "Exercício"),
+                "timestamp": entry.get("Timestamp") or entry.get("date") or entry.get("created_at"),
+                "status": entry.get("Status_Execucao", ""),
+                "observacoes": entry.get("Observacoes_Tecnicas", []),
+                "repeticoes": entry.get("Repetitions", None),
+                "feedback": entry.get("feedback", entry.get("result", "")),
+                "detalhes": detalhes,
+                "video_filename": video_filename,
+                "video_url": f"/api/videos/{video_filename}" if video_filename else None,
+                # versão para o navegador (redireciona para o original enquanto não existe)
+                "playback_url": f"/api/videos/{video_filename}/playback" if video_filename else None,
+                "progress": pct,
+                "frames_done": frames_done,
+                "frames_total": frames_total,
+            })
+        except Exception:
+            continue
 
-    feedbacks: List[Dict[str, Any]] = without_video + list(latest_by_video.values())
     feedbacks.sort(key=lambda x: x.get("timestamp") or "", reverse=True)
     return feedbacks
 
+
+def _check_physio_access(physio_id: int, patient_id: int) -> None:
+    # Autorização simples: paciente deve estar vinculado ao fisioterapeuta
+    with Session(engine) as session:
+        patient = session.get(Patient, patient_id)
+        if not patient:
+            raise HTTPException(status_code=404, detail="Paciente não encontrado")
+        if patient.physiotherapist_id != physio_id:
+            raise HTTPException(status_code=403, detail="Acesso negado")
+
+
+
 @router.get("/patients/{patient_id}/video-feedbacks", summary="Lista feedbacks de vídeos analisados do paciente")
 def get_video_feedbacks(patient_id: int):
     return _load_video_feedbacks_for_patient(patient_id)
@@ -87,12 +102,49 @@ def get_video_feedbacks(patient_id: int):
     summary="Lista feedbacks de vídeos do paciente (acesso do fisioterapeuta)",
 )
 def get_video_feedbacks_for_physio(physio_id: int, patient_id: int):
-    # Autorização simples: paciente deve estar vinculado ao fisioterapeuta
-    with Session(engine) as session:
-        patient = session.get(Patient, patient_id)
-        if not patient:
-            raise HTTPException(status_code=404, detail="Paciente não encontrado")
-        if patient.physiotherapist_id != physio_id:
-            raise HTTPException(status_code=403, detail="Acesso negado")
+    _check_physio_access(physio_id, patient_id)
+    return _load_video_feedbacks_for_patient(patient_id)
+
+
+def _feedback_event_stream(patient_id: int, video_filename: str) -> StreamingResponse:
+    """Server-Sent Events com o progresso e o resultado final da análise de um vídeo.
 
-    return _load_video_feedbacks_for_patient(patient_id)
\ No newline at end of file
+    Eventos `progress` a cada atualização e um `result` final, depois do qual o stream fecha.
+    Clientes do mesmo vídeo compartilham uma única assinatura (`progress.watch`); enquanto
+    esperam, o feedback gravado e o status do job são consultados, então o `result` chega
+    mesmo quando a análise termina (ou falha) em outro processo.
+    """
+
+    async def _events():
+        async for item in progress.watch(
+            patient_id, video_filename, stored=lambda: runtime.final_feedback(str(patient_id), video_filename)
+        ):
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            feedback, terminal = item
+            event = "result" if terminal else "progress"
+            yield f"event: {event}\ndata: {json.dumps(feedback, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/patients/{patient_id}/video-feedbacks/{video_filename}/events",
+    summary="Acompanha (SSE) o progresso e o resultado da análise de um vídeo",
+)
+def stream_video_feedback(patient_id: int, video_filename: str):
+    return _feedback_event_stream(patient_id, video_filename)
+
+
+@router.get(
+    "/physiotherapists/{physio_id}/patients/{patient_id}/video-feedbacks/{video_filename}/events",
+    summary="Acompanha (SSE) a análise de um vídeo do paciente (acesso do fisioterapeuta)",
+)
+def stream_video_feedback_for_physio(physio_id: int, patient_id: int, video_filename: str):
+    _check_physio_access(physio_id, patient_id)
+    return _feedback_event_stream(patient_id, video_filename)
@@ -1,21 +1,47 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-from pathlib import Path
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import RedirectResponse
+
+from app.analysis import renditions, runtime
+from app.core import uploads
+from app.core.media import media_response
 
 router = APIRouter()
 
 
-@router.get("/videos/{filename}", summary="Baixa/serve um vídeo enviado")
-def get_uploaded_video(filename: str):
+def _uploaded_file(filename: str):
     # Evitar path traversal
     if not filename or "/" in filename or "\\" in filename or ".." in filename:
         raise HTTPException(status_code=400, detail="Nome de arquivo inválido")
 
-    base_dir = Path(__file__).resolve().parents[1]  # backend/app
-    uploads_dir = base_dir / "uploads"
-    file_path = uploads_dir / filename
-
+    file_path = uploads.UPLOAD_ROOT / filename
     if not file_path.exists() or not file_path.is_file():
         raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+    return file_path
+
+
+@router.get("/videos/{filename}", summary="Baixa/serve um vídeo enviado")
+def get_uploaded_video(filename: str, request: Request):
+    file_path = _uploaded_file(filename)
+    # sempre o arquivo original; nomes uuid/sha256 nunca são reescritos: cache longo + Range
+    return media_response(request, file_path, immutable=True, filename=filename)
+
+
+@router.get("/videos/{filename}/playback", summary="Serve a versão do vídeo para o navegador")
+def get_playback_video(filename: str, request: Request):
+    file_path = _uploaded_file(filename)
+    playback = renditions.playback_path(filename)
+    if playback is not None:
+        # URL própria da rendition: os bytes desta URL nunca mudam depois de gerados
+        return media_response(request, playback, immutable=True, filename=playback.name)
 
-    return FileResponse(path=str(file_path), filename=filename)
+    # ainda não gerada (ou renditions desligadas): agenda e aponta para o original sem cache,
+    # para que o navegador volte a esta URL e receba a rendition quando ela existir
+    try:
+        runtime.submit_renditions(str(file_path), filename)
+    except Exception:
+        pass
+    return RedirectResponse(
+        request.url_for("get_uploaded_video", filename=filename),
+        status_code=307,
+        headers={"Cache-Control": "no-store"},
+    )
@@ -19,6 +19,10 @@ class Settings(BaseSettings):
     SMTP_USE_TLS: bool = True
     EMAIL_FALLBACK_RETURN_TOKEN: bool = True
 
+    # Uploads de vídeo
+    MAX_UPLOAD_MB: int = 1024
+    UPLOAD_SESSION_EXPIRE_HOURS: int = 24  # uploads retomáveis parados há mais tempo são descartados
+
     # jeito novo de configurar no Pydantic v2
     model_config = SettingsConfigDict(
         env_file=".env",
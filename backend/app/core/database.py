@@ -1,6 +1,6 @@
 from sqlmodel import SQLModel, create_engine, Session
 from app.core.config import settings
-from app.models import patient, physiotherapist, exercise_library, prescription, exercise_execution, pain_level, feedback, goal
+from app.models import patient, physiotherapist, exercise_library, prescription, exercise_execution, pain_level, feedback, goal, analysis_job, video_feedback, upload_session, video_blob, analysis_cache, patient_daily_stats
 from sqlalchemy import text
 
 from app.core.security import hash_password
@@ -36,6 +36,12 @@ def create_db_and_tables():
     from app.models.feedback import Feedback
     from app.models.pain_level import PainLevel
     from app.models.goal import Goal
+    from app.models.analysis_job import AnalysisJob
+    from app.models.video_feedback import VideoFeedback
+    from app.models.upload_session import UploadSession
+    from app.models.video_blob import VideoBlob, VideoBlobRef
+    from app.models.analysis_cache import AnalysisCacheEntry
+    from app.models.patient_daily_stats import PatientDailyStats
     
     SQLModel.metadata.create_all(engine)
 
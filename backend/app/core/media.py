@@ -0,0 +1,140 @@
+"""Respostas de arquivos de mídia com suporte a Range (206) e cache HTTP.
+
+- ETag forte baseado na identidade do arquivo (sha256 do nome para uploads endereçados por
+  conteúdo; senão inode + tamanho + mtime);
+- If-None-Match / If-Modified-Since -> 304; If-Range;
+- Range de um único intervalo -> 206 (intervalo inválido -> 416);
+- Cache-Control longo para arquivos imutáveis (nomes uuid/sha256 nunca são reescritos).
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+RANGE_CHUNK_SIZE = 64 * 1024
+
+_SHA256_NAME = re.compile(r"^[0-9a-f]{64}$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def file_etag(path: Path, stat: Optional[os.stat_result] = None) -> str:
+    stem = path.stem
+    if _SHA256_NAME.match(stem):
+        return f'"{stem}"'
+    stat = stat or path.stat()
+    return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [c.strip() for c in header.split(",")]
+    # If-None-Match usa comparação fraca: W/"x" equivale a "x"
+    return "*" in candidates or etag in [c[2:] if c.startswith("W/") else c for c in candidates]
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    return int(mtime) <= int(since.timestamp())
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(início, fim inclusivo) de um Range de intervalo único; ValueError se insatisfazível.
+
+    Retorna None quando o header deve ser ignorado (vários intervalos ou sintaxe inválida).
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # sufixo: últimos N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Range insatisfazível")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or (last and end < start):
+        raise ValueError("Range insatisfazível")
+    return start, min(end, size - 1)
+
+
+def _iter_file(path: Path, start: int, end: int) -> Iterator[bytes]:
+    remaining = end - start + 1
+    with path.open("rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def media_response(
+    request: Request,
+    path: Path,
+    immutable: bool = False,
+    filename: Optional[str] = None,
+) -> Response:
+    """Serve `path` respeitando os headers condicionais e de Range do `request`."""
+    stat = path.stat()
+    etag = file_etag(path, stat)
+    headers: Dict[str, str] = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else DEFAULT_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since") and _not_modified_since(
+        request.headers["if-modified-since"], stat.st_mtime
+    ):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range:
+        # If-Range: só aplica o Range se o arquivo ainda for o mesmo
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            still_valid = if_range == etag
+        else:
+            still_valid = _not_modified_since(if_range, stat.st_mtime)
+        if not still_valid:
+            range_header = None
+
+    if range_header:
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            headers.update({
+                "Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+                "Content-Length": str(end - start + 1),
+            })
+            return StreamingResponse(_iter_file(path, start, end), status_code=206, media_type=media_type, headers=headers)
+
+    return FileResponse(path=str(path), filename=filename, headers=headers, stat_result=stat)
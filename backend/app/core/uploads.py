@@ -0,0 +1,94 @@
+"""Gravação de uploads em disco sem carregar o arquivo inteiro na memória.
+
+O conteúdo é copiado em blocos de tamanho fixo para um arquivo temporário no mesmo
+diretório do destino, com limite de tamanho e SHA-256 calculado durante a cópia; ao
+final o temporário é renomeado atomicamente para o nome definitivo.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+
+
+CHUNK_SIZE = 1024 * 1024  # 1 MiB
+
+# backend/app/uploads
+UPLOAD_ROOT = Path(__file__).resolve().parents[1] / "uploads"
+
+
+class UploadTooLarge(ValueError):
+    """O upload excedeu o limite configurado (MAX_UPLOAD_MB)."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Arquivo excede o limite de {max_bytes // (1024 * 1024)} MB")
+        self.max_bytes = max_bytes
+
+
+class StoredUpload(NamedTuple):
+    path: Path
+    size: int
+    sha256: str
+
+
+def max_upload_bytes() -> int:
+    return int(settings.MAX_UPLOAD_MB) * 1024 * 1024
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def receive_upload(file: UploadFile, directory: Path, max_bytes: Optional[int] = None) -> StoredUpload:
+    """Copia `file` em blocos de CHUNK_SIZE para um temporário em `directory` (memória constante).
+
+    Retorna o temporário com tamanho e SHA-256; o chamador decide o nome final (rename).
+    Levanta UploadTooLarge se passar de `max_bytes` (padrão: MAX_UPLOAD_MB); nesse caso, ou em
+    qualquer outra falha, o temporário é removido.
+    """
+    max_bytes = max_upload_bytes() if max_bytes is None else max_bytes
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(prefix=".upload.", suffix=".part", dir=str(directory))
+    os.close(fd)
+    tmp = Path(name)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with tmp.open("wb") as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+            out.flush()
+            await asyncio.to_thread(os.fsync, out.fileno())
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return StoredUpload(tmp, size, digest.hexdigest())
+
+
+async def save_upload(file: UploadFile, dest: Path, max_bytes: Optional[int] = None) -> StoredUpload:
+    """Recebe `file` (ver `receive_upload`) e renomeia atomicamente para `dest`."""
+    stored = await receive_upload(file, dest.parent, max_bytes)
+    try:
+        os.replace(stored.path, dest)
+    except BaseException:
+        stored.path.unlink(missing_ok=True)
+        raise
+    return StoredUpload(dest, stored.size, stored.sha256)
@@ -46,6 +46,8 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # headers do upload retomável lidos pelo cliente
+        expose_headers=["Upload-Offset", "Upload-Length", "Upload-Expires", "Location"],
     )
 
     api_prefix = settings.API_PREFIX
@@ -103,6 +105,29 @@ def create_app() -> FastAPI:
     def on_startup() -> None:
         # cria todas as tabelas definidas em app.models
         init_db()
+        # retoma a fila persistente de análises (jobs interrompidos voltam para a fila)
+        from app.analysis import runtime
+        runtime.start_workers()
+        # descarta uploads retomáveis que passaram da validade
+        from sqlmodel import Session
+        from app.core.database import engine
+        from app.services.upload_session_service import UploadSessionService
+        with Session(engine) as session:
+            UploadSessionService.expire_stale(session)
+        # remove vídeos sem referências (pacientes excluídos)
+        from app.analysis import blobs
+        with Session(engine) as session:
+            blobs.gc(session)
+        # preenche o resumo diário dos relatórios em bancos anteriores a ele
+        from app.services.daily_stats_service import DailyStatsService
+        with Session(engine) as session:
+            DailyStatsService.backfill(session)
+
+    @app.on_event("shutdown")
+    def on_shutdown() -> None:
+        # encerra o pool de análise de vídeos (threads ou processos)
+        from app.analysis import runtime
+        runtime.shutdown(wait=False)
 
     return app
 
@@ -0,0 +1,26 @@
+from sqlmodel import SQLModel, Field, UniqueConstraint
+from typing import Optional
+from datetime import datetime
+
+
+class AnalysisCacheEntry(SQLModel, table=True):
+    """Resultado de `analyze_video` para um conteúdo de vídeo e configuração de análise."""
+    __tablename__ = "analysis_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "video_sha256", "model_name", "joint", "down_threshold", "up_threshold", "options",
+            name="uq_analysis_cache_key",
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    video_sha256: str = Field(max_length=64, index=True)
+    model_name: str = Field(max_length=100)
+    joint: str = Field(max_length=20)
+    down_threshold: float
+    up_threshold: float
+    options: str = Field(default="", max_length=100)  # amostragem (ex.: "fps=10,adaptive")
+
+    payload: str  # feedback (JSON) produzido pela análise
+    hits: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,36 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class AnalysisJob(SQLModel, table=True):
+    """Job de análise de vídeo na fila persistente (sobrevive a reinícios do servidor).
+
+    Estados: queued -> running -> done | failed. Um job em "running" pertence ao worker
+    `lease_owner` até `lease_expires_at`; leases vencidos voltam para "queued".
+    """
+    __tablename__ = "analysis_jobs"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    patient_id: str = Field(max_length=64, index=True)
+    exercise_id: str = Field(max_length=64)
+    video_path: str = Field(max_length=1024)
+    video_filename: str = Field(max_length=255, index=True)
+
+    # Escalonamento: classe de prioridade, chave de fair share (paciente/fisioterapeuta)
+    # e tamanho estimado do job (CAP_PROP_FRAME_COUNT)
+    priority_class: str = Field(default="interactive", max_length=20, index=True)
+    fairness_key: Optional[str] = Field(default=None, max_length=64)
+    frame_count: Optional[int] = Field(default=None, ge=0)
+    queued_at: datetime = Field(default_factory=datetime.utcnow)
+
+    status: str = Field(default="queued", max_length=20, index=True)
+    attempts: int = Field(default=0, ge=0)
+    lease_owner: Optional[str] = Field(default=None, max_length=128)
+    lease_expires_at: Optional[datetime] = Field(default=None, index=True)
+    error: Optional[str] = Field(default=None)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = Field(default=None)
+    finished_at: Optional[datetime] = Field(default=None)
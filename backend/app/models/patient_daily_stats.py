@@ -0,0 +1,30 @@
+from sqlmodel import SQLModel, Field, UniqueConstraint
+from typing import Optional
+from datetime import date, datetime
+
+
+class PatientDailyStats(SQLModel, table=True):
+    """Resumo diário (UTC) das execuções e da dor de um paciente, mantido a cada registro.
+
+    `exercises` guarda, por exercício do dia, {"<exercise_id>": [execuções, soma da taxa de
+    conclusão, última execução (ISO)]} (JSON).
+    """
+    __tablename__ = "patient_daily_stats"
+    __table_args__ = (UniqueConstraint("patient_id", "day", name="uq_patient_daily_stats_day"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    patient_id: int = Field(foreign_key="patients.id", index=True)
+    day: date = Field(index=True)
+
+    executions: int = Field(default=0)
+    minutes: float = Field(default=0.0)
+    completion_sum: float = Field(default=0.0)
+    # todos os registros de dor das execuções do dia
+    pain_sum: int = Field(default=0)
+    pain_count: int = Field(default=0)
+    # média de dor de cada execução (somada) e execuções com dor: evolução diária da dor
+    pain_avg_sum: float = Field(default=0.0)
+    pain_executions: int = Field(default=0)
+    exercises: str = Field(default="{}")
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
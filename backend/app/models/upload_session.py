@@ -0,0 +1,24 @@
+from sqlmodel import SQLModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class UploadSession(SQLModel, table=True):
+    """Upload retomável: os bytes recebidos ficam em uploads/partial/<id>.part até o finalize."""
+    __tablename__ = "upload_sessions"
+
+    id: str = Field(primary_key=True, max_length=32)  # uuid4 hex
+    patient_id: str = Field(max_length=64, index=True)
+    exercise_id: str = Field(max_length=64)
+    original_filename: Optional[str] = Field(default=None, max_length=255)
+    length: int  # tamanho total declarado na criação (bytes)
+    offset: int = Field(default=0)  # bytes já recebidos
+    sha256: Optional[str] = Field(default=None, max_length=64)  # hash esperado (opcional)
+
+    status: str = Field(default="open", max_length=20, index=True)  # open | finalized | expired
+    video_filename: Optional[str] = Field(default=None, max_length=255)  # nome final após finalize
+    job_id: Optional[int] = Field(default=None)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
@@ -0,0 +1,30 @@
+from sqlmodel import SQLModel, Field, UniqueConstraint
+from typing import Optional
+from datetime import datetime
+
+
+class VideoBlob(SQLModel, table=True):
+    """Vídeo enviado, armazenado uma única vez em uploads/<sha256><ext>.
+
+    `refcount` é o número de donos (VideoBlobRef); com zero o arquivo pode ser coletado.
+    """
+    __tablename__ = "video_blobs"
+
+    sha256: str = Field(primary_key=True, max_length=64)
+    ext: str = Field(default="", max_length=16)
+    size: int = Field(default=0)
+    refcount: int = Field(default=0, index=True)
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class VideoBlobRef(SQLModel, table=True):
+    """Referência de um dono (ex.: "patient:4") a um blob; idempotente por (blob, dono)."""
+    __tablename__ = "video_blob_refs"
+    __table_args__ = (UniqueConstraint("sha256", "owner", name="uq_video_blob_ref"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    sha256: str = Field(foreign_key="video_blobs.sha256", max_length=64, index=True)
+    owner: str = Field(max_length=64, index=True)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
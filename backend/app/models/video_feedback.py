@@ -0,0 +1,29 @@
+from sqlmodel import SQLModel, Field, UniqueConstraint
+from typing import Optional
+from datetime import datetime
+
+
+class VideoFeedback(SQLModel, table=True):
+    """Último estado da análise de cada vídeo enviado (índice por paciente, exercício e vídeo).
+
+    Uploads são endereçados por conteúdo: o mesmo arquivo enviado para dois exercícios tem o
+    mesmo `video_filename`, então o exercício faz parte da chave.
+    `payload` guarda o feedback completo (JSON) como gravado pela análise.
+    """
+    __tablename__ = "video_feedbacks"
+    __table_args__ = (
+        UniqueConstraint("patient_id", "exercise_id", "video_filename", name="uq_video_feedback_patient_exercise_video"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    patient_id: str = Field(max_length=64, index=True)
+    video_filename: Optional[str] = Field(default=None, max_length=255, index=True)
+    exercise_id: Optional[str] = Field(default=None, max_length=64)
+
+    status: str = Field(default="", max_length=20)
+    progress: Optional[int] = Field(default=None)
+    timestamp: Optional[str] = Field(default=None, max_length=40)  # "Timestamp" do feedback (ISO)
+    payload: str
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -75,6 +75,7 @@ class ExecutionHistoryResponse(BaseModel):
     executions: List[ExecutionHistoryItem] = []
     has_data: bool = Field(..., description="Indica se há histórico de execuções")
     message: Optional[str] = Field(None, description="Mensagem quando não há histórico")
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página (None na última)")
 
     class Config:
         json_schema_extra = {
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+
+class UploadSessionCreate(BaseModel):
+    """Schema para criação de um upload retomável"""
+    patient_id: str = Field(..., max_length=64)
+    exercise_id: str = Field(..., max_length=64)
+    length: int = Field(..., gt=0, description="Tamanho total do arquivo em bytes")
+    filename: Optional[str] = Field(None, max_length=255)
+    sha256: Optional[str] = Field(None, min_length=64, max_length=64, description="Hash esperado (opcional)")
+
+
+class UploadSessionResponse(BaseModel):
+    """Estado de um upload retomável"""
+    upload_id: str
+    offset: int
+    length: int
+    status: str
+    expires_at: datetime
+    video_filename: Optional[str] = None
+    job_id: Optional[int] = None
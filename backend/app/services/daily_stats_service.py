@@ -0,0 +1,226 @@
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import json
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select, func, and_, or_
+
+from app.models.exercise_execution import ExerciseExecution
+from app.models.pain_level import PainLevel
+from app.models.patient_daily_stats import PatientDailyStats
+from app.models.prescription import Prescription
+
+
+# colunas que o upsert soma à linha existente (as demais são chave, JSON ou carimbo)
+_SUMMED = ("executions", "minutes", "completion_sum", "pain_sum", "pain_count", "pain_avg_sum", "pain_executions")
+
+
+def _day_range(day: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _add_execution(
+    row: PatientDailyStats,
+    execution_date: datetime,
+    minutes: Optional[float],
+    completion_rate: float,
+    exercise_id: Optional[int],
+) -> None:
+    row.executions += 1
+    row.minutes += minutes or 0.0
+    row.completion_sum += completion_rate
+    if exercise_id is not None:
+        exercises = json.loads(row.exercises or "{}")
+        count, completion, last = exercises.get(str(exercise_id), (0, 0.0, None))
+        stamp = execution_date.isoformat()
+        # arredondado como no upsert (o JSON do SQLite grava só 15 dígitos)
+        exercises[str(exercise_id)] = [count + 1, round(completion + completion_rate, 6), max(last or stamp, stamp)]
+        row.exercises = json.dumps(exercises, sort_keys=True)
+
+
+def _merge_exercises(current, delta: str):
+    """Expressão SQL que soma o JSON `delta` de exercícios ao JSON `current` da linha."""
+    merged = current
+    for key, (count, completion, last) in json.loads(delta).items():
+        path = f'$."{key}"'
+        merged = func.json_set(merged, path, func.json_array(
+            func.coalesce(func.json_extract(current, f"{path}[0]"), 0) + count,
+            func.round(func.coalesce(func.json_extract(current, f"{path}[1]"), 0.0) + completion, 6),
+            func.max(func.coalesce(func.json_extract(current, f"{path}[2]"), last), last),
+        ))
+    return merged
+
+
+def _add_pain(row: PatientDailyStats, before: Tuple[int, int], after: Tuple[int, int]) -> None:
+    """Atualiza a dor do dia quando a execução passa de (soma, contagem) `before` para `after`."""
+    (old_sum, old_count), (new_sum, new_count) = before, after
+    row.pain_sum += new_sum - old_sum
+    row.pain_count += new_count - old_count
+    old_avg = old_sum / old_count if old_count else 0.0
+    row.pain_avg_sum += (new_sum / new_count if new_count else 0.0) - old_avg
+    row.pain_executions += (1 if new_count else 0) - (1 if old_count else 0)
+
+
+class DailyStatsService:
+    """Mantém `patient_daily_stats`, o resumo diário lido pelos relatórios de progresso.
+
+    Só o relatório de progresso (`ProgressReportService`) lê o resumo. O relatório
+    detalhado (`ReportService`) e o histórico (`ExecutionHistoryService`) listam cada
+    execução com dor e feedbacks, então já carregam as linhas do período e somam em
+    memória; além disso usam dados que o resumo não tem (`was_completed`, execuções sem
+    exercício excluídas pelo join do histórico).
+    """
+
+    @staticmethod
+    def _apply(session: Session, patient_id: int, day: date, change: Callable[[PatientDailyStats], None]) -> None:
+        """Soma à linha (paciente, dia) o efeito de `change`, criando-a se preciso; não faz commit.
+
+        `change` é aplicado numa linha zerada, que vira o incremento de um único
+        INSERT ... ON CONFLICT DO UPDATE (SET coluna = coluna + excluded.coluna): a leitura e a
+        soma acontecem dentro do próprio comando, então registros simultâneos não perdem
+        atualizações (SQLite não tem SELECT ... FOR UPDATE). Roda na transação de quem chama,
+        que grava a execução/dor e o resumo num único commit.
+        """
+        delta = PatientDailyStats(patient_id=patient_id, day=day)
+        change(delta)
+        table = PatientDailyStats.__table__
+        statement = insert(table).values(
+            patient_id=patient_id,
+            day=day,
+            exercises=delta.exercises,
+            updated_at=datetime.utcnow(),
+            **{column: getattr(delta, column) for column in _SUMMED},
+        )
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.patient_id, table.c.day],
+            set_={
+                **{column: table.c[column] + excluded[column] for column in _SUMMED},
+                "exercises": _merge_exercises(table.c.exercises, delta.exercises),
+                "updated_at": excluded.updated_at,
+            },
+        )
+        session.exec(statement)
+
+    @staticmethod
+    def record_execution(session: Session, execution: ExerciseExecution, exercise_id: Optional[int]) -> None:
+        """Soma uma execução nova (já no flush, ainda sem commit) ao resumo do seu dia."""
+        DailyStatsService._apply(
+            session,
+            execution.patient_id,
+            execution.execution_date.date(),
+            lambda row: _add_execution(
+                row, execution.execution_date, execution.duration_minutes, execution.completion_rate, exercise_id
+            ),
+        )
+
+    @staticmethod
+    def record_pain(session: Session, pain: PainLevel) -> None:
+        """Soma um registro de dor (já no flush, ainda sem commit) ao resumo do dia da execução."""
+        execution = session.get(ExerciseExecution, pain.execution_id)
+        if execution is None:
+            return
+        others_sum, others_count = session.exec(
+            select(func.coalesce(func.sum(PainLevel.pain_level), 0), func.count(PainLevel.id))
+            .where(PainLevel.execution_id == pain.execution_id)
+            .where(PainLevel.id != pain.id)
+        ).one()
+        before = (int(others_sum), int(others_count))
+        after = (before[0] + pain.pain_level, before[1] + 1)
+        DailyStatsService._apply(
+            session,
+            execution.patient_id,
+            execution.execution_date.date(),
+            lambda row: _add_pain(row, before, after),
+        )
+
+    @staticmethod
+    def rebuild(session: Session, patient_id: Optional[int] = None, days: Optional[Iterable[date]] = None) -> int:
+        """Recalcula o resumo a partir de exercise_executions/pain_levels; não faz commit.
+
+        Sem `patient_id` recalcula todos os pacientes; com `days`, só esses dias. Usado em
+        exclusões de execuções e para preencher a tabela em bancos existentes.
+        """
+        scope = []
+        stats_scope = []
+        if patient_id is not None:
+            scope.append(ExerciseExecution.patient_id == patient_id)
+            stats_scope.append(PatientDailyStats.patient_id == patient_id)
+        if days is not None:
+            days = sorted(set(days))
+            if not days:
+                return 0
+            scope.append(or_(*(
+                and_(ExerciseExecution.execution_date >= start, ExerciseExecution.execution_date < end)
+                for start, end in map(_day_range, days)
+            )))
+            stats_scope.append(PatientDailyStats.day.in_(days))
+
+        session.exec(delete(PatientDailyStats).where(*stats_scope))
+
+        pain_per_execution = (
+            select(
+                PainLevel.execution_id,
+                func.sum(PainLevel.pain_level).label("pain_sum"),
+                func.count(PainLevel.id).label("pain_count"),
+            )
+            .group_by(PainLevel.execution_id)
+            .subquery()
+        )
+        statement = (
+            select(
+                ExerciseExecution.patient_id,
+                ExerciseExecution.execution_date,
+                ExerciseExecution.duration_minutes,
+                ExerciseExecution.completion_rate,
+                Prescription.exercise_id,
+                pain_per_execution.c.pain_sum,
+                pain_per_execution.c.pain_count,
+            )
+            .outerjoin(Prescription, Prescription.id == ExerciseExecution.prescription_id)
+            .outerjoin(pain_per_execution, pain_per_execution.c.execution_id == ExerciseExecution.id)
+            .where(*scope)
+        )
+        rows: Dict[Tuple[int, date], PatientDailyStats] = {}
+        for pid, execution_date, minutes, completion_rate, exercise_id, pain_sum, pain_count in session.exec(statement):
+            key = (pid, execution_date.date())
+            row = rows.get(key)
+            if row is None:
+                row = rows[key] = PatientDailyStats(patient_id=pid, day=key[1])
+            _add_execution(row, execution_date, minutes, completion_rate, exercise_id)
+            if pain_count:
+                _add_pain(row, (0, 0), (int(pain_sum), int(pain_count)))
+        session.add_all(rows.values())
+        session.flush()
+        return len(rows)
+
+    @staticmethod
+    def delete_patient(session: Session, patient_id: int) -> None:
+        """Remove o resumo do paciente (exclusão definitiva); não faz commit."""
+        session.exec(delete(PatientDailyStats).where(PatientDailyStats.patient_id == patient_id))
+
+    @staticmethod
+    def backfill(session: Session) -> int:
+        """Preenche o resumo de bancos criados antes dele (tabela vazia, execuções existentes)."""
+        if session.exec(select(PatientDailyStats.id).limit(1)).first() is not None:
+            return 0
+        if session.exec(select(ExerciseExecution.id).limit(1)).first() is None:
+            return 0
+        created = DailyStatsService.rebuild(session)
+        session.commit()
+        return created
+
+    @staticmethod
+    def days(session: Session, patient_id: int, first_day: date, last_day: date) -> List[PatientDailyStats]:
+        """Linhas do paciente entre `first_day` e `last_day` (inclusive), em ordem de dia."""
+        if first_day > last_day:
+            return []
+        return list(session.exec(
+            select(PatientDailyStats)
+            .where(PatientDailyStats.patient_id == patient_id)
+            .where(PatientDailyStats.day >= first_day)
+            .where(PatientDailyStats.day <= last_day)
+            .order_by(PatientDailyStats.day)
+        ).all())
@@ -1,3 +1,5 @@
+import base64
+
 from sqlmodel import Session, select, func, and_, or_
 from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
@@ -5,6 +7,8 @@ from app.models.exercise_execution import ExerciseExecution
 from app.models.prescription import Prescription
 from app.models.exercise_library import ExerciseLibrary
 from app.models.pain_level import PainLevel
+from app.services.daily_stats_service import DailyStatsService
+from app.services.report_cache import report_cache
 from app.schemas.execution_history import (
     ExecutionHistoryItem,
     ExecutionStatus,
@@ -51,85 +55,137 @@ class ExecutionHistoryService:
         
         return start, end
 
+    @staticmethod
+    def encode_cursor(item: ExecutionHistoryItem) -> str:
+        """Cursor opaco da página seguinte: (execution_date, id) do último item."""
+        raw = f"{item.execution_date.isoformat()}|{item.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            date_part, id_part = raw.rsplit("|", 1)
+            return datetime.fromisoformat(date_part), int(id_part)
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError("Cursor de paginação inválido")
+
+    @staticmethod
+    def _history_filters(patient_id: int, period_start: datetime, period_end: datetime):
+        return (
+            ExerciseExecution.patient_id == patient_id,
+            ExerciseExecution.execution_date >= period_start,
+            ExerciseExecution.execution_date <= period_end,
+        )
+
+    @staticmethod
+    def _load_history(
+        session: Session,
+        patient_id: int,
+        period_start: datetime,
+        period_end: datetime,
+        limit: Optional[int] = None,
+        cursor: Optional[Tuple[datetime, int]] = None,
+    ) -> List[ExecutionHistoryItem]:
+        """Histórico em uma única consulta: execução + prescrição + exercício + dor mais recente.
+
+        A dor mais recente de cada execução vem de um ROW_NUMBER() por execução. A ordem é
+        (execution_date, id) decrescente; `cursor` é o (execution_date, id) do último item da
+        página anterior (paginação keyset) e `limit` o tamanho da página.
+        """
+        from app.schemas.execution_history import ExerciseBasicInfo, PainLevelInfo
+
+        in_period = ExecutionHistoryService._history_filters(patient_id, period_start, period_end)
+
+        ranked_pain = (
+            select(
+                PainLevel.execution_id,
+                PainLevel.pain_level,
+                PainLevel.pain_location,
+                PainLevel.reported_at,
+                func.row_number().over(
+                    partition_by=PainLevel.execution_id,
+                    order_by=(PainLevel.reported_at.desc(), PainLevel.id.desc()),
+                ).label("rn"),
+            )
+            .join(ExerciseExecution, ExerciseExecution.id == PainLevel.execution_id)
+            .where(*in_period)
+            .subquery()
+        )
+        latest_pain = select(ranked_pain).where(ranked_pain.c.rn == 1).subquery()
+
+        statement = (
+            select(
+                ExerciseExecution,
+                ExerciseLibrary.id,
+                ExerciseLibrary.name,
+                ExerciseLibrary.category,
+                latest_pain.c.pain_level,
+                latest_pain.c.pain_location,
+                latest_pain.c.reported_at,
+            )
+            # Só entram execuções com exercício (join interno com prescrição e exercício)
+            .join(Prescription, Prescription.id == ExerciseExecution.prescription_id)
+            .join(ExerciseLibrary, ExerciseLibrary.id == Prescription.exercise_id)
+            .outerjoin(latest_pain, latest_pain.c.execution_id == ExerciseExecution.id)
+            .where(*in_period)
+            .order_by(ExerciseExecution.execution_date.desc(), ExerciseExecution.id.desc())
+        )
+        if cursor is not None:
+            cursor_date, cursor_id = cursor
+            statement = statement.where(
+                or_(
+                    ExerciseExecution.execution_date < cursor_date,
+                    and_(ExerciseExecution.execution_date == cursor_date, ExerciseExecution.id < cursor_id),
+                )
+            )
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        history_items = []
+        for execution, exercise_id, name, category, pain_value, pain_location, reported_at in session.exec(statement).all():
+            pain_level = None
+            if pain_value is not None:
+                pain_level = PainLevelInfo(
+                    pain_level=pain_value,
+                    pain_location=pain_location,
+                    reported_at=reported_at
+                )
+            history_items.append(ExecutionHistoryItem(
+                id=execution.id,
+                execution_date=execution.execution_date,
+                exercise=ExerciseBasicInfo(id=exercise_id, name=name, category=category),
+                status=ExecutionHistoryService._get_status_from_completion_rate(
+                    execution.completion_rate,
+                    execution.was_completed
+                ),
+                completion_rate=execution.completion_rate,
+                repetitions_completed=execution.repetitions_completed,
+                series_completed=execution.series_completed,
+                duration_minutes=execution.duration_minutes,
+                pain_level=pain_level
+            ))
+        return history_items
+
     @staticmethod
     def get_execution_history(
         session: Session,
         patient_id: int,
         period_filter: PeriodFilter = PeriodFilter.LAST_7_DAYS,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[ExecutionHistoryItem]:
-        """Obtém o histórico de execução de exercícios de um paciente"""
+        """Obtém o histórico de execução de exercícios de um paciente (mais recentes primeiro)"""
+        period_start, period_end = ExecutionHistoryService._calculate_period_dates(
+            period_filter, start_date, end_date
+        )
+        position = ExecutionHistoryService.decode_cursor(cursor) if cursor else None
         try:
-            # Calcular período
-            period_start, period_end = ExecutionHistoryService._calculate_period_dates(
-                period_filter, start_date, end_date
+            return ExecutionHistoryService._load_history(
+                session, patient_id, period_start, period_end, limit, position
             )
-            
-            # Buscar execuções do paciente no período
-            statement = select(ExerciseExecution).where(
-                and_(
-                    ExerciseExecution.patient_id == patient_id,
-                    ExerciseExecution.execution_date >= period_start,
-                    ExerciseExecution.execution_date <= period_end
-                )
-            ).order_by(ExerciseExecution.execution_date.desc())
-            
-            executions = list(session.exec(statement).all())
-            
-            # Transformar em ExecutionHistoryItem
-            history_items = []
-            for execution in executions:
-                # Buscar exercício relacionado através da prescrição
-                prescription = session.get(Prescription, execution.prescription_id)
-                exercise = None
-                if prescription:
-                    exercise_model = session.get(ExerciseLibrary, prescription.exercise_id)
-                    if exercise_model:
-                        from app.schemas.execution_history import ExerciseBasicInfo
-                        exercise = ExerciseBasicInfo(
-                            id=exercise_model.id,
-                            name=exercise_model.name,
-                            category=exercise_model.category
-                        )
-                
-                # Buscar nível de dor mais recente da execução
-                pain_statement = select(PainLevel).where(
-                    PainLevel.execution_id == execution.id
-                ).order_by(PainLevel.reported_at.desc()).limit(1)
-                
-                pain_level_model = session.exec(pain_statement).first()
-                pain_level = None
-                if pain_level_model:
-                    from app.schemas.execution_history import PainLevelInfo
-                    pain_level = PainLevelInfo(
-                        pain_level=pain_level_model.pain_level,
-                        pain_location=pain_level_model.pain_location,
-                        reported_at=pain_level_model.reported_at
-                    )
-                
-                # Determinar status
-                status = ExecutionHistoryService._get_status_from_completion_rate(
-                    execution.completion_rate,
-                    execution.was_completed
-                )
-                
-                if exercise:  # Só adiciona se tiver exercício
-                    history_item = ExecutionHistoryItem(
-                        id=execution.id,
-                        execution_date=execution.execution_date,
-                        exercise=exercise,
-                        status=status,
-                        completion_rate=execution.completion_rate,
-                        repetitions_completed=execution.repetitions_completed,
-                        series_completed=execution.series_completed,
-                        duration_minutes=execution.duration_minutes,
-                        pain_level=pain_level
-                    )
-                    history_items.append(history_item)
-            
-            return history_items
-            
         except Exception as e:
             raise ValueError(f"Erro ao buscar histórico de execução: {str(e)}")
 
@@ -139,20 +195,46 @@ class ExecutionHistoryService:
         patient_id: int,
         period_filter: PeriodFilter = PeriodFilter.LAST_7_DAYS,
         start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
-    ) -> Tuple[List[ExecutionHistoryItem], datetime, datetime, int]:
-        """Obtém o histórico e informações resumidas"""
+        end_date: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[ExecutionHistoryItem], datetime, datetime, int, Optional[str]]:
+        """Obtém o histórico e informações resumidas
+
+        Retorna (itens, início, fim, total no período, cursor da próxima página | None).
+        Sem `limit` o período vem inteiro e o total é o número de itens.
+        """
         period_start, period_end = ExecutionHistoryService._calculate_period_dates(
             period_filter, start_date, end_date
         )
-        
-        history_items = ExecutionHistoryService.get_execution_history(
-            session, patient_id, period_filter, start_date, end_date
-        )
-        
-        total_executions = len(history_items)
-        
-        return history_items, period_start, period_end, total_executions
+        position = ExecutionHistoryService.decode_cursor(cursor) if cursor else None
+
+        try:
+            # busca um item a mais para saber se existe próxima página
+            history_items = ExecutionHistoryService._load_history(
+                session, patient_id, period_start, period_end,
+                limit + 1 if limit is not None else None, position
+            )
+            next_cursor = None
+            if limit is not None and len(history_items) > limit:
+                history_items = history_items[:limit]
+                next_cursor = ExecutionHistoryService.encode_cursor(history_items[-1])
+
+            if limit is None and position is None:
+                total_executions = len(history_items)
+            else:
+                # contagem direta, não pelo resumo diário: o join com prescrição/exercício
+                # exclui execuções órfãs e o período tem hora exata, não dias inteiros
+                total_executions = session.exec(
+                    select(func.count(ExerciseExecution.id))
+                    .join(Prescription, Prescription.id == ExerciseExecution.prescription_id)
+                    .join(ExerciseLibrary, ExerciseLibrary.id == Prescription.exercise_id)
+                    .where(*ExecutionHistoryService._history_filters(patient_id, period_start, period_end))
+                ).one()
+        except Exception as e:
+            raise ValueError(f"Erro ao buscar histórico de execução: {str(e)}")
+
+        return history_items, period_start, period_end, total_executions, next_cursor
 
     @staticmethod
     def create_execution(
@@ -176,38 +258,51 @@ class ExecutionHistoryService:
              if calc > 100: calc = 100.0
              if calc > completion_rate: completion_rate = calc
 
-        # 3. Criar Execução
-        execution = ExerciseExecution(
-            prescription_id=data.prescription_id,
-            patient_id=prescription.patient_id,
-            repetitions_completed=data.repetitions_completed,
-            series_completed=data.series_completed,
-            duration_minutes=data.duration_minutes,
-            completion_rate=completion_rate,
-            was_completed=data.was_completed,
-            execution_date=datetime.utcnow()
-        )
-        session.add(execution)
-        session.commit()
-        session.refresh(execution)
-
-        # 4. Registrar Nível de Dor / Comentário do paciente
-        # Observação: o comentário inserido pelo paciente ao "realizar exercício" NÃO é feedback do fisioterapeuta.
-        # Guardamos esse texto em PainLevel.notes para aparecer como "Comentário do paciente" nos relatórios.
-        if (data.pain_level is not None) or (data.feedback_comment is not None and str(data.feedback_comment).strip()):
-            pain_level_value = data.pain_level if data.pain_level is not None else 0
-            notes_value = data.feedback_comment.strip() if data.feedback_comment is not None else None
-            if notes_value == "":
-                notes_value = None
-
-            pain = PainLevel(
-                execution_id=execution.id,
-                pain_level=pain_level_value,
-                notes=notes_value,
-                reported_at=datetime.utcnow(),
+        # Execução, dor e resumo diário vão num único commit; o resumo é um upsert atômico,
+        # então registros simultâneos do mesmo dia não conflitam.
+        try:
+            # 3. Criar Execução
+            execution = ExerciseExecution(
+                prescription_id=data.prescription_id,
+                patient_id=prescription.patient_id,
+                repetitions_completed=data.repetitions_completed,
+                series_completed=data.series_completed,
+                duration_minutes=data.duration_minutes,
+                completion_rate=completion_rate,
+                was_completed=data.was_completed,
+                execution_date=datetime.utcnow()
             )
-            session.add(pain)
-        
-        session.commit()
+            session.add(execution)
+            session.flush()
+
+            # 4. Registrar Nível de Dor / Comentário do paciente
+            # Observação: o comentário inserido pelo paciente ao "realizar exercício" NÃO é feedback do fisioterapeuta.
+            # Guardamos esse texto em PainLevel.notes para aparecer como "Comentário do paciente" nos relatórios.
+            pain = None
+            if (data.pain_level is not None) or (data.feedback_comment is not None and str(data.feedback_comment).strip()):
+                pain_level_value = data.pain_level if data.pain_level is not None else 0
+                notes_value = data.feedback_comment.strip() if data.feedback_comment is not None else None
+                if notes_value == "":
+                    notes_value = None
+
+                pain = PainLevel(
+                    execution_id=execution.id,
+                    pain_level=pain_level_value,
+                    notes=notes_value,
+                    reported_at=datetime.utcnow(),
+                )
+                session.add(pain)
+                session.flush()
+
+            # 5. Atualizar o resumo diário (patient_daily_stats) lido pelos relatórios
+            DailyStatsService.record_execution(session, execution, prescription.exercise_id)
+            if pain is not None:
+                DailyStatsService.record_pain(session, pain)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        report_cache.invalidate_patient(execution.patient_id)
+
         session.refresh(execution)
         return execution
@@ -4,6 +4,7 @@ from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from app.models.exercise_library import ExerciseLibrary
 from app.schemas.exercise import ExerciseCreate, ExerciseUpdate
+from app.services.report_cache import report_cache
 
 class ExerciseService:
     """Serviço para gerenciar a biblioteca de exercícios"""
@@ -79,6 +80,8 @@ class ExerciseService:
             session.add(exercise)
             session.commit()
             session.refresh(exercise)
+            # nomes dos exercícios aparecem nos relatórios de todos os pacientes
+            report_cache.clear()
             
             return exercise
         except IntegrityError as e:
@@ -103,6 +106,7 @@ class ExerciseService:
             exercise.updated_at = datetime.utcnow()
             session.add(exercise)
             session.commit()
+            report_cache.clear()
             
             return True
         except SQLAlchemyError as e:
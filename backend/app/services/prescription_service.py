@@ -4,6 +4,7 @@ from app.models.prescription import Prescription
 from app.models.exercise_library import ExerciseLibrary
 from app.models.patient import Patient
 from app.schemas.prescription import PrescriptionCreate, PrescriptionUpdate
+from app.services.report_cache import report_cache
 from app.api.routes_notificacoes import repo_notificacoes
 from notificacoes import registrar_notificacao
 
@@ -35,6 +36,7 @@ class PrescriptionService:
         session.add(prescription)
         session.commit()
         session.refresh(prescription)
+        report_cache.invalidate_patient(prescription.patient_id)
 
         # Registrar Notificação
         try:
@@ -96,6 +98,7 @@ class PrescriptionService:
         session.add(prescription)
         session.commit()
         session.refresh(prescription)
+        report_cache.invalidate_patient(prescription.patient_id)
         
         return prescription
 
@@ -109,5 +112,6 @@ class PrescriptionService:
         prescription.is_active = False
         session.add(prescription)
         session.commit()
+        report_cache.invalidate_patient(prescription.patient_id)
         
         return True
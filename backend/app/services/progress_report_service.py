@@ -1,12 +1,14 @@
 from sqlmodel import Session, select, func, and_, or_
 from typing import List, Optional, Tuple, Dict
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from collections import defaultdict
+import json
 from app.models.exercise_execution import ExerciseExecution
 from app.models.prescription import Prescription
 from app.models.exercise_library import ExerciseLibrary
 from app.models.pain_level import PainLevel
 from app.models.patient import Patient
+from app.services.daily_stats_service import DailyStatsService
 from app.schemas.progress_report import (
     PeriodFilter,
     PainEvolutionItem,
@@ -16,6 +18,53 @@ from app.schemas.progress_report import (
 )
 
 
+def _as_date(value) -> date:
+    """func.date() devolve 'AAAA-MM-DD' no SQLite e date no PostgreSQL."""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    """MAX() sobre datetime volta como texto no SQLite."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class _Day:
+    """Totais de um dia (do resumo diário ou agregados das execuções)."""
+    __slots__ = ("executions", "minutes", "completion_sum", "pain_sum", "pain_count", "pain_avg_sum", "pain_executions")
+
+    def __init__(self) -> None:
+        self.executions = 0
+        self.minutes = 0.0
+        self.completion_sum = 0.0
+        self.pain_sum = 0
+        self.pain_count = 0
+        self.pain_avg_sum = 0.0
+        self.pain_executions = 0
+
+
+class _Exercise:
+    """Totais de um exercício no período."""
+    __slots__ = ("name", "executions", "completion_sum", "days", "last")
+
+    def __init__(self) -> None:
+        self.name: Optional[str] = None
+        self.executions = 0
+        self.completion_sum = 0.0
+        self.days: set = set()
+        self.last: Optional[datetime] = None
+
+    def add(self, day: date, count: int, completion: float, last: Optional[datetime]) -> None:
+        self.executions += count
+        self.completion_sum += completion
+        self.days.add(day)
+        if last is not None and (self.last is None or last > self.last):
+            self.last = last
+
+
 class ProgressReportService:
     """Serviço para gerar relatórios de progresso do paciente"""
 
@@ -45,6 +94,121 @@ class ProgressReportService:
         
         return start, end
 
+    @staticmethod
+    def _daily_facts(
+        session: Session,
+        patient_id: int,
+        period_start: datetime,
+        period_end: datetime,
+    ) -> Tuple[Dict[date, "_Day"], Dict[int, "_Exercise"]]:
+        """Totais por dia e por exercício do período.
+
+        Os dias inteiros do período vêm do resumo `patient_daily_stats` (no máximo uma linha por
+        dia); os dias das pontas, cobertos só em parte, são agregados direto das execuções com
+        GROUP BY. São no máximo 4 consultas, qualquer que seja o tamanho do histórico.
+        """
+        first_full = period_start.date()
+        if period_start != datetime.combine(first_full, datetime.min.time()):
+            first_full += timedelta(days=1)
+        last_full = period_end.date() - timedelta(days=1)
+
+        if first_full <= last_full:
+            raw_window = or_(
+                and_(
+                    ExerciseExecution.execution_date >= period_start,
+                    ExerciseExecution.execution_date < datetime.combine(first_full, datetime.min.time())
+                ),
+                and_(
+                    ExerciseExecution.execution_date >= datetime.combine(period_end.date(), datetime.min.time()),
+                    ExerciseExecution.execution_date <= period_end
+                )
+            )
+        else:
+            raw_window = and_(
+                ExerciseExecution.execution_date >= period_start,
+                ExerciseExecution.execution_date <= period_end
+            )
+        in_window = and_(ExerciseExecution.patient_id == patient_id, raw_window)
+
+        days: Dict[date, _Day] = defaultdict(_Day)
+        exercises: Dict[int, _Exercise] = defaultdict(_Exercise)
+
+        # Dias inteiros: resumo diário
+        for row in DailyStatsService.days(session, patient_id, first_full, last_full):
+            if not row.executions:
+                continue
+            d = days[row.day]
+            d.executions += row.executions
+            d.minutes += row.minutes
+            d.completion_sum += row.completion_sum
+            d.pain_sum += row.pain_sum
+            d.pain_count += row.pain_count
+            d.pain_avg_sum += row.pain_avg_sum
+            d.pain_executions += row.pain_executions
+            for exercise_id, (count, completion, last) in json.loads(row.exercises or "{}").items():
+                e = exercises[int(exercise_id)]
+                e.add(row.day, count, completion, datetime.fromisoformat(last))
+
+        # Pontas do período: agregação das execuções por dia e exercício
+        day = func.date(ExerciseExecution.execution_date)
+        pain_per_execution = (
+            select(
+                PainLevel.execution_id,
+                func.avg(PainLevel.pain_level).label("avg_pain"),
+                func.sum(PainLevel.pain_level).label("sum_pain"),
+                func.count(PainLevel.id).label("n_pain"),
+            )
+            .join(ExerciseExecution, PainLevel.execution_id == ExerciseExecution.id)
+            .where(in_window)
+            .group_by(PainLevel.execution_id)
+            .subquery()
+        )
+        edge_statement = (
+            select(
+                day,
+                ExerciseLibrary.id,
+                ExerciseLibrary.name,
+                func.count(ExerciseExecution.id),
+                func.coalesce(func.sum(ExerciseExecution.duration_minutes), 0.0),
+                func.sum(ExerciseExecution.completion_rate),
+                func.coalesce(func.sum(pain_per_execution.c.sum_pain), 0),
+                func.coalesce(func.sum(pain_per_execution.c.n_pain), 0),
+                func.coalesce(func.sum(pain_per_execution.c.avg_pain), 0.0),
+                func.count(pain_per_execution.c.execution_id),
+                func.max(ExerciseExecution.execution_date),
+            )
+            .outerjoin(Prescription, Prescription.id == ExerciseExecution.prescription_id)
+            .outerjoin(ExerciseLibrary, ExerciseLibrary.id == Prescription.exercise_id)
+            .outerjoin(pain_per_execution, pain_per_execution.c.execution_id == ExerciseExecution.id)
+            .where(in_window)
+            .group_by(day, ExerciseLibrary.id, ExerciseLibrary.name)
+        )
+        for (day_value, exercise_id, name, count, minutes, completion, pain_sum, pain_count,
+             pain_avg_sum, pain_executions, last) in session.exec(edge_statement).all():
+            d = days[_as_date(day_value)]
+            d.executions += count
+            d.minutes += minutes
+            d.completion_sum += completion
+            d.pain_sum += pain_sum
+            d.pain_count += pain_count
+            d.pain_avg_sum += pain_avg_sum
+            d.pain_executions += pain_executions
+            if exercise_id is not None:
+                e = exercises[exercise_id]
+                e.name = name
+                e.add(_as_date(day_value), count, completion, _as_datetime(last))
+
+        # Nomes dos exercícios que só aparecem no resumo diário
+        missing = [exercise_id for exercise_id, e in exercises.items() if e.name is None]
+        if missing:
+            for exercise_id, name in session.exec(
+                select(ExerciseLibrary.id, ExerciseLibrary.name).where(ExerciseLibrary.id.in_(missing))
+            ).all():
+                exercises[exercise_id].name = name
+            for exercise_id in [i for i, e in exercises.items() if e.name is None]:
+                del exercises[exercise_id]  # exercício removido da biblioteca
+        return dict(days), dict(exercises)
+
     @staticmethod
     def generate_progress_report(
         session: Session,
@@ -53,7 +217,11 @@ class ProgressReportService:
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None
     ) -> ProgressReportResponse:
-        """Gera relatório detalhado de progresso do paciente"""
+        """Gera relatório detalhado de progresso do paciente
+
+        Os números vêm do resumo diário `patient_daily_stats` e de agregações GROUP BY nas
+        pontas do período (ver `_daily_facts`); o Python só monta a resposta.
+        """
         try:
             # Verificar se paciente existe
             patient = session.get(Patient, patient_id)
@@ -65,19 +233,10 @@ class ProgressReportService:
                 period_filter, start_date, end_date
             )
             
-            # Buscar todas as execuções do período
-            statement = select(ExerciseExecution).where(
-                and_(
-                    ExerciseExecution.patient_id == patient_id,
-                    ExerciseExecution.execution_date >= period_start,
-                    ExerciseExecution.execution_date <= period_end
-                )
-            ).order_by(ExerciseExecution.execution_date)
-            
-            executions = list(session.exec(statement).all())
-            
+            days, exercises = ProgressReportService._daily_facts(session, patient_id, period_start, period_end)
+
             # Verificar se há dados
-            has_data = len(executions) > 0
+            has_data = len(days) > 0
             
             if not has_data:
                 return ProgressReportResponse(
@@ -95,97 +254,39 @@ class ProgressReportService:
                     message=f"Não há histórico de exercícios para o período selecionado."
                 )
             
-            # Calcular métricas gerais
-            total_activity_time = sum(e.duration_minutes or 0.0 for e in executions)
-            total_completion_rate = sum(e.completion_rate for e in executions)
-            average_completion_rate = total_completion_rate / len(executions) if executions else 0.0
-            
-            # Dias únicos com exercício
-            unique_dates = set(e.execution_date.date() for e in executions)
-            total_days_with_exercise = len(unique_dates)
-            
-            # Buscar níveis de dor e calcular média
-            pain_levels_statement = select(PainLevel).join(
-                ExerciseExecution, PainLevel.execution_id == ExerciseExecution.id
-            ).where(
-                and_(
-                    ExerciseExecution.patient_id == patient_id,
-                    ExerciseExecution.execution_date >= period_start,
-                    ExerciseExecution.execution_date <= period_end
-                )
+            # Calcular métricas gerais (somando os dias)
+            total_executions = sum(d.executions for d in days.values())
+            total_activity_time = float(sum(d.minutes for d in days.values()))
+            average_completion_rate = sum(d.completion_sum for d in days.values()) / total_executions
+            total_days_with_exercise = len(days)
+            total_pain_records = sum(d.pain_count for d in days.values())
+            average_pain_level = (
+                sum(d.pain_sum for d in days.values()) / total_pain_records if total_pain_records else None
             )
-            
-            pain_levels = list(session.exec(pain_levels_statement).all())
-            average_pain_level = None
-            if pain_levels:
-                total_pain = sum(p.pain_level for p in pain_levels)
-                average_pain_level = total_pain / len(pain_levels)
-            
-            # Evolução da dor (agrupar por dia)
-            pain_by_date: Dict[datetime.date, List[float]] = defaultdict(list)
-            executions_by_date: Dict[datetime.date, int] = defaultdict(int)
-            
-            for execution in executions:
-                date_key = execution.execution_date.date()
-                executions_by_date[date_key] += 1
-                
-                # Buscar níveis de dor desta execução
-                exec_pain_statement = select(PainLevel).where(
-                    PainLevel.execution_id == execution.id
+
+            # Evolução da dor: média diária das médias por execução (dias com dor relatada)
+            pain_evolution = [
+                PainEvolutionItem(
+                    date=datetime.combine(day, datetime.min.time()),
+                    pain_level=days[day].pain_avg_sum / days[day].pain_executions,
+                    execution_count=days[day].executions
                 )
-                exec_pain_levels = list(session.exec(exec_pain_statement).all())
-                if exec_pain_levels:
-                    avg_exec_pain = sum(p.pain_level for p in exec_pain_levels) / len(exec_pain_levels)
-                    pain_by_date[date_key].append(avg_exec_pain)
-            
-            # Criar lista de evolução da dor
-            pain_evolution = []
-            for date_key in sorted(pain_by_date.keys()):
-                avg_pain = sum(pain_by_date[date_key]) / len(pain_by_date[date_key])
-                pain_evolution.append(PainEvolutionItem(
-                    date=datetime.combine(date_key, datetime.min.time()),
-                    pain_level=avg_pain,
-                    execution_count=executions_by_date[date_key]
-                ))
+                for day in sorted(days)
+                if days[day].pain_executions
+            ]
             
             # Progresso por exercício
-            exercises_progress_map: Dict[int, Dict] = defaultdict(lambda: {
-                'total_executions': 0,
-                'total_completion_rate': 0.0,
-                'unique_dates': set(),
-                'last_execution_date': None,
-                'exercise_id': None,
-                'exercise_name': None
-            })
-            
-            for execution in executions:
-                prescription = session.get(Prescription, execution.prescription_id)
-                if prescription:
-                    exercise_id = prescription.exercise_id
-                    exercise = session.get(ExerciseLibrary, exercise_id)
-                    
-                    if exercise:
-                        exercises_progress_map[exercise_id]['exercise_id'] = exercise_id
-                        exercises_progress_map[exercise_id]['exercise_name'] = exercise.name
-                        exercises_progress_map[exercise_id]['total_executions'] += 1
-                        exercises_progress_map[exercise_id]['total_completion_rate'] += execution.completion_rate
-                        exercises_progress_map[exercise_id]['unique_dates'].add(execution.execution_date.date())
-                        
-                        if (not exercises_progress_map[exercise_id]['last_execution_date'] or 
-                            execution.execution_date > exercises_progress_map[exercise_id]['last_execution_date']):
-                            exercises_progress_map[exercise_id]['last_execution_date'] = execution.execution_date
-            
-            exercises_progress = []
-            for exercise_id, data in exercises_progress_map.items():
-                avg_completion = data['total_completion_rate'] / data['total_executions'] if data['total_executions'] > 0 else 0.0
-                exercises_progress.append(ExerciseProgress(
-                    exercise_id=data['exercise_id'],
-                    exercise_name=data['exercise_name'],
-                    total_executions=data['total_executions'],
-                    completion_rate_avg=avg_completion,
-                    days_performed=len(data['unique_dates']),
-                    last_execution_date=data['last_execution_date']
-                ))
+            exercises_progress = [
+                ExerciseProgress(
+                    exercise_id=exercise_id,
+                    exercise_name=data.name,
+                    total_executions=data.executions,
+                    completion_rate_avg=data.completion_sum / data.executions,
+                    days_performed=len(data.days),
+                    last_execution_date=data.last
+                )
+                for exercise_id, data in sorted(exercises.items())
+            ]
             
             # Calcular metas alcançadas (simplificado - pode ser expandido)
             goals_achieved = []
@@ -195,7 +296,7 @@ class ProgressReportService:
             weeks_in_period = days_in_period / 7.0
             target_executions_per_week = 3
             target_total = target_executions_per_week * weeks_in_period
-            actual_executions = len(executions)
+            actual_executions = total_executions
             execution_percentage = (actual_executions / target_total * 100) if target_total > 0 else 0.0
             
             actual_executions_per_week = actual_executions / weeks_in_period if weeks_in_period > 0 else 0.0
@@ -215,7 +316,7 @@ class ProgressReportService:
                 generated_at=datetime.utcnow(),
                 total_days_with_exercise=total_days_with_exercise,
                 total_activity_time_minutes=total_activity_time,
-                total_executions=len(executions),
+                total_executions=total_executions,
                 average_completion_rate=average_completion_rate,
                 average_pain_level=average_pain_level,
                 pain_evolution=pain_evolution,
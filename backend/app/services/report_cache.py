@@ -0,0 +1,119 @@
+"""Cache em memória dos relatórios de paciente (TTL + LRU), invalidado nas escritas.
+
+Os fisioterapeutas abrem o mesmo relatório várias vezes ao dia; as rotas de relatório
+guardam a resposta por (paciente, tipo de relatório, período). Períodos relativos
+("últimos 7 dias") entram na chave pelo dia UTC em que foram pedidos, não por `utcnow()`:
+dentro do mesmo dia a resposta é reaproveitada e a janela anda no máximo o TTL.
+
+Toda escrita que muda o relatório de um paciente (execuções, dor, feedbacks, prescrições,
+exclusões) chama `report_cache.invalidate_patient`; mudanças na biblioteca de exercícios
+(nomes aparecem em todos os relatórios) chamam `report_cache.clear`.
+
+O cache é por processo: com vários workers, uma escrita só invalida o worker que a
+recebeu e os demais ficam defasados até o TTL. Configuração:
+    MOVEON_REPORT_CACHE_TTL_SECONDS   (padrão 300; 0 desliga o cache)
+    MOVEON_REPORT_CACHE_MAX_ENTRIES   (padrão 512)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+def period_key(
+    period_filter: Any,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    today: Optional[date] = None,
+) -> Tuple:
+    """Parte da chave que identifica o período pedido.
+
+    Períodos customizados são fixos (as próprias datas); os relativos são resolvidos
+    contra `utcnow()` no serviço, então usam o dia UTC como balde.
+    """
+    value = getattr(period_filter, "value", period_filter)
+    if value == "custom":
+        return (value, start_date, end_date)
+    return (value, today or datetime.utcnow().date())
+
+
+class ReportCache:
+    """Mapa LRU com expiração; entradas de um paciente podem ser descartadas juntas."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # chave -> (expira_em, valor); a ordem é a de uso (mais recente no fim)
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        # incrementado a cada invalidação: um relatório montado durante uma escrita
+        # do mesmo paciente não é guardado
+        self._generation: Dict[int, int] = defaultdict(int)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_create(self, patient_id: int, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Devolve o valor guardado para (paciente, chave) ou chama `build` e guarda o resultado.
+
+        Exceções de `build` não são guardadas. O lock não é mantido durante `build`:
+        dois pedidos simultâneos podem montar o mesmo relatório, o último vence.
+        """
+        if not self.enabled:
+            return build()
+        full_key = (patient_id, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[full_key]
+            self.misses += 1
+            generation = self._generation[patient_id]
+
+        value = build()
+
+        with self._lock:
+            if self._generation[patient_id] == generation:
+                self._entries[full_key] = (self._clock() + self.ttl_seconds, value)
+                self._entries.move_to_end(full_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate_patient(self, patient_id: Optional[int]) -> None:
+        """Descarta os relatórios do paciente (chamar depois do commit da escrita)."""
+        if patient_id is None:
+            return
+        with self._lock:
+            self._generation[patient_id] += 1
+            for full_key in [k for k in self._entries if k[0] == patient_id]:
+                del self._entries[full_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            for patient_id in self._generation:
+                self._generation[patient_id] += 1
+            self._entries.clear()
+
+
+report_cache = ReportCache(
+    max_entries=int(os.getenv("MOVEON_REPORT_CACHE_MAX_ENTRIES", "512")),
+    ttl_seconds=float(os.getenv("MOVEON_REPORT_CACHE_TTL_SECONDS", "300")),
+)
@@ -1,5 +1,6 @@
 from sqlmodel import Session, select, func
-from typing import List, Tuple
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from app.models.patient import Patient
 from app.models.exercise_execution import ExerciseExecution
@@ -43,6 +44,22 @@ class ReportService:
         
         return start, end
 
+    @staticmethod
+    def _pain_levels_by_execution(session: Session, execution_ids) -> Dict[int, List[PainLevel]]:
+        """Níveis de dor (mais recentes primeiro) de várias execuções em uma consulta.
+
+        `execution_ids` pode ser uma lista de ids ou um SELECT de ids.
+        """
+        by_execution: Dict[int, List[PainLevel]] = defaultdict(list)
+        statement = (
+            select(PainLevel)
+            .where(PainLevel.execution_id.in_(execution_ids))
+            .order_by(PainLevel.reported_at.desc())
+        )
+        for p in session.exec(statement).all():
+            by_execution[p.execution_id].append(p)
+        return by_execution
+
     @staticmethod
     def generate_report(session: Session, request: ReportRequest) -> ReportResponse:
         """Gera relatório detalhado do paciente"""
@@ -54,51 +71,61 @@ class ReportService:
         # Calcular período
         period_start, period_end = ReportService._calculate_period(request)
         
-        # Buscar execuções no período
+        # Buscar execuções no período, já com prescrição e exercício (uma única consulta)
+        from app.models.exercise_library import ExerciseLibrary
+        from app.schemas.report import ExerciseLibraryBasic, PainLevelDetail, FeedbackDetail
+
+        in_period = (
+            ExerciseExecution.patient_id == request.patient_id,
+            ExerciseExecution.execution_date >= period_start,
+            ExerciseExecution.execution_date <= period_end,
+        )
         statement = (
-            select(ExerciseExecution)
-            .where(ExerciseExecution.patient_id == request.patient_id)
-            .where(ExerciseExecution.execution_date >= period_start)
-            .where(ExerciseExecution.execution_date <= period_end)
+            select(ExerciseExecution, ExerciseLibrary)
+            .outerjoin(Prescription, Prescription.id == ExerciseExecution.prescription_id)
+            .outerjoin(ExerciseLibrary, ExerciseLibrary.id == Prescription.exercise_id)
+            .where(*in_period)
             .order_by(ExerciseExecution.execution_date.desc())
         )
-        
-        executions = list(session.exec(statement).all())
-        
-        # Buscar prescrições ativas do paciente
+        rows = list(session.exec(statement).all())
+        executions = [execution for execution, _ in rows]
+
+        # Buscar prescrições ativas do paciente (com o exercício)
         prescriptions_statement = (
-            select(Prescription)
+            select(Prescription, ExerciseLibrary)
+            .outerjoin(ExerciseLibrary, ExerciseLibrary.id == Prescription.exercise_id)
             .where(Prescription.patient_id == request.patient_id)
             .where(Prescription.is_active == True)
         )
-        prescriptions = list(session.exec(prescriptions_statement).all())
-        
-        # Preparar detalhes das execuções
-        from app.models.exercise_library import ExerciseLibrary
-        from app.schemas.report import ExerciseLibraryBasic
+        prescription_rows = list(session.exec(prescriptions_statement).all())
+        prescriptions = [prescription for prescription, _ in prescription_rows]
 
+        # Níveis de dor e feedbacks de todas as execuções do período, agrupados em memória
+        # (IN com subconsulta: número fixo de consultas e sem limite de parâmetros do SQLite)
+        period_executions = select(ExerciseExecution.id).where(*in_period)
+        pain_by_execution: Dict[int, List[PainLevel]] = {}
+        feedbacks_by_execution: Dict[int, List[Feedback]] = defaultdict(list)
+        if executions:
+            pain_by_execution = ReportService._pain_levels_by_execution(session, period_executions)
+            feedbacks_statement = (
+                select(Feedback)
+                .where(Feedback.execution_id.in_(period_executions))
+                .order_by(Feedback.created_at.desc())
+            )
+            for f in session.exec(feedbacks_statement).all():
+                feedbacks_by_execution[f.execution_id].append(f)
+
+        # Preparar detalhes das execuções
         execution_details = []
-        for execution in executions:
-            # Buscar exercício relacionado
-            prescription = session.get(Prescription, execution.prescription_id)
+        for execution, exercise_lib in rows:
             exercise = None
-            if prescription:
-                exercise_lib = session.get(ExerciseLibrary, prescription.exercise_id)
-                if exercise_lib:
-                    exercise = ExerciseLibraryBasic(
-                        id=exercise_lib.id,
-                        name=exercise_lib.name,
-                        category=exercise_lib.category,
-                    )
+            if exercise_lib:
+                exercise = ExerciseLibraryBasic(
+                    id=exercise_lib.id,
+                    name=exercise_lib.name,
+                    category=exercise_lib.category,
+                )
 
-            # Buscar níveis de dor
-            from app.schemas.report import PainLevelDetail, FeedbackDetail
-            pain_levels_statement = (
-                select(PainLevel)
-                .where(PainLevel.execution_id == execution.id)
-                .order_by(PainLevel.reported_at.desc())
-            )
-            pain_levels_data = list(session.exec(pain_levels_statement).all())
             pain_levels = [
                 PainLevelDetail(
                     id=p.id,
@@ -107,16 +134,9 @@ class ReportService:
                     notes=p.notes,
                     reported_at=p.reported_at,
                 )
-                for p in pain_levels_data
+                for p in pain_by_execution.get(execution.id, [])
             ]
 
-            # Buscar feedbacks
-            feedbacks_statement = (
-                select(Feedback)
-                .where(Feedback.execution_id == execution.id)
-                .order_by(Feedback.created_at.desc())
-            )
-            feedbacks_data = list(session.exec(feedbacks_statement).all())
             feedbacks = [
                 FeedbackDetail(
                     id=f.id,
@@ -125,10 +145,9 @@ class ReportService:
                     is_positive=f.is_positive,
                     created_at=f.created_at,
                 )
-                for f in feedbacks_data
+                for f in feedbacks_by_execution.get(execution.id, [])
             ]
 
-
             execution_detail = ExerciseExecutionDetail(
                 id=execution.id,
                 execution_date=execution.execution_date,
@@ -146,8 +165,7 @@ class ReportService:
         # Listar exercícios prescritos (ativos)
         prescribed_exercises = []
         seen_exercise_ids = set()
-        for prescription in prescriptions:
-            exercise_lib = session.get(ExerciseLibrary, prescription.exercise_id)
+        for _, exercise_lib in prescription_rows:
             if exercise_lib and exercise_lib.id not in seen_exercise_ids:
                 prescribed_exercises.append(
                     ExerciseLibraryBasic(
@@ -160,7 +178,7 @@ class ReportService:
 
         # Calcular indicadores de progresso
         progress = ReportService._calculate_progress(
-            session, executions, prescriptions, period_start, period_end
+            session, executions, prescriptions, period_start, period_end, pain_by_execution
         )
 
         has_data = len(executions) > 0
@@ -184,8 +202,16 @@ class ReportService:
         prescriptions: List[Prescription],
         period_start: datetime,
         period_end: datetime,
+        pain_by_execution: Optional[Dict[int, List[PainLevel]]] = None,
     ) -> ProgressIndicator:
-        """Calcula indicadores de progresso"""
+        """Calcula indicadores de progresso
+
+        Calculado sobre as execuções já carregadas para a listagem, não sobre
+        `patient_daily_stats`: não há consulta a economizar e `was_completed` não está no resumo.
+
+        `pain_by_execution` (execução -> níveis de dor) evita consultar a dor de novo quando
+        o relatório já a carregou.
+        """
         total_executions = len(executions)
         
         if total_executions == 0:
@@ -203,11 +229,15 @@ class ReportService:
         completion_rate_avg = sum(completion_rates) / len(completion_rates) if completion_rates else 0.0
         
         # Nível médio de dor
-        pain_levels = []
-        for execution in executions:
-            pain_statement = select(PainLevel).where(PainLevel.execution_id == execution.id)
-            pain_records = list(session.exec(pain_statement).all())
-            pain_levels.extend([p.pain_level for p in pain_records])
+        if pain_by_execution is None:
+            pain_by_execution = ReportService._pain_levels_by_execution(
+                session, [e.id for e in executions]
+            )
+        pain_levels = [
+            p.pain_level
+            for execution in executions
+            for p in pain_by_execution.get(execution.id, [])
+        ]
         
         pain_level_avg = sum(pain_levels) / len(pain_levels) if pain_levels else None
         
@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from app.core import uploads
+from app.core.config import settings
+from app.models.upload_session import UploadSession
+
+
+OPEN = "open"
+FINALIZED = "finalized"
+EXPIRED = "expired"
+
+
+class UploadOffsetConflict(ValueError):
+    """O offset enviado não bate com os bytes já recebidos."""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Offset inválido; o servidor tem {expected} bytes")
+        self.expected = expected
+
+
+class UploadIncomplete(ValueError):
+    """Finalize chamado antes de receber todos os bytes."""
+
+
+# Um PATCH por vez em cada upload (no mesmo processo)
+_locks: Dict[str, asyncio.Lock] = {}
+# SHA-256 parcial de cada upload: (bytes já somados, hash). O estado do hashlib não pode ser
+# gravado, então vale só no processo que recebeu os blocos; sem ele o finalize relê o arquivo.
+_hashers: Dict[str, Tuple[int, Any]] = {}
+
+
+class UploadSessionService:
+    """Uploads retomáveis: cria a sessão, recebe blocos por offset e finaliza no diretório de uploads"""
+
+    @staticmethod
+    def partial_dir() -> Path:
+        return uploads.UPLOAD_ROOT / "partial"
+
+    @staticmethod
+    def partial_path(upload_id: str) -> Path:
+        return UploadSessionService.partial_dir() / f"{upload_id}.part"
+
+    @staticmethod
+    def _expiry(now: datetime) -> datetime:
+        return now + timedelta(hours=settings.UPLOAD_SESSION_EXPIRE_HOURS)
+
+    @staticmethod
+    def lock(upload_id: str) -> asyncio.Lock:
+        return _locks.setdefault(upload_id, asyncio.Lock())
+
+    @staticmethod
+    def _discard(upload: UploadSession, status: str) -> None:
+        UploadSessionService.partial_path(upload.id).unlink(missing_ok=True)
+        _locks.pop(upload.id, None)
+        _hashers.pop(upload.id, None)
+        upload.status = status
+        upload.updated_at = datetime.utcnow()
+
+    @staticmethod
+    def create_session(
+        session: Session,
+        patient_id: str,
+        exercise_id: str,
+        length: int,
+        original_filename: Optional[str] = None,
+        sha256: Optional[str] = None,
+    ) -> UploadSession:
+        """Cria um upload retomável com um arquivo parcial vazio"""
+        max_bytes = uploads.max_upload_bytes()
+        if max_bytes and length > max_bytes:
+            raise uploads.UploadTooLarge(max_bytes)
+        UploadSessionService.expire_stale(session)
+
+        now = datetime.utcnow()
+        upload = UploadSession(
+            id=uuid.uuid4().hex,
+            patient_id=str(patient_id),
+            exercise_id=str(exercise_id),
+            original_filename=original_filename,
+            length=length,
+            sha256=sha256.lower() if sha256 else None,
+            created_at=now,
+            updated_at=now,
+            expires_at=UploadSessionService._expiry(now),
+        )
+        UploadSessionService.partial_dir().mkdir(parents=True, exist_ok=True)
+        UploadSessionService.partial_path(upload.id).touch()
+        session.add(upload)
+        session.commit()
+        session.refresh(upload)
+        return upload
+
+    @staticmethod
+    def get_session(session: Session, upload_id: str) -> Optional[UploadSession]:
+        """Obtém o upload (marcando como expirado se passou da validade)"""
+        upload = session.get(UploadSession, upload_id)
+        if upload is not None and upload.status == OPEN and upload.expires_at < datetime.utcnow():
+            UploadSessionService._discard(upload, EXPIRED)
+            session.add(upload)
+            session.commit()
+            session.refresh(upload)
+        return upload
+
+    @staticmethod
+    async def append(session: Session, upload: UploadSession, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """Grava os blocos a partir de `offset` e retorna o novo offset.
+
+        Se a conexão cair no meio, os bytes já gravados contam: o cliente consulta o offset e
+        continua dali. O SHA-256 é somado junto com a gravação (ver `_hashers`).
+        """
+        path = UploadSessionService.partial_path(upload.id)
+        current = path.stat().st_size if path.exists() else 0
+        if offset != current:
+            raise UploadOffsetConflict(current)
+
+        hashed, digest = _hashers.get(upload.id, (0, None))
+        if digest is None or hashed != current:
+            # outro processo recebeu o começo do arquivo: o finalize relê tudo
+            digest = hashlib.sha256() if current == 0 else None
+        written = current
+        try:
+            with path.open("r+b" if path.exists() else "wb") as out:
+                out.seek(offset)
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if written + len(chunk) > upload.length:
+                        raise ValueError("Os dados excedem o tamanho declarado do upload")
+                    out.write(chunk)
+                    written += len(chunk)
+                    if digest is not None:
+                        digest.update(chunk)
+        finally:
+            if digest is not None:
+                _hashers[upload.id] = (written, digest)
+            else:
+                _hashers.pop(upload.id, None)
+            now = datetime.utcnow()
+            upload.offset = written
+            upload.updated_at = now
+            upload.expires_at = UploadSessionService._expiry(now)
+            session.add(upload)
+            session.commit()
+            session.refresh(upload)
+        return written
+
+    @staticmethod
+    def finalize(
+        session: Session,
+        upload: UploadSession,
+        store: Callable[[Path, str, int], Path],
+    ) -> uploads.StoredUpload:
+        """Confere tamanho/hash e entrega o arquivo parcial a `store(path, sha256, size)`.
+
+        `store` move o arquivo para o destino final e retorna o caminho. Bloqueante (pode reler
+        o arquivo inteiro): rotas async chamam em uma thread.
+        """
+        path = UploadSessionService.partial_path(upload.id)
+        size = path.stat().st_size if path.exists() else 0
+        if size != upload.length:
+            raise UploadIncomplete(f"Upload incompleto: {size} de {upload.length} bytes recebidos")
+
+        hashed, running = _hashers.pop(upload.id, (0, None))
+        digest = running.hexdigest() if running is not None and hashed == size else uploads.sha256_file(path)
+        if upload.sha256 and digest != upload.sha256:
+            UploadSessionService._discard(upload, EXPIRED)
+            session.add(upload)
+            session.commit()
+            raise ValueError("SHA-256 do arquivo não confere com o informado na criação do upload")
+
+        dest = store(path, digest, size)
+        _locks.pop(upload.id, None)
+        upload.status = FINALIZED
+        upload.offset = size
+        upload.video_filename = dest.name
+        upload.updated_at = datetime.utcnow()
+        session.add(upload)
+        session.commit()
+        session.refresh(upload)
+        return uploads.StoredUpload(dest, size, digest)
+
+    @staticmethod
+    def expire_stale(session: Session, now: Optional[datetime] = None) -> int:
+        """Descarta os uploads abertos que passaram da validade (arquivo parcial incluso)"""
+        now = now or datetime.utcnow()
+        stale = list(
+            session.exec(
+                select(UploadSession)
+                .where(UploadSession.status == OPEN)
+                .where(UploadSession.expires_at < now)
+            ).all()
+        )
+        for upload in stale:
+            UploadSessionService._discard(upload, EXPIRED)
+            session.add(upload)
+        if stale:
+            session.commit()
+        return len(stale)
@@ -0,0 +1,46 @@
+"""Benchmark de throughput (frames/s) da inferência YOLO em lote.
+
+Uso (dentro de backend/):
+    python -m scripts.bench_batch_inference caminho/do/video.mp4 --batch-sizes 1 4 8 16
+
+Para cada tamanho de lote roda `YOLOPoseWrapper.detect_joint_angles` no mesmo vídeo e
+imprime frames/s. Use MOVEON_YOLO_DEVICE=cpu para medir o cenário dos nós sem GPU.
+"""
+import argparse
+import time
+
+import cv2
+
+from app.analysis.processor import YOLOPoseWrapper
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", help="vídeo usado no benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--model", default=None, help="modelo YOLO (padrão: yolov8n-pose)")
+    parser.add_argument("--warmup", action="store_true", help="roda uma vez antes de medir")
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    proc = YOLOPoseWrapper(model=args.model)
+    if args.warmup:
+        proc.detect_joint_angles(args.video, batch_size=1)
+
+    print(f"video={args.video} frames={frame_count} model={proc.model_name}")
+    print(f"{'batch':>6} {'seconds':>9} {'frames/s':>9} {'speedup':>8}")
+    baseline = None
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        proc.detect_joint_angles(args.video, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        fps = frame_count / elapsed if elapsed > 0 else 0.0
+        baseline = baseline or fps
+        print(f"{batch_size:>6} {elapsed:>9.2f} {fps:>9.1f} {fps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
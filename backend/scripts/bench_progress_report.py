@@ -0,0 +1,118 @@
+"""Benchmark do relatório de progresso com um paciente sintético de muitas execuções.
+
+Uso (dentro de backend/):
+    python -m scripts.bench_progress_report --executions 10000 --repeat 5
+
+Cria um banco SQLite temporário (ou usa o banco vazio de --database-url) com um paciente,
+3 exercícios, `--executions` execuções espalhadas em 90 dias e 0-2 registros de dor por
+execução (mais o resumo `patient_daily_stats`); depois mede `ProgressReportService.generate_progress_report` (últimos 3 meses) e
+conta as consultas SQL de cada chamada.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import event, insert
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core import database  # noqa: F401  (registra todos os modelos no metadata)
+from app.models.exercise_execution import ExerciseExecution
+from app.models.exercise_library import ExerciseLibrary
+from app.models.pain_level import PainLevel
+from app.models.patient import Patient
+from app.models.physiotherapist import Physiotherapist
+from app.models.prescription import Prescription
+from app.schemas.progress_report import PeriodFilter
+from app.services.daily_stats_service import DailyStatsService
+from app.services.progress_report_service import ProgressReportService
+
+
+def seed(engine, executions: int, seed_value: int = 42) -> int:
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        physio = Physiotherapist(name="Fisio Bench", cpf="90000000000", email="bench@fisio", license_number="BENCH")
+        patient = Patient(name="Paciente Bench", cpf="90000000001", email="bench@paciente")
+        exercises = [ExerciseLibrary(name=name) for name in ("Agachamento", "Ponte", "Prancha")]
+        session.add_all([physio, patient, *exercises])
+        session.commit()
+        prescriptions = [
+            Prescription(patient_id=patient.id, physiotherapist_id=physio.id, exercise_id=ex.id) for ex in exercises
+        ]
+        session.add_all(prescriptions)
+        session.commit()
+        prescription_ids = [p.id for p in prescriptions]
+        patient_id = patient.id
+
+        session.exec(insert(ExerciseExecution), params=[
+            {
+                "prescription_id": rng.choice(prescription_ids),
+                "patient_id": patient_id,
+                "execution_date": now - timedelta(minutes=rng.randrange(89 * 24 * 60)),
+                "duration_minutes": float(rng.randint(5, 30)),
+                "completion_rate": float(rng.randint(30, 100)),
+                "was_completed": rng.random() < 0.7,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for _ in range(executions)
+        ])
+        session.commit()
+        execution_ids = session.exec(select(ExerciseExecution.id)).all()
+        session.exec(insert(PainLevel), params=[
+            {"execution_id": execution_id, "pain_level": rng.randint(0, 10), "reported_at": now}
+            for execution_id in execution_ids
+            for _ in range(rng.randint(0, 2))
+        ])
+        session.commit()
+        DailyStatsService.rebuild(session, patient_id)
+        session.commit()
+    return patient_id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--executions", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="banco vazio (padrão: SQLite temporário)")
+    args = parser.parse_args()
+
+    url = args.database_url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench_progress.db'}"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+
+    t0 = time.perf_counter()
+    patient_id = seed(engine, args.executions)
+    print(f"seed: {args.executions} execuções em {time.perf_counter() - t0:.1f}s ({url})")
+
+    queries = 0
+
+    def _count(*_args) -> None:
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, "before_cursor_execute", _count)
+    timings = []
+    for _ in range(args.repeat):
+        queries = 0
+        with Session(engine) as session:
+            start = time.perf_counter()
+            report = ProgressReportService.generate_progress_report(session, patient_id, PeriodFilter.LAST_3_MONTHS)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    print(
+        f"execuções={report.total_executions} dias={report.total_days_with_exercise} "
+        f"pontos_de_dor={len(report.pain_evolution)} exercícios={len(report.exercises_progress)}"
+    )
+    print(
+        f"consultas/relatório={queries}  mediana={statistics.median(timings):.1f}ms  "
+        f"min={min(timings):.1f}ms  max={max(timings):.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
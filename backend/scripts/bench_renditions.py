@@ -0,0 +1,92 @@
+"""Benchmark de ponta a ponta da entrada da análise: converter no job vs ler o original.
+
+Uso (dentro de backend/):
+    python -m scripts.bench_renditions caminho/do/video.mp4 --fps 10 [--inference]
+
+Mede o tempo que o job gasta até ter os frames amostrados (na taxa `--fps`, com o mesmo
+read/grab do processor) em três cenários:
+
+- converter no job: gera a rendition de análise e depois lê a rendition amostrada
+  (o que o job fazia antes; a conversão decodifica todos os frames);
+- original: lê o original amostrado (upload recente, rendition ainda não pronta);
+- rendition pronta: lê a rendition amostrada (reanálises, reenvios).
+
+Imprime também o estágio pós-upload (as duas renditions numa passada), que roda fora do
+caminho da análise. Com `--inference` roda `YOLOPoseWrapper.detect_joint_samples` em vez só
+da leitura, para incluir a inferência. MOVEON_ANALYSIS_MAX_SIDE controla a resolução.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+
+from app.analysis import renditions
+from app.core import uploads
+
+
+def _read_sampled(path: str, fps: float) -> None:
+    """Lê os frames amostrados como o processor (read nos amostrados, grab nos pulados)."""
+    cap = cv2.VideoCapture(path)
+    stride = max(1, int(round((cap.get(cv2.CAP_PROP_FPS) or 30.0) / fps)))
+    frame_idx = 0
+    while cap.read()[0] if frame_idx % stride == 0 else cap.grab():
+        frame_idx += 1
+    cap.release()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video", help="vídeo usado no benchmark")
+    parser.add_argument("--fps", type=float, default=10.0, help="taxa de análise (MOVEON_ANALYSIS_FPS)")
+    parser.add_argument("--inference", action="store_true", help="inclui a inferência YOLO")
+    parser.add_argument("--model", default=None, help="modelo YOLO (padrão: yolov8n-pose)")
+    args = parser.parse_args()
+
+    if args.inference:
+        from app.analysis.processor import YOLOPoseWrapper
+
+        proc = YOLOPoseWrapper(model=args.model)
+
+        def analyse(path: str) -> None:
+            proc.detect_joint_samples(path, sample_rate=args.fps)
+
+        analyse(args.video)  # aquecimento: carrega o modelo fora da medição
+    else:
+        def analyse(path: str) -> None:
+            _read_sampled(path, args.fps)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads.UPLOAD_ROOT = Path(tmp)
+
+        start = time.perf_counter()
+        result = renditions.make_renditions(args.video, "inline.mp4", playback=False)
+        analyse(str(result.analysis))
+        inline_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyse(args.video)
+        original_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        analyse(str(result.analysis))
+        ready_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stage = renditions.make_renditions(args.video, "stage.mp4")
+        stage_s = time.perf_counter() - start
+
+    print(f"{result.frames} frames, análise a {args.fps:g} fps")
+    print(f"{'cenário':>20} {'job (s)':>9}")
+    for label, seconds in (
+        ("converter no job", inline_s),
+        ("original", original_s),
+        ("rendition pronta", ready_s),
+    ):
+        print(f"{label:>20} {seconds:>9.2f}  ({inline_s / seconds if seconds else 0:.1f}x)")
+    print(f"estágio pós-upload (análise + playback, fora do job): {stage_s:.2f}s, {stage.frames} frames")
+
+
+if __name__ == "__main__":
+    main()
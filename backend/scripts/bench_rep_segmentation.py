@@ -0,0 +1,54 @@
+"""Benchmark da segmentação de repetições: máquina de estados vs versão vetorizada.
+
+Uso (dentro de backend/):
+    python -m scripts.bench_rep_segmentation --samples 1000000
+
+Gera uma série sintética de ângulos (agachamentos com ruído) e compara
+`rules.segment_reps` / `rules.count_reps` com `segment_reps_array` / `count_reps_array`.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.analysis import rules
+
+
+def _synthetic_series(n: int, fps: float = 30.0, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    phase = np.cumsum(rng.uniform(0.02, 0.2, size=n))
+    angles = 117.0 + 60.0 * np.cos(phase) + rng.normal(scale=5.0, size=n)
+    timestamps = np.arange(n) / fps
+    return timestamps, angles
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--down", type=float, default=90.0)
+    parser.add_argument("--up", type=float, default=160.0)
+    args = parser.parse_args()
+
+    timestamps, angles = _synthetic_series(args.samples)
+    seq = list(zip(timestamps.tolist(), angles.tolist()))
+
+    segs, t_list = _timed(rules.segment_reps, seq, args.down, args.up)
+    segs_arr, t_arr = _timed(rules.segment_reps_array, timestamps, angles, args.down, args.up)
+    reps, t_count = _timed(rules.count_reps, seq, args.down, args.up)
+    reps_arr, t_count_arr = _timed(rules.count_reps_array, timestamps, angles, args.down, args.up)
+
+    assert segs == segs_arr and reps == reps_arr == len(segs)
+    print(f"samples={args.samples} reps={reps}")
+    print(f"{'função':<22} {'lista (s)':>10} {'array (s)':>10} {'speedup':>8}")
+    print(f"{'segment_reps':<22} {t_list:>10.3f} {t_arr:>10.3f} {t_list / t_arr:>7.1f}x")
+    print(f"{'count_reps':<22} {t_count:>10.3f} {t_count_arr:>10.3f} {t_count / t_count_arr:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
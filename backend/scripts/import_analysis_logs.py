@@ -0,0 +1,24 @@
+"""Importa o analysis_logs.jsonl existente para a tabela `video_feedbacks`.
+
+Uso (dentro de backend/):
+    python -m scripts.import_analysis_logs [caminho/do/analysis_logs.jsonl]
+
+Rodar uma vez ao atualizar: os endpoints de feedback de vídeo passam a ler só da tabela.
+Pode ser repetido sem duplicar vídeos (o último estado de cada vídeo prevalece).
+"""
+import argparse
+
+from app.analysis import storage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default=None, help="arquivo JSONL (padrão: app/uploads/analysis_logs.jsonl)")
+    args = parser.parse_args()
+
+    imported = storage.import_jsonl(args.path)
+    print(f"{imported} linhas importadas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Reaplica as regras de repetição a todos os vídeos já analisados, sem rodar o YOLO.
+
+Uso (dentro de backend/):
+    python -m scripts.rescore_analyses --down 95 --up 155
+    python -m scripts.rescore_analyses --joint elbow --workers 8 --patient 12
+
+Lê os keypoints salvos em uploads/keypoints/ (gravados a cada análise), roda
+`rules.segment_reps` com os novos critérios em um pool de processos e grava cada feedback no
+store (`video_feedbacks` + analysis_logs.jsonl) assim que fica pronto. Vídeos analisados
+antes de os keypoints serem salvos são ignorados. Com --dry-run só imprime as contagens.
+"""
+import argparse
+import os
+import sys
+
+from app.analysis import engine, reanalysis
+from app.analysis.rules import JOINT_KEYPOINTS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--joint", default=engine.JOINT, choices=sorted(JOINT_KEYPOINTS))
+    parser.add_argument("--down", type=float, default=engine.DOWN_THRESHOLD, help="limiar de descida (graus)")
+    parser.add_argument("--up", type=float, default=engine.UP_THRESHOLD, help="limiar de subida (graus)")
+    parser.add_argument("--min-reps", type=int, default=2)
+    parser.add_argument("--no-smooth", action="store_true", help="não aplica o filtro One-Euro")
+    parser.add_argument("--patient", default=None, help="só os vídeos deste paciente")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processos (padrão: núcleos)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="vídeos por tarefa do pool")
+    parser.add_argument("--dry-run", action="store_true", help="não grava no store de feedback")
+    args = parser.parse_args()
+
+    items = reanalysis.targets(args.patient)
+    print(
+        f"videos={len(items)} joint={args.joint} down={args.down} up={args.up} "
+        f"min_reps={args.min_reps} workers={args.workers}"
+    )
+    if not items:
+        return
+
+    report_every = max(1, len(items) // 20)
+
+    def _on_result(target, feedback, stats) -> None:
+        if feedback is not None and args.dry_run:
+            print(f"{target.patient_id}/{target.video_filename}: {feedback['Repetitions']} reps ({feedback['Status_Execucao']})")
+        done = stats.videos + stats.failed
+        if done % report_every == 0 or done == len(items):
+            print(
+                f"  {done}/{len(items)} videos  {stats.videos_per_s:.1f} videos/s  {stats.frames_per_s:.0f} frames/s",
+                file=sys.stderr,
+            )
+
+    stats = reanalysis.run(
+        items,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        save=(lambda feedback: None) if args.dry_run else None,
+        on_result=_on_result,
+        joint=args.joint,
+        down_threshold=args.down,
+        up_threshold=args.up,
+        min_reps=args.min_reps,
+        smooth=not args.no_smooth,
+    )
+    for error in stats.errors:
+        print(f"erro: {error}", file=sys.stderr)
+    print(
+        f"{stats.videos} vídeos reprocessados ({stats.failed} erros) em {stats.elapsed_s:.2f}s: "
+        f"{stats.videos_per_s:.1f} videos/s, {stats.frames_per_s:.0f} frames/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
+import os
 import sys
+import tempfile
 from pathlib import Path
 
 # Add the repository `backend` folder to sys.path so tests can import `app`
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
+
+# Banco SQLite descartável para a sessão de testes (não altera o moveon_v*.db do repositório)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.mkdtemp()) / 'moveon_test.db'}")
@@ -20,6 +20,30 @@ def test_compute_angle_simple_right_triangle():
     assert pytest.approx(angle, rel=1e-2) == 90.0
 
 
+def test_compute_angles_matches_scalar_reference():
+    import numpy as np
+
+    rng = np.random.default_rng(1234)
+    # coordenadas inteiras pequenas geram pontos coincidentes (vetores de comprimento zero)
+    kps = rng.integers(-3, 4, size=(500, 17, 2)).astype(np.float64)
+    kps[:50] += rng.normal(scale=100.0, size=(50, 17, 2))
+    kps[0, 13] = kps[0, 11]  # quadril == joelho
+
+    for joint, ((la, lb, lc), (ra, rb, rc)) in rules.JOINT_KEYPOINTS.items():
+        left, right, mean = rules.compute_angles(kps, joint)
+        assert left.shape == right.shape == mean.shape == (500,)
+        for t in range(len(kps)):
+            exp_left = rules.compute_angle(tuple(kps[t, la]), tuple(kps[t, lb]), tuple(kps[t, lc]))
+            exp_right = rules.compute_angle(tuple(kps[t, ra]), tuple(kps[t, rb]), tuple(kps[t, rc]))
+            assert left[t] == pytest.approx(exp_left, abs=1e-9)
+            assert right[t] == pytest.approx(exp_right, abs=1e-9)
+            assert mean[t] == pytest.approx((exp_left + exp_right) / 2, abs=1e-9)
+
+    assert rules.compute_angles(kps, "knee")[0][0] == 0.0
+    single = rules.compute_angles(kps[1], "knee")
+    assert single[2].shape == ()
+
+
 def test_count_reps_detects_two_reps():
     # Build a synthetic angle sequence that goes: high->low->high->low->high
     seq = [
@@ -35,6 +59,28 @@ def test_count_reps_detects_two_reps():
     assert reps == 2
 
 
+def test_segment_reps_array_matches_state_machine():
+    import numpy as np
+
+    rng = np.random.default_rng(7)
+    total_reps = 0
+    for _ in range(20):
+        phase = np.cumsum(rng.uniform(0.02, 0.3, size=400))
+        angles = (117.0 + 60.0 * np.cos(phase) + rng.normal(scale=8.0, size=400)).round(1)
+        ts = np.arange(angles.size) / 30.0
+        seq = list(zip(ts.tolist(), angles.tolist()))
+        for down, up in ((90.0, 160.0), (100.0, 150.0), (60.0, 175.0)):
+            expected = rules.segment_reps(seq, down_threshold=down, up_threshold=up)
+            assert rules.segment_reps_array(ts, angles, down, up) == expected
+            assert rules.count_reps_array(ts, angles, down, up) == rules.count_reps(seq, down, up) == len(expected)
+            total_reps += len(expected)
+
+    assert total_reps > 100
+
+    assert rules.segment_reps_array(np.array([]), np.array([])) == []
+    assert rules.count_reps_array([0.0, 1.0], [170.0, 175.0]) == 0
+
+
 def test_analyze_video_integration_success_and_failure():
     seq_success = [
         (0.0, 170.0),
@@ -66,3 +112,494 @@ def test_analyze_video_integration_success_and_failure():
     assert "Repetições insuficientes" in feedback2["Observacoes_Tecnicas"][0]
     # rep details may be empty or small
     assert "Rep_Details" in feedback2
+
+
+class _FakeKeypoints:
+    def __init__(self, xy):
+        self.xy = self
+        self._xy = xy
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._xy
+
+
+class _FakeResult:
+    def __init__(self, xy):
+        self.keypoints = _FakeKeypoints(xy)
+
+
+class FakeYOLOModel:
+    """Modelo falso: joelho em 90° para todos os frames, registra o tamanho de cada lote."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, source, **kwargs):
+        import numpy as np
+
+        frames = source if isinstance(source, list) else [source]
+        self.calls.append(len(frames))
+        kp = np.zeros((1, 17, 2), dtype=np.float32)
+        kp[0, 11] = kp[0, 12] = (0.0, 0.0)  # quadris
+        kp[0, 13] = kp[0, 14] = (0.0, 1.0)  # joelhos
+        kp[0, 15] = kp[0, 16] = (1.0, 1.0)  # tornozelos
+        return [_FakeResult(kp) for _ in frames]
+
+
+def _write_synthetic_video(path, n_frames=10, fps=10.0):
+    cv2 = pytest.importorskip("cv2")
+    import numpy as np
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48))
+    for i in range(n_frames):
+        writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def test_detect_joint_angles_batched_matches_single_frame(tmp_path):
+    from app.analysis.processor import YOLOPoseWrapper
+
+    video = _write_synthetic_video(tmp_path / "clip.avi", n_frames=10, fps=10.0)
+
+    outputs = {}
+    for batch_size in (1, 4):
+        proc = YOLOPoseWrapper.__new__(YOLOPoseWrapper)
+        proc.model_name = "fake"
+        proc.batch_size = batch_size
+        proc._model = FakeYOLOModel()
+        progress = []
+        outputs[batch_size] = proc.detect_joint_angles(
+            video, progress_cb=lambda pct, done, total: progress.append((pct, done, total))
+        )
+        assert progress and progress[-1][1] == 10
+
+    assert outputs[1] == outputs[4]
+    assert [t for t, _ in outputs[4]] == pytest.approx([i / 10.0 for i in range(10)])
+    assert all(a == pytest.approx(90.0) for _, a in outputs[4])
+    assert proc._model.calls == [4, 4, 2]
+
+
+class AngleFromPixelModel(FakeYOLOModel):
+    """Modelo falso cujo ângulo do joelho é codificado no brilho do frame (ângulo = brilho)."""
+
+    def __call__(self, source, **kwargs):
+        import math
+        import numpy as np
+
+        frames = source if isinstance(source, list) else [source]
+        self.calls.append(len(frames))
+        out = []
+        for frame in frames:
+            theta = math.radians(float(frame.mean()))
+            kp = np.zeros((1, 17, 2), dtype=np.float32)
+            kp[0, 11] = kp[0, 12] = (0.0, 1.0)  # quadris
+            kp[0, 15] = kp[0, 16] = (math.sin(theta), math.cos(theta))  # tornozelos
+            out.append(_FakeResult(kp))
+        return out
+
+
+def _write_squat_video(path, reps=3, fps=60.0, period_s=2.0):
+    cv2 = pytest.importorskip("cv2")
+    import math
+    import numpy as np
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (32, 32))
+    n_frames = int(reps * period_s * fps)
+    for i in range(n_frames):
+        # 175° (em pé) -> 60° (agachado) -> 175°
+        angle = 117.5 + 57.5 * math.cos(2 * math.pi * i / (period_s * fps))
+        writer.write(np.full((32, 32, 3), int(round(angle)), dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def _pixel_processor():
+    from app.analysis.processor import YOLOPoseWrapper
+
+    proc = YOLOPoseWrapper.__new__(YOLOPoseWrapper)
+    proc.model_name = "fake"
+    proc.batch_size = 1
+    proc._model = AngleFromPixelModel()
+    return proc
+
+
+def test_sample_rate_skips_frames_and_keeps_rep_count(tmp_path):
+    video = _write_squat_video(tmp_path / "squat.avi", reps=3, fps=60.0)
+
+    full_proc = _pixel_processor()
+    full = full_proc.detect_joint_angles(video)
+    sampled_proc = _pixel_processor()
+    sampled = sampled_proc.detect_joint_angles(video, sample_rate=12)
+    adaptive_proc = _pixel_processor()
+    adaptive = adaptive_proc.detect_joint_angles(video, sample_rate=12, adaptive=True)
+    # leitura síncrona no modo adaptativo: os mesmos frames em toda execução
+    for queue_size in (1, 64):
+        again = _pixel_processor().detect_joint_angles(video, sample_rate=12, adaptive=True, queue_size=queue_size)
+        assert again == adaptive
+
+    assert len(full) == 360
+    assert len(sampled) == 72  # 60fps / 12 -> um frame a cada 5
+    assert len(sampled) < len(adaptive) < len(full)
+    assert [t for t, _ in sampled[:3]] == pytest.approx([0.0, 5 / 60.0, 10 / 60.0])
+    assert sum(sampled_proc._model.calls) == len(sampled)
+
+    expected = rules.count_reps(full)
+    assert expected == 3
+    assert rules.count_reps(sampled) == expected
+    assert rules.count_reps(adaptive) == expected
+
+    feedback = engine.analyze_video(
+        "p1", "ex1", video, processor=_pixel_processor(), sample_rate=12, adaptive=True
+    )
+    assert feedback["Repetitions"] == expected
+
+
+def test_pipeline_reports_queue_depth_and_stage_timings(tmp_path):
+    video = _write_squat_video(tmp_path / "squat.avi", reps=1, fps=30.0)
+    proc = _pixel_processor()
+
+    updates = []
+    seq = proc.detect_joint_angles(
+        video,
+        batch_size=4,
+        queue_size=2,
+        progress_cb=lambda pct, done, total, stats: updates.append((done, stats)),
+    )
+
+    assert len(seq) == 60
+    assert updates and updates[-1][0] == 60
+    for _, stats in updates:
+        assert 0 <= stats["queue_depth"] <= stats["queue_size"] == 2
+        assert {"decode_ms", "inference_ms", "angles_ms", "wait_ms"} <= set(stats)
+
+
+def test_renditions_single_pass_keep_timing_and_rep_count(monkeypatch, tmp_path):
+    cv2 = pytest.importorskip("cv2")
+    import numpy as np
+
+    from app.analysis import renditions
+    from app.core import uploads
+
+    monkeypatch.setattr(uploads, "UPLOAD_ROOT", tmp_path)
+    monkeypatch.setenv("MOVEON_ANALYSIS_MAX_SIDE", "64")
+    monkeypatch.setenv("MOVEON_PLAYBACK_MAX_SIDE", "128")
+
+    # vídeo "grande" (256x192) com o ângulo codificado no brilho, como em _write_squat_video
+    src = tmp_path / "big.avi"
+    fps = 30.0
+    writer = cv2.VideoWriter(str(src), cv2.VideoWriter_fourcc(*"MJPG"), fps, (256, 192))
+    for i in range(120):
+        angle = 117.5 + 57.5 * np.cos(2 * np.pi * i / 60)
+        writer.write(np.full((192, 256, 3), int(round(angle)), dtype=np.uint8))
+    writer.release()
+
+    result = renditions.make_renditions(str(src), "big.avi")
+    assert result.frames == 120
+    assert result.playback is not None and renditions.playback_path("big.avi") == result.playback
+
+    cap = cv2.VideoCapture(str(result.analysis))
+    assert (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))) == (64, 48)
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 120 and cap.get(cv2.CAP_PROP_FPS) == pytest.approx(fps)
+    cap.release()
+
+    # o processor lê a rendition: mesmos timestamps e mesma contagem de repetições
+    assert renditions.analysis_source(str(src), "big.avi") == str(result.analysis)
+    full = _pixel_processor().detect_joint_angles(str(src))
+    small = _pixel_processor().detect_joint_angles(str(result.analysis))
+    assert [t for t, _ in small] == [t for t, _ in full]
+    assert rules.count_reps(small, 90.0, 160.0) == rules.count_reps(full, 90.0, 160.0) == 2
+
+    # a análise nunca converte: sem rendition pronta lê o original
+    assert renditions.analysis_source(str(src), "other.avi") == str(src)
+    assert not renditions.analysis_path("other.avi").exists()
+    # o estágio pós-upload gera as duas numa passada, e só o que falta
+    both = renditions.ensure(str(src), "other.avi")
+    assert both.frames == 120 and both.analysis is not None and both.playback is not None
+    assert renditions.analysis_source(str(src), "other.avi") == str(both.analysis)
+    assert renditions.ensure(str(src), "other.avi") is None
+
+
+class _ConfKeypoints(_FakeKeypoints):
+    def __init__(self, xy, conf):
+        super().__init__(xy)
+        self.conf = _FakeKeypoints(conf)
+
+
+class PersonBoxModel:
+    """Modelo falso: a "pessoa" é o retângulo claro do frame; keypoints em posições fixas dele.
+
+    Os keypoints em `undetected` saem como o YOLO devolve os não detectados: (0, 0), conf 0.
+    """
+
+    def __init__(self, undetected=()):
+        self.calls = []
+        self.undetected = list(undetected)
+
+    def __call__(self, source, **kwargs):
+        import numpy as np
+
+        frames = source if isinstance(source, list) else [source]
+        self.calls.append(([f.shape[:2] for f in frames], kwargs.get("imgsz")))
+        out = []
+        for frame in frames:
+            ys, xs = np.nonzero(frame[..., 0] > 128)
+            if len(xs) == 0:
+                res = _FakeResult(np.zeros((0, 17, 2), dtype=np.float32))
+                res.keypoints = _ConfKeypoints(np.zeros((0, 17, 2), dtype=np.float32), np.zeros((0, 17), dtype=np.float32))
+                out.append(res)
+                continue
+            x0, y0, x1, y1 = xs.min(), ys.min(), xs.max(), ys.max()
+            w, h = x1 - x0, y1 - y0
+            kp = np.zeros((1, 17, 2), dtype=np.float32)
+            kp[0, :5] = (x0 + w / 2, y0 + 1)  # cabeça
+            kp[0, 5:11] = [(x0 + 1, y0 + h * 0.3), (x1 - 1, y0 + h * 0.3)] * 3  # tronco/braços
+            kp[0, 11] = kp[0, 12] = (x0 + w * 0.5, y0 + h * 0.5)  # quadris
+            kp[0, 13] = kp[0, 14] = (x0 + w * 0.5, y0 + h * 0.75)  # joelhos
+            kp[0, 15] = kp[0, 16] = (x1 - 1, y1 - 1)  # tornozelos
+            conf = np.full((1, 17), 0.9, dtype=np.float32)
+            kp[0, self.undetected] = 0.0
+            conf[0, self.undetected] = 0.0
+            res = _FakeResult(kp)
+            res.keypoints = _ConfKeypoints(kp, conf)
+            out.append(res)
+        return out
+
+
+def _write_person_video(path, positions, size=(320, 240)):
+    cv2 = pytest.importorskip("cv2")
+    import numpy as np
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10.0, size)
+    for x, y in positions:
+        frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        frame[y:y + 60, x:x + 30] = 255
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def test_roi_tracking_crops_around_person_and_falls_back_when_lost(tmp_path):
+    from app.analysis.processor import YOLOPoseWrapper
+
+    # pessoa andando devagar e depois "teleportando" para o outro lado do frame
+    positions = [(40 + 2 * i, 60) for i in range(12)] + [(250, 150)] * 4
+    video = _write_person_video(tmp_path / "person.avi", positions)
+
+    def _proc():
+        proc = YOLOPoseWrapper.__new__(YOLOPoseWrapper)
+        proc.model_name = "fake"
+        proc.batch_size = 4
+        proc._model = PersonBoxModel()
+        return proc
+
+    full_proc, roi_proc = _proc(), _proc()
+    full = full_proc.detect_joint_angles(video, roi=False)
+    stats = []
+    tracked = roi_proc.detect_joint_angles(video, roi=True, progress_cb=lambda p, d, t, s: stats.append(s))
+
+    assert len(tracked) == len(full) == len(positions)
+    assert [t for t, _ in tracked] == [t for t, _ in full]
+    assert [a for _, a in tracked] == pytest.approx([a for _, a in full], abs=2.0)
+
+    crop_calls = [(shapes, imgsz) for shapes, imgsz in roi_proc._model.calls if imgsz == 320]
+    assert crop_calls, "nenhuma inferência no recorte"
+    assert all(h < 240 and w < 320 for shapes, _ in crop_calls for h, w in shapes)
+    # o salto para o outro lado do frame perde o rastreamento e refaz com o frame inteiro
+    assert stats[-1]["roi_fallbacks"] >= 1 and stats[-1]["roi_frames"] >= 8
+
+
+def test_roi_keeps_undetected_keypoints_at_origin(tmp_path):
+    import numpy as np
+
+    from app.analysis import keypoints
+    from app.analysis.processor import YOLOPoseWrapper
+
+    positions = [(40 + 2 * i, 60) for i in range(12)]
+    video = _write_person_video(tmp_path / "person.avi", positions)
+
+    def _series(roi):
+        proc = YOLOPoseWrapper.__new__(YOLOPoseWrapper)
+        proc.model_name = "fake"
+        proc.batch_size = 4
+        proc._model = PersonBoxModel(undetected=(1, 2))  # olhos não detectados
+        path = tmp_path / f"kp_{roi}.npz"
+        proc.detect_joint_samples(video, roi=roi, keypoints_path=str(path))
+        return keypoints.load(str(path)), proc._model
+
+    full, _ = _series(False)
+    tracked, model = _series(True)
+
+    assert any(imgsz == 320 for _, imgsz in model.calls), "nenhuma inferência no recorte"
+    assert np.all(tracked.xy[:, [1, 2]] == 0)
+    np.testing.assert_allclose(tracked.xy.astype(np.float32), full.xy.astype(np.float32), atol=2.0)
+
+
+def test_angle_filter_smooths_jitter_and_fills_short_gaps():
+    import math
+    import random
+
+    from app.analysis.filters import AngleFilter, filter_angles
+
+    random.seed(3)
+    fps = 30.0
+    samples = []
+    for i in range(int(4 * fps)):  # 2 repetições de 2s
+        t = i / fps
+        angle = 125.0 + 50.0 * math.cos(2 * math.pi * t / 2.0)
+        angle += random.choice((-8.0, 8.0))  # jitter dos keypoints
+        conf = 0.9
+        if 20 <= i < 24:
+            angle, conf = None, 0.0  # oclusão curta
+        elif 70 <= i < 72:
+            conf = 0.1  # keypoints pouco confiáveis
+        samples.append((t, angle, conf))
+
+    raw = [(t, a) for t, a, c in samples if a is not None]
+    filtered = list(filter_angles(samples))
+
+    assert rules.count_reps(raw, 90.0, 160.0) == rules.count_reps([(t, a) for t, a, _ in filtered], 90.0, 160.0) == 2
+    assert len(filtered) == len(samples)  # lacunas curtas preenchidas
+    assert [t for t, _, _ in filtered] == [t for t, _, _ in samples]
+    filled = {round(t, 6): c for t, _, c in filtered}
+    assert 0 < filled[round(21 / fps, 6)] <= 0.9 and filled[round(0, 6)] == 0.9
+    jitter_raw = max(abs(b[1] - a[1]) for a, b in zip(raw, raw[1:]))
+    jitter = max(abs(b[1] - a[1]) for a, b in zip(filtered, filtered[1:]))
+    assert jitter < jitter_raw
+
+    # lacuna longa não é preenchida
+    stage = AngleFilter(max_gap_s=0.3)
+    out = stage.push(0.0, 170.0) + stage.push(0.1, None, 0.0) + stage.push(1.0, None, 0.0) + stage.push(1.1, 80.0)
+    assert [t for t, _, _ in out] == [0.0, 1.1] and out[-1][1] == 80.0
+
+
+def test_detect_joint_samples_keeps_missing_frames_with_zero_confidence(tmp_path):
+    from app.analysis.processor import YOLOPoseWrapper
+
+    positions = [(40, 60)] * 8
+
+    proc = YOLOPoseWrapper.__new__(YOLOPoseWrapper)
+    proc.model_name = "fake"
+    proc.batch_size = 2
+    proc._model = PersonBoxModel()
+
+    # frames "vazios": sem retângulo claro
+    import cv2
+    import numpy as np
+
+    writer = cv2.VideoWriter(str(tmp_path / "gap2.avi"), cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (320, 240))
+    for i, (x, y) in enumerate(positions):
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        if i not in (3, 4):
+            frame[y:y + 60, x:x + 30] = 255
+        writer.write(frame)
+    writer.release()
+
+    samples = proc.detect_joint_samples(str(tmp_path / "gap2.avi"))
+    assert len(samples) == len(positions)
+    assert [a is None for _, a, _ in samples] == [i in (3, 4) for i in range(len(positions))]
+    assert all(c == pytest.approx(0.9) for _, a, c in samples if a is not None)
+    assert all(c == 0.0 for _, a, c in samples if a is None)
+    assert len(proc.detect_joint_angles(str(tmp_path / "gap2.avi"))) == len(positions) - 2
+
+
+def test_saved_keypoints_rescore_without_video(tmp_path):
+    import numpy as np
+
+    from app.analysis import keypoints
+
+    video = _write_squat_video(tmp_path / "squat.avi", reps=3, fps=30.0)
+    kp_path = tmp_path / "keypoints" / "squat.npz"
+
+    feedback = engine.analyze_video("p1", "ex1", video, processor=_pixel_processor(), keypoints_path=str(kp_path))
+    assert feedback["Repetitions"] == 3
+
+    series = keypoints.load(kp_path)
+    assert series.xy.dtype == np.float32 and series.xy.shape == (180, 17, 2)
+    assert series.conf.shape == (180, 17) and series.present.all()
+    assert series.timestamps[:3] == pytest.approx([0.0, 1 / 30.0, 2 / 30.0])
+    assert float(series.meta["fps"]) == pytest.approx(30.0) and series.meta["model"] == "fake"
+
+    # o vídeo some: o reprocessamento usa só os keypoints salvos
+    import os
+
+    os.remove(video)
+    rescored = engine.rescore("p1", "ex1", str(kp_path))
+    assert rescored["Repetitions"] == feedback["Repetitions"]
+    for got, want in zip(rescored["Rep_Details"], feedback["Rep_Details"]):
+        assert got == pytest.approx(want, abs=1e-5)  # timestamps salvos em float32
+
+    # novos limiares: o agachamento vai só até ~60°, então 50° não conta nenhuma repetição
+    assert engine.rescore("p1", "ex1", str(kp_path), down_threshold=50.0)["Repetitions"] == 0
+    assert engine.rescore("p1", "ex1", str(kp_path), up_threshold=170.0)["Repetitions"] == 3
+
+
+def test_rescore_reproduces_stored_scores_for_full_hd_keypoints(tmp_path):
+    import numpy as np
+
+    from app.analysis import keypoints
+    from app.analysis.rules import compute_angles
+
+    # agachamento num vídeo 1920x1080: coordenadas acima de 1024 px, fora da precisão do float16
+    rng = np.random.default_rng(0)
+    timestamps = np.arange(240, dtype=np.float32) / 30.0
+    angles = 130.0 - 70.0 * np.cos(2 * np.pi * timestamps / 2.0)
+    xy = np.zeros((len(timestamps), 17, 2), np.float32)
+    hip, knee, ankle = np.array([1500.0, 400.0]), np.array([1560.0, 700.0]), 300.0
+    for i, angle in enumerate(np.radians(angles)):
+        thigh = (hip - knee) / np.linalg.norm(hip - knee)
+        rot = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        for side in (0, 1):  # quadril 11/12, joelho 13/14, tornozelo 15/16
+            xy[i, 11 + side], xy[i, 13 + side] = hip, knee
+            xy[i, 15 + side] = knee + ankle * (rot @ thigh)
+    xy += rng.uniform(-0.4, 0.4, xy.shape).astype(np.float32)
+
+    recorder = keypoints.KeypointRecorder()
+    for i, (t, frame_xy) in enumerate(zip(timestamps, xy)):
+        recorder.add(i, float(t), frame_xy, np.full(17, 0.9))
+    path = recorder.save(tmp_path / "hd.npz", fps=30.0, model="fake")
+
+    # o que a análise pontuou: ângulos dos keypoints vindos do modelo
+    _, _, mean = compute_angles(xy, "knee")
+    conf = float(np.float16(0.9))
+    stored = engine.score_samples("p1", "ex1", [(float(t), float(a), conf) for t, a in zip(timestamps, mean)])
+    assert stored["Repetitions"] == 4
+
+    rescored = engine.rescore("p1", "ex1", str(path))
+    assert rescored["Repetitions"] == stored["Repetitions"]
+    assert rescored["Rep_Details"] == stored["Rep_Details"]
+    assert rescored["Observacoes_Tecnicas"] == stored["Observacoes_Tecnicas"]
+
+
+def test_keypoint_samples_match_processor_for_missing_frames(tmp_path):
+    cv2 = pytest.importorskip("cv2")
+    import numpy as np
+
+    from app.analysis import keypoints
+    from app.analysis.processor import YOLOPoseWrapper
+
+    video = str(tmp_path / "gap.avi")
+    writer = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"MJPG"), 10.0, (320, 240))
+    for i in range(6):
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        if i not in (2, 3):
+            frame[60:120, 40:70] = 255
+        writer.write(frame)
+    writer.release()
+
+    proc = YOLOPoseWrapper.__new__(YOLOPoseWrapper)
+    proc.model_name = "fake"
+    proc.batch_size = 4
+    proc._model = PersonBoxModel()
+    kp_path = tmp_path / "gap.npz"
+    samples = proc.detect_joint_samples(video, keypoints_path=str(kp_path), roi=False)
+
+    saved = keypoints.samples_from_keypoints(keypoints.load(kp_path), "knee")
+    assert [a is None for _, a, _ in saved] == [a is None for _, a, _ in samples] == [i in (2, 3) for i in range(6)]
+    assert [c for _, _, c in saved] == pytest.approx([c for _, _, c in samples], abs=1e-3)
+    assert [a for _, a, _ in saved if a is not None] == pytest.approx(
+        [a for _, a, _ in samples if a is not None], abs=0.5
+    )
@@ -0,0 +1,257 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.analysis import jobs, runtime, storage
+from app.core import database
+from app.models.analysis_job import AnalysisJob
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine, tables=[AnalysisJob.__table__])
+    monkeypatch.setattr(database, "engine", engine)
+    return engine
+
+
+@pytest.fixture
+def saved(monkeypatch, db):
+    entries = []
+    monkeypatch.setattr(storage, "save_feedback", entries.append)
+    monkeypatch.setenv("MOVEON_JOB_POLL_SECONDS", "0.05")
+    runtime.shutdown()
+    yield entries
+    runtime.shutdown()
+
+
+def _wait_finished(engine, job_id, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with Session(engine) as session:
+            job = session.get(AnalysisJob, job_id)
+            if job.status in (jobs.DONE, jobs.FAILED):
+                return job
+        time.sleep(0.05)
+    raise AssertionError("job não terminou")
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_submit_analysis_enqueues_and_worker_persists_feedback(monkeypatch, db, saved, backend):
+    monkeypatch.setenv("MOVEON_ANALYSIS_BACKEND", backend)
+    monkeypatch.setenv("MOVEON_ANALYSIS_WORKERS", "1")
+    # sem ultralytics o processor não tem modelo: a análise é adiada (NotImplementedError)
+    monkeypatch.setattr(runtime, "_cached_processor", runtime.YOLOPoseWrapper.__new__(runtime.YOLOPoseWrapper))
+    runtime._cached_processor._model = None
+
+    job_id = runtime.submit_analysis("p1", "ex1", "/nao/existe.mp4", "video.mp4")
+    job = _wait_finished(db, job_id)
+    runtime.shutdown()  # aguarda a thread que grava os feedbacks vindos dos workers
+
+    assert job.status == jobs.FAILED and "adiada" in job.error
+    assert job.attempts == 1 and job.lease_owner is None
+    assert [(f["video_filename"], f["Status_Execucao"]) for f in saved] == [("video.mp4", "Pendente")]
+    assert isinstance(runtime.get_executor(), runtime.ProcessPoolExecutor if backend == "process" else runtime.ThreadPoolExecutor)
+
+
+def _crash_or_finish(patient_id, exercise_id, video_path, filename, save=None, report=None):
+    if filename == "crash.mp4":
+        os._exit(1)  # simula o worker morto pelo OOM killer
+    feedback = {"ID_Paciente": patient_id, "ID_Exercicio": exercise_id, "Status_Execucao": "Correto", "video_filename": filename}
+    save(feedback)
+    return feedback
+
+
+def test_crashed_worker_pool_is_rebuilt_and_next_job_completes(monkeypatch, db, saved):
+    monkeypatch.setenv("MOVEON_ANALYSIS_BACKEND", "process")
+    monkeypatch.setenv("MOVEON_ANALYSIS_WORKERS", "1")
+    # fork: os workers herdam a análise substituída
+    monkeypatch.setenv("MOVEON_ANALYSIS_MP_START", "fork")
+    monkeypatch.setattr(runtime, "analyze_and_log", _crash_or_finish)
+
+    crash_id = runtime.submit_analysis("p1", "ex1", "/tmp/crash.mp4", "crash.mp4")
+    crashed = _wait_finished(db, crash_id)
+    ok = _wait_finished(db, runtime.submit_analysis("p1", "ex1", "/tmp/ok.mp4", "ok.mp4"))
+    runtime.shutdown()
+
+    assert (crashed.status, crashed.attempts) == (jobs.FAILED, jobs.MAX_ATTEMPTS)
+    assert ok.status == jobs.DONE and ok.attempts == 1
+    assert sorted((f["video_filename"], f["Status_Execucao"]) for f in saved) == [("crash.mp4", "Erro"), ("ok.mp4", "Correto")]
+    assert not any(runtime._scheduler._running.values())
+
+
+def test_claim_is_exclusive_and_expired_leases_are_requeued(db):
+    with Session(db) as session:
+        job = jobs.enqueue(session, "p1", "ex1", "/tmp/a.mp4", "a.mp4")
+        claimed = jobs.claim_next(session, "worker-a", lease_seconds=30)
+        assert claimed.id == job.id and claimed.status == jobs.RUNNING
+        assert jobs.claim_next(session, "worker-b", lease_seconds=30) is None
+        assert not jobs.claim(session, job.id, "worker-b", lease_seconds=30)
+
+        # lease ainda válido: nada a recolocar; depois de vencido volta para a fila
+        assert jobs.requeue_expired(session) == 0
+        assert jobs.requeue_expired(session, now=datetime.utcnow() + timedelta(seconds=31)) == 1
+        session.refresh(claimed)
+        assert claimed.status == jobs.QUEUED and claimed.lease_owner is None
+
+        # o dono antigo não consegue mais finalizar; o novo sim
+        again = jobs.claim_next(session, "worker-b", lease_seconds=30)
+        assert not jobs.finish(session, job.id, "worker-a", jobs.DONE)
+        assert jobs.finish(session, job.id, "worker-b", jobs.DONE)
+        session.refresh(again)
+        assert again.status == jobs.DONE and again.attempts == 2
+
+
+def test_job_failed_after_too_many_interrupted_attempts(db):
+    with Session(db) as session:
+        job = jobs.enqueue(session, "p1", "ex1", "/tmp/a.mp4", "a.mp4")
+        later = datetime.utcnow()
+        for _ in range(jobs.MAX_ATTEMPTS):
+            assert jobs.claim_next(session, "worker", lease_seconds=1) is not None
+            later += timedelta(seconds=2)
+            jobs.requeue_expired(session, now=later)
+        session.refresh(job)
+        assert job.status == jobs.FAILED
+
+
+def test_job_failed_after_too_many_attempts_shows_up_as_error(monkeypatch, tmp_path, db):
+    from app.analysis import progress
+    from app.api.routes_video_feedback import _load_video_feedbacks_for_patient
+    from app.core import uploads
+
+    monkeypatch.setattr(uploads, "UPLOAD_ROOT", tmp_path)
+    progress.clear()
+    progress.publish(runtime._pending_feedback("7", "ex1", "perdido.mp4", "Vídeo na fila de análise"))
+    with Session(db) as session:
+        jobs.enqueue(session, "7", "ex1", "/tmp/perdido.mp4", "perdido.mp4")
+        later = datetime.utcnow()
+        for _ in range(jobs.MAX_ATTEMPTS):
+            assert jobs.claim_next(session, "worker", lease_seconds=1) is not None
+            later += timedelta(seconds=2)
+            runtime._requeue_expired(session, now=later)
+
+    (entry,) = _load_video_feedbacks_for_patient(7)
+    assert entry["video_filename"] == "perdido.mp4" and entry["status"] == "Erro"
+    assert "interrompida" in entry["feedback"]
+    assert progress.get("7", "perdido.mp4") is None
+
+
+def test_final_feedback_follows_the_job_status(monkeypatch, tmp_path, db):
+    from app.core import uploads
+
+    monkeypatch.setattr(uploads, "UPLOAD_ROOT", tmp_path)
+    storage.save_feedback({"ID_Paciente": "3", "Timestamp": "2020-01-01T00:00:00Z", "Status_Execucao": "Correto", "video_filename": "v.mp4"})
+    assert runtime.final_feedback("3", "v.mp4")["Status_Execucao"] == "Correto"
+
+    # reanálise em andamento: o feedback antigo não é o estado final
+    with Session(db) as session:
+        job = jobs.enqueue(session, "3", "ex1", "/tmp/v.mp4", "v.mp4")
+        assert runtime.final_feedback("3", "v.mp4") is None
+        jobs.claim_next(session, "w", lease_seconds=30)
+        jobs.finish(session, job.id, "w", jobs.FAILED, "sem memória")
+
+    # falhou sem gravar feedback (ex.: outro processo morreu antes)
+    final = runtime.final_feedback("3", "v.mp4")
+    assert final["Status_Execucao"] == "Erro" and "sem memória" in final["feedback"]
+
+
+def _queued(job_id, key, frames=None, cls="interactive", waited_s=0.0):
+    return AnalysisJob(
+        id=job_id,
+        patient_id="p",
+        exercise_id="ex",
+        video_path="/tmp/v.mp4",
+        video_filename=f"{job_id}.mp4",
+        priority_class=cls,
+        fairness_key=key,
+        frame_count=frames,
+        queued_at=datetime.utcnow() - timedelta(seconds=waited_s),
+    )
+
+
+def test_scheduler_priority_fair_share_and_shortest_first():
+    scheduler = runtime.AnalysisScheduler(max_wait_seconds=600)
+    bulk = [_queued(i, "physio:1", frames=3000 + i) for i in range(1, 6)]
+    short = _queued(10, "physio:2", frames=50_000)
+    reanalysis = _queued(20, "physio:3", frames=10, cls="batch")
+    queue = bulk + [short, reanalysis]
+
+    order = []
+    while queue:
+        job = scheduler.choose(queue)
+        scheduler.on_start(job)
+        order.append(job.id)
+        queue.remove(job)
+
+    # interativos antes do batch; as duas clínicas se alternam; menor job primeiro dentro da clínica
+    assert order[:2] == [1, 10]
+    assert order[2:6] == [2, 3, 4, 5]
+    assert order[-1] == 20
+
+    metrics = scheduler.wait_metrics()
+    assert metrics["interactive"]["started"] == 6 and metrics["batch"]["started"] == 1
+    assert "wait_p95_s" in metrics["interactive"]
+
+
+def test_scheduler_ages_batch_jobs_and_prefers_idle_keys():
+    scheduler = runtime.AnalysisScheduler(max_wait_seconds=60)
+    old_batch = _queued(1, "patient:a", frames=100, cls="batch", waited_s=120)
+    fresh = _queued(2, "patient:b", frames=10)
+    assert scheduler.choose([old_batch, fresh]).id == 1  # promovido por esperar demais
+
+    busy = _queued(3, "patient:c", frames=10)
+    scheduler.on_start(busy)
+    assert scheduler.choose([_queued(4, "patient:c", frames=1), _queued(5, "patient:d", frames=999)]).id == 5
+    scheduler.on_finish("patient:c")
+
+
+def test_queued_jobs_window_includes_every_fairness_key(db):
+    with Session(db) as session:
+        for i in range(30):
+            jobs.enqueue(session, "1", "ex", f"/tmp/{i}.mp4", f"{i}.mp4", fairness_key="physio:1", frame_count=1000 + i)
+        late = jobs.enqueue(session, "2", "ex", "/tmp/x.mp4", "x.mp4", fairness_key="physio:2", frame_count=5000)
+        candidates = jobs.queued_jobs(session, per_key=5)
+        assert late.id in {j.id for j in candidates}
+        assert len(candidates) == 6  # 5 menores de physio:1 (o mais antigo está entre eles) + 1
+
+        claimed = jobs.claim_next(session, "w", 30, choose=runtime.AnalysisScheduler().choose)
+        assert claimed.fairness_key in ("physio:1", "physio:2")
+
+
+def test_progress_stays_in_memory_and_only_terminal_state_is_saved(monkeypatch, saved):
+    from app.analysis import progress
+
+    seen = []
+
+    def fake_analyze(patient_id, exercise_id, video_path, processor=None, progress_cb=None, **kwargs):
+        for pct in (10, 50, 90):
+            progress_cb(pct, pct, 100)
+            seen.append(progress.get(patient_id, "v.mp4")["progress"])
+        return {"ID_Paciente": patient_id, "Status_Execucao": "Correto", "Repetitions": 3}
+
+    monkeypatch.setattr(runtime.engine, "analyze_video", fake_analyze)
+    monkeypatch.setattr(runtime, "get_processor", lambda: None)
+
+    runtime.analyze_and_log("p9", "ex1", "/tmp/v.mp4", "v.mp4")
+
+    assert seen == [10, 50, 90]
+    assert [(f["video_filename"], f["Status_Execucao"], f["progress"]) for f in saved] == [("v.mp4", "Correto", 100)]
+    assert progress.get("p9", "v.mp4") is None
+
+
+def test_start_workers_republishes_unfinished_jobs_as_pending(monkeypatch, db, saved):
+    from app.analysis import progress
+
+    progress.clear()
+    monkeypatch.setattr(runtime, "_ensure_dispatcher", lambda: None)
+    with Session(db) as session:
+        jobs.enqueue(session, "p5", "ex1", "/nao/existe.mp4", "fila.mp4")
+
+    runtime.start_workers()
+
+    pending = progress.get("p5", "fila.mp4")
+    assert pending["Status_Execucao"] == "Pendente" and pending["progress"] == 0
+    assert saved == []
@@ -0,0 +1,166 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core import database  # noqa: F401  (registra todos os modelos no metadata)
+from app.models.exercise_execution import ExerciseExecution
+from app.models.exercise_library import ExerciseLibrary
+from app.models.pain_level import PainLevel
+from app.models.patient import Patient
+from app.models.patient_daily_stats import PatientDailyStats
+from app.models.physiotherapist import Physiotherapist
+from app.models.prescription import Prescription
+from app.schemas.execution_history import ExecutionCreate
+from app.schemas.progress_report import PeriodFilter
+from app.services import daily_stats_service
+from app.services.daily_stats_service import DailyStatsService
+from app.services.execution_history_service import ExecutionHistoryService
+from app.services.progress_report_service import ProgressReportService
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        physio = Physiotherapist(name="Fisio", cpf="11111111111", email="f@x.com", license_number="CREF1")
+        patient = Patient(name="Paciente", cpf="22222222222", email="p@x.com")
+        exercises = [ExerciseLibrary(name="Agachamento"), ExerciseLibrary(name="Ponte")]
+        session.add_all([physio, patient, *exercises])
+        session.commit()
+        session.add_all([
+            Prescription(patient_id=patient.id, physiotherapist_id=physio.id, exercise_id=ex.id, series=3)
+            for ex in exercises
+        ])
+        session.commit()
+        yield session
+
+
+def _snapshot(session):
+    rows = session.exec(select(PatientDailyStats).order_by(PatientDailyStats.patient_id, PatientDailyStats.day)).all()
+    return [
+        (r.patient_id, r.day, r.executions, r.minutes, r.completion_sum, r.pain_sum, r.pain_count,
+         pytest.approx(r.pain_avg_sum), r.pain_executions, json.loads(r.exercises))
+        for r in rows
+    ]
+
+
+def test_create_execution_updates_rollup_like_a_full_rebuild(session):
+    prescriptions = session.exec(select(Prescription)).all()
+    for i, pain in enumerate([3, None, 7, 0, None]):
+        ExecutionHistoryService.create_execution(session, ExecutionCreate(
+            prescription_id=prescriptions[i % 2].id,
+            repetitions_completed=10,
+            series_completed=1 + i % 3,
+            duration_minutes=5 + i,
+            was_completed=i % 2 == 0,
+            pain_level=pain,
+        ))
+    # segundo relato de dor numa execução que já tinha dor: a média da execução muda
+    first = session.exec(select(ExerciseExecution).order_by(ExerciseExecution.id)).first()
+    extra = PainLevel(execution_id=first.id, pain_level=9)
+    session.add(extra)
+    session.flush()
+    DailyStatsService.record_pain(session, extra)
+    session.commit()
+
+    incremental = _snapshot(session)
+    assert len(incremental) == 1
+    _, _, executions, minutes, _, pain_sum, pain_count, pain_avg_sum, pain_executions, exercises = incremental[0]
+    assert (executions, minutes, pain_sum, pain_count, pain_executions) == (5, 35.0, 19, 4, 3)
+    assert pain_avg_sum == (3 + 9) / 2 + 7 + 0
+    assert sorted(count for count, _, _ in exercises.values()) == [2, 3]
+
+    DailyStatsService.rebuild(session)
+    session.commit()
+    assert _snapshot(session) == incremental
+
+
+def test_execution_is_not_saved_when_the_rollup_update_fails(session, monkeypatch):
+    prescription_id = session.exec(select(Prescription.id)).first()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("falha no resumo")
+
+    monkeypatch.setattr(daily_stats_service, "_add_execution", fail)
+    with pytest.raises(RuntimeError):
+        ExecutionHistoryService.create_execution(session, ExecutionCreate(
+            prescription_id=prescription_id, repetitions_completed=10, series_completed=3,
+            duration_minutes=10, was_completed=True, pain_level=4,
+        ))
+
+    assert session.exec(select(ExerciseExecution)).all() == []
+    assert session.exec(select(PainLevel)).all() == []
+    assert _snapshot(session) == []
+
+
+def test_rebuild_days_and_backfill(session):
+    patient_id = session.exec(select(Patient.id)).one()
+    prescription_ids = session.exec(select(Prescription.id)).all()
+    base = datetime(2025, 3, 10, 12, 0)
+    for i in range(6):
+        session.add(ExerciseExecution(
+            prescription_id=prescription_ids[i % 2], patient_id=patient_id,
+            execution_date=base + timedelta(days=i // 2), completion_rate=50.0,
+        ))
+    session.commit()
+
+    assert DailyStatsService.backfill(session) == 3
+    assert DailyStatsService.backfill(session) == 0
+
+    # remove as execuções de uma prescrição e recalcula só os dias afetados
+    removed = session.exec(select(ExerciseExecution).where(ExerciseExecution.prescription_id == prescription_ids[0])).all()
+    for ex in removed:
+        session.delete(ex)
+    session.flush()
+    DailyStatsService.rebuild(session, patient_id, {ex.execution_date.date() for ex in removed})
+    session.commit()
+    partial = _snapshot(session)
+    assert [row[2] for row in partial] == [1, 1, 1]
+
+    DailyStatsService.rebuild(session)
+    session.commit()
+    assert _snapshot(session) == partial
+
+
+def test_progress_report_uses_rollup_for_full_days_and_raw_rows_at_the_edges(session):
+    patient_id = session.exec(select(Patient.id)).one()
+    prescription_id = session.exec(select(Prescription.id)).first()
+    start = datetime(2025, 3, 10, 15, 0)
+    end = datetime(2025, 3, 14, 9, 0)
+    stamps = [
+        start - timedelta(hours=1),  # mesmo dia do início, antes do período
+        start + timedelta(hours=1),
+        datetime(2025, 3, 12, 8, 0),
+        datetime(2025, 3, 12, 20, 0),
+        end - timedelta(hours=1),
+        end + timedelta(hours=1),  # mesmo dia do fim, depois do período
+    ]
+    for i, stamp in enumerate(stamps):
+        ex = ExerciseExecution(
+            prescription_id=prescription_id, patient_id=patient_id, execution_date=stamp,
+            completion_rate=float(10 * (i + 1)), duration_minutes=float(i + 1),
+        )
+        session.add(ex)
+        session.commit()
+        session.add(PainLevel(execution_id=ex.id, pain_level=i))
+    session.commit()
+    DailyStatsService.rebuild(session)
+    session.commit()
+
+    report = ProgressReportService.generate_progress_report(session, patient_id, PeriodFilter.CUSTOM, start, end)
+
+    assert report.total_executions == 4
+    assert report.total_days_with_exercise == 3
+    assert report.total_activity_time_minutes == 2 + 3 + 4 + 5
+    assert report.average_completion_rate == pytest.approx((20 + 30 + 40 + 50) / 4)
+    assert report.average_pain_level == pytest.approx((1 + 2 + 3 + 4) / 4)
+    assert [(p.date.day, p.pain_level, p.execution_count) for p in report.pain_evolution] == [
+        (10, 1.0, 1), (12, 2.5, 2), (14, 4.0, 1)
+    ]
+    (exercise,) = report.exercises_progress
+    assert (exercise.exercise_name, exercise.total_executions, exercise.days_performed) == ("Agachamento", 4, 3)
+    assert exercise.last_execution_date == end - timedelta(hours=1)
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.database import get_session
+from app.main import app
+from app.models.exercise_execution import ExerciseExecution
+from app.models.exercise_library import ExerciseLibrary
+from app.models.pain_level import PainLevel
+from app.models.patient import Patient
+from app.models.physiotherapist import Physiotherapist
+from app.models.prescription import Prescription
+from app.schemas.execution_history import PeriodFilter
+from app.services.execution_history_service import ExecutionHistoryService
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _seed(engine, n_executions):
+    """Execuções nos últimos 5 dias (pares com a mesma data) e 0-2 registros de dor cada."""
+    now = datetime.utcnow().replace(microsecond=0)
+    with Session(engine) as session:
+        physio = Physiotherapist(name="Fisio", cpf="11111111111", email="f@x.com", license_number="CREF1")
+        patient = Patient(name="Paciente", cpf="22222222222", email="p@x.com")
+        squat = ExerciseLibrary(name="Agachamento", category="pernas")
+        session.add_all([physio, patient, squat])
+        session.commit()
+        prescription = Prescription(patient_id=patient.id, physiotherapist_id=physio.id, exercise_id=squat.id)
+        session.add(prescription)
+        session.commit()
+        latest_pain = {}
+        for i in range(n_executions):
+            execution = ExerciseExecution(
+                prescription_id=prescription.id,
+                patient_id=patient.id,
+                execution_date=now - timedelta(hours=(i // 2) * 5),
+                completion_rate=float(i * 10 % 101),
+            )
+            session.add(execution)
+            session.commit()
+            for k in range(i % 3):
+                session.add(PainLevel(
+                    execution_id=execution.id,
+                    pain_level=(i + k) % 11,
+                    pain_location=f"joelho {k}",
+                    reported_at=now - timedelta(minutes=10 - k),
+                ))
+                latest_pain[execution.id] = (i + k) % 11
+            session.commit()
+        return patient.id, latest_pain
+
+
+def test_history_uses_a_fixed_number_of_queries_and_latest_pain(engine):
+    patient_id, latest_pain = _seed(engine, 20)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with Session(engine) as session:
+        items = ExecutionHistoryService.get_execution_history(session, patient_id, PeriodFilter.LAST_7_DAYS)
+
+    assert len(statements) == 1
+    assert len(items) == 20
+    assert [(i.execution_date, i.id) for i in items] == sorted(((i.execution_date, i.id) for i in items), reverse=True)
+    assert {i.id: i.pain_level.pain_level for i in items if i.pain_level} == latest_pain
+    assert all(i.exercise.name == "Agachamento" for i in items)
+
+
+def test_history_keyset_pages_through_the_period(engine):
+    patient_id, _ = _seed(engine, 11)
+
+    def _session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    try:
+        client = TestClient(app)
+        url = f"/api/patients/{patient_id}/exercise-history"
+        full = client.get(url).json()
+        assert full["total_executions"] == 11 and full["next_cursor"] is None
+
+        pages, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            body = client.get(url, params=params).json()
+            assert body["total_executions"] == 11
+            pages.append([item["id"] for item in body["executions"]])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+
+        assert [len(p) for p in pages] == [3, 3, 3, 2]  # páginas cortam pares com a mesma data
+        assert [i for page in pages for i in page] == [item["id"] for item in full["executions"]]
+        assert client.get(url, params={"limit": 4, "cursor": "nao-e-um-cursor"}).status_code == 400
+    finally:
+        app.dependency_overrides.pop(get_session, None)
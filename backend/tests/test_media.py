@@ -0,0 +1,101 @@
+import uuid
+from email.utils import formatdate
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.analysis import runtime
+from app.core import uploads
+from app.main import app
+
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def upload_root(monkeypatch, tmp_path):
+    # vídeos servidos/enviados nos testes ficam em tmp_path, fora de app/uploads
+    monkeypatch.setattr(uploads, "UPLOAD_ROOT", tmp_path)
+    monkeypatch.setattr(runtime, "submit_analysis", lambda *args, **kwargs: None)
+    monkeypatch.setattr(runtime, "submit_renditions", lambda *args, **kwargs: False)
+    return tmp_path
+
+
+@pytest.fixture
+def video(upload_root):
+    path = upload_root / f"{uuid.uuid4().hex}.mp4"
+    path.write_bytes(bytes(range(256)) * 400)
+    return path
+
+
+def test_video_supports_byte_ranges(video):
+    url = f"/api/videos/{video.name}"
+    content = video.read_bytes()
+
+    resp = client.get(url, headers={"Range": "bytes=100-199"})
+    assert resp.status_code == 206
+    assert resp.content == content[100:200]
+    assert resp.headers["content-range"] == f"bytes 100-199/{len(content)}"
+    assert resp.headers["content-type"] == "video/mp4"
+
+    resp = client.get(url, headers={"Range": "bytes=-50"})
+    assert resp.status_code == 206 and resp.content == content[-50:]
+
+    resp = client.get(url, headers={"Range": f"bytes={len(content)}-"})
+    assert resp.status_code == 416
+    assert resp.headers["content-range"] == f"bytes */{len(content)}"
+
+
+def test_video_conditional_requests_and_cache_headers(video):
+    url = f"/api/videos/{video.name}"
+    resp = client.get(url)
+    assert resp.status_code == 200 and resp.content == video.read_bytes()
+    etag = resp.headers["etag"]
+    assert "immutable" in resp.headers["cache-control"]
+    assert resp.headers["accept-ranges"] == "bytes"
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": '"outro"'}).status_code == 200
+    since = formatdate(video.stat().st_mtime + 60, usegmt=True)
+    assert client.get(url, headers={"If-Modified-Since": since}).status_code == 304
+
+    # If-Range com ETag antiga -> arquivo inteiro
+    resp = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"antiga"'})
+    assert resp.status_code == 200 and len(resp.content) == video.stat().st_size
+
+
+def test_content_addressed_upload_uses_hash_as_etag():
+    import hashlib
+
+    content = b"etag por conteudo" * 10
+    resp = client.post(
+        "/api/upload/video",
+        files={"file": ("v.mp4", content, "video/mp4")},
+        data={"patient_id": "test_p", "exercise_id": "test_ex"},
+    )
+    filename = resp.json()["filename"]
+    resp = client.get(f"/api/videos/{filename}")
+    assert resp.headers["etag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+
+
+def test_playback_rendition_has_its_own_url(video):
+    from app.analysis import renditions
+
+    original = f"/api/videos/{video.name}"
+    playback_url = f"{original}/playback"
+
+    # antes da rendition: redireciona para o original sem cache
+    resp = client.get(playback_url, follow_redirects=False)
+    assert resp.status_code == 307 and resp.headers["cache-control"] == "no-store"
+    assert resp.headers["location"].endswith(original)
+
+    rendition = renditions.renditions_dir() / f"{video.stem}.playback.mp4"
+    rendition.parent.mkdir(parents=True, exist_ok=True)
+    rendition.write_bytes(b"rendition" * 100)
+
+    resp = client.get(playback_url)
+    assert resp.status_code == 200 and resp.content == rendition.read_bytes()
+    assert "immutable" in resp.headers["cache-control"]
+    # a URL do original continua servindo os mesmos bytes
+    resp = client.get(original)
+    assert resp.content == video.read_bytes() and "immutable" in resp.headers["cache-control"]
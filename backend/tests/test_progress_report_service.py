@@ -0,0 +1,148 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core import database  # noqa: F401  (registra todos os modelos no metadata)
+from app.models.exercise_execution import ExerciseExecution
+from app.models.exercise_library import ExerciseLibrary
+from app.models.pain_level import PainLevel
+from app.models.patient import Patient
+from app.models.physiotherapist import Physiotherapist
+from app.models.prescription import Prescription
+from app.schemas.progress_report import PeriodFilter
+from app.services.daily_stats_service import DailyStatsService
+from app.services.progress_report_service import ProgressReportService
+
+
+def _engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _seed(engine, n_executions):
+    """Paciente com execuções em 3 exercícios; algumas execuções sem dor, outras com 1-2 registros."""
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        physio = Physiotherapist(name="Fisio", cpf="11111111111", email="f@x.com", license_number="CREF1")
+        patient = Patient(name="Paciente", cpf="22222222222", email="p@x.com")
+        exercises = [ExerciseLibrary(name=name) for name in ("Agachamento", "Ponte", "Prancha")]
+        session.add_all([physio, patient, *exercises])
+        session.commit()
+        prescriptions = [
+            Prescription(patient_id=patient.id, physiotherapist_id=physio.id, exercise_id=ex.id) for ex in exercises
+        ]
+        session.add_all(prescriptions)
+        session.commit()
+        executions = [
+            ExerciseExecution(
+                prescription_id=prescriptions[i % 3].id,
+                patient_id=patient.id,
+                execution_date=now - timedelta(days=i % 12, hours=i % 5),
+                duration_minutes=float(5 + i % 7) if i % 4 else None,
+                completion_rate=float(40 + (i * 7) % 60),
+            )
+            for i in range(n_executions)
+        ]
+        session.add_all(executions)
+        session.commit()
+        for i, execution in enumerate(executions):
+            for k in range(i % 3):
+                session.add(PainLevel(execution_id=execution.id, pain_level=(i + k * 3) % 11))
+        session.commit()
+        # inserção direta (fora do create_execution): recalcula o resumo diário
+        DailyStatsService.rebuild(session)
+        session.commit()
+        return patient.id
+
+
+def _expected(engine, patient_id):
+    with Session(engine) as session:
+        executions = session.exec(select(ExerciseExecution).where(ExerciseExecution.patient_id == patient_id)).all()
+        pains = defaultdict(list)
+        for p in session.exec(select(PainLevel)).all():
+            pains[p.execution_id].append(p.pain_level)
+        exercise_of = {
+            pr.id: session.get(ExerciseLibrary, pr.exercise_id).name for pr in session.exec(select(Prescription)).all()
+        }
+        by_day = defaultdict(list)
+        per_exercise = defaultdict(list)
+        for e in executions:
+            by_day[e.execution_date.date()].append(e)
+            per_exercise[exercise_of[e.prescription_id]].append(e)
+        evolution = []
+        for day in sorted(by_day):
+            averages = [sum(pains[e.id]) / len(pains[e.id]) for e in by_day[day] if pains[e.id]]
+            if averages:
+                evolution.append((day, sum(averages) / len(averages), len(by_day[day])))
+        all_pain = [level for e in executions for level in pains[e.id]]
+        return {
+            "days": len(by_day),
+            "time": sum(e.duration_minutes or 0.0 for e in executions),
+            "completion": sum(e.completion_rate for e in executions) / len(executions),
+            "pain": sum(all_pain) / len(all_pain),
+            "evolution": evolution,
+            "exercises": {
+                name: (
+                    len(items),
+                    sum(e.completion_rate for e in items) / len(items),
+                    len({e.execution_date.date() for e in items}),
+                    max(e.execution_date for e in items),
+                )
+                for name, items in per_exercise.items()
+            },
+        }
+
+
+def _report(engine, patient_id):
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        with Session(engine) as session:
+            report = ProgressReportService.generate_progress_report(session, patient_id, PeriodFilter.LAST_MONTH)
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return report, len(statements)
+
+
+def test_progress_report_aggregates_match_row_by_row_computation():
+    engine = _engine()
+    patient_id = _seed(engine, 50)
+    report, _ = _report(engine, patient_id)
+    expected = _expected(engine, patient_id)
+
+    assert report.has_data and report.total_executions == 50
+    assert report.total_days_with_exercise == expected["days"]
+    assert report.total_activity_time_minutes == pytest.approx(expected["time"])
+    assert report.average_completion_rate == pytest.approx(expected["completion"])
+    assert report.average_pain_level == pytest.approx(expected["pain"])
+    assert [(i.date.date(), i.pain_level, i.execution_count) for i in report.pain_evolution] == [
+        (day, pytest.approx(avg), count) for day, avg, count in expected["evolution"]
+    ]
+    exercises = {
+        e.exercise_name: (e.total_executions, e.completion_rate_avg, e.days_performed, e.last_execution_date)
+        for e in report.exercises_progress
+    }
+    assert exercises.keys() == expected["exercises"].keys()
+    for name, (count, completion, days, last) in expected["exercises"].items():
+        assert exercises[name] == (count, pytest.approx(completion), days, last)
+
+
+def test_progress_report_query_count_is_constant_and_empty_period_has_no_data():
+    small_engine, big_engine = _engine(), _engine()
+    _, small_queries = _report(small_engine, _seed(small_engine, 5))
+    _, big_queries = _report(big_engine, _seed(big_engine, 200))
+    assert small_queries == big_queries <= 4
+
+    engine = _engine()
+    patient_id = _seed(engine, 0)
+    report, _ = _report(engine, patient_id)
+    assert not report.has_data and report.total_executions == 0 and report.pain_evolution == []
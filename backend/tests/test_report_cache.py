@@ -0,0 +1,133 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.database import get_session
+from app.main import app
+from app.models.exercise_library import ExerciseLibrary
+from app.models.patient import Patient
+from app.models.physiotherapist import Physiotherapist
+from app.models.prescription import Prescription
+from app.schemas.execution_history import ExecutionCreate
+from app.services.execution_history_service import ExecutionHistoryService
+from app.services.report_cache import ReportCache, period_key, report_cache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_expires_evicts_lru_and_invalidates_by_patient():
+    clock = _Clock()
+    cache = ReportCache(max_entries=2, ttl_seconds=10, clock=clock)
+    builds = []
+
+    def get(patient_id, key):
+        return cache.get_or_create(patient_id, key, lambda: builds.append((patient_id, key)) or len(builds))
+
+    assert get(1, "a") == 1 and get(1, "a") == 1
+    clock.now = 11
+    assert get(1, "a") == 2  # expirou
+
+    get(2, "b")
+    get(1, "a")  # "a" passa a ser o mais recente
+    get(3, "c")  # despeja "b"
+    assert len(cache) == 2
+    assert get(1, "a") == 2 and get(2, "b") == 5
+
+    cache.invalidate_patient(1)
+    assert get(2, "b") == 5 and get(1, "a") == 6
+    assert (cache.hits, cache.misses) == (4, 6)
+
+
+def test_report_built_during_an_invalidation_is_not_stored():
+    cache = ReportCache()
+
+    def build():
+        cache.invalidate_patient(1)  # escrita concorrente do mesmo paciente
+        return "antigo"
+
+    assert cache.get_or_create(1, "k", build) == "antigo"
+    assert len(cache) == 0
+    assert cache.get_or_create(1, "k", lambda: "novo") == "novo"
+    assert ReportCache(ttl_seconds=0).get_or_create(1, "k", lambda: "sem cache") == "sem cache"
+
+
+def test_relative_periods_are_bucketed_by_day():
+    today = date(2025, 3, 10)
+    assert period_key("last_7_days", None, None, today) == period_key("last_7_days", None, None, today)
+    assert period_key("last_7_days", None, None, today) != period_key("last_7_days", None, None, date(2025, 3, 11))
+    start, end = datetime(2025, 1, 1), datetime(2025, 2, 1)
+    assert period_key("custom", start, end, today) == period_key("custom", start, end, date(2025, 3, 11))
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+
+    def _session():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = _session
+    report_cache.clear()
+    yield engine
+    report_cache.clear()
+    app.dependency_overrides.pop(get_session, None)
+
+
+def test_report_routes_are_cached_until_the_patient_writes(engine):
+    with Session(engine) as session:
+        physio = Physiotherapist(name="Fisio", cpf="11111111111", email="f@x.com", license_number="CREF1")
+        squat = ExerciseLibrary(name="Agachamento")
+        session.add_all([physio, squat])
+        session.commit()
+        patient = Patient(name="Paciente", cpf="22222222222", email="p@x.com", physiotherapist_id=physio.id)
+        session.add(patient)
+        session.commit()
+        prescription = Prescription(patient_id=patient.id, physiotherapist_id=physio.id, exercise_id=squat.id, series=3)
+        session.add(prescription)
+        session.commit()
+        physio_id, patient_id, prescription_id = physio.id, patient.id, prescription.id
+
+    def add_execution():
+        with Session(engine) as session:
+            return ExecutionHistoryService.create_execution(session, ExecutionCreate(
+                prescription_id=prescription_id, repetitions_completed=10, series_completed=3,
+                duration_minutes=10, was_completed=True, pain_level=2,
+            )).id
+
+    execution_id = add_execution()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    client = TestClient(app)
+    progress_url = f"/api/patients/{patient_id}/progress-report"
+    report_url = f"/api/patients/{patient_id}/reports"
+
+    assert client.get(progress_url).json()["total_executions"] == 1
+    assert len(client.get(report_url).json()["executions"]) == 1
+    queries = len(statements)
+    assert client.get(progress_url).json()["total_executions"] == 1
+    assert len(client.get(report_url).json()["executions"]) == 1
+    assert len(statements) == queries  # servidos do cache
+
+    add_execution()
+    assert client.get(progress_url).json()["total_executions"] == 2
+    assert len(client.get(report_url).json()["executions"]) == 2
+
+    feedback = client.post(
+        f"/api/physiotherapists/{physio_id}/patients/{patient_id}/executions/{execution_id}/feedbacks",
+        json={"feedback_type": "positive", "content": "Boa execução"},
+    )
+    assert feedback.status_code == 201, feedback.text
+    executions = client.get(report_url).json()["executions"]
+    assert [e["feedbacks"][0]["content"] for e in executions if e["feedbacks"]] == ["Boa execução"]
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core import database  # noqa: F401  (registra todos os modelos no metadata)
+from app.models.exercise_execution import ExerciseExecution
+from app.models.exercise_library import ExerciseLibrary
+from app.models.feedback import Feedback
+from app.models.pain_level import PainLevel
+from app.models.patient import Patient
+from app.models.physiotherapist import Physiotherapist
+from app.models.prescription import Prescription
+from app.schemas.report import PeriodFilter, ReportRequest
+from app.services.report_service import ReportService
+
+
+def _engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def _seed(engine, n_executions):
+    now = datetime.utcnow()
+    with Session(engine) as session:
+        physio = Physiotherapist(name="Fisio", cpf="11111111111", email="f@x.com", license_number="CREF1")
+        patient = Patient(name="Paciente", cpf="22222222222", email="p@x.com")
+        squat = ExerciseLibrary(name="Agachamento", category="pernas")
+        bridge = ExerciseLibrary(name="Ponte", category="core")
+        session.add_all([physio, patient, squat, bridge])
+        session.commit()
+        prescriptions = [
+            Prescription(patient_id=patient.id, physiotherapist_id=physio.id, exercise_id=ex.id, weekly_frequency=3)
+            for ex in (squat, bridge)
+        ]
+        session.add_all(prescriptions)
+        session.commit()
+        for i in range(n_executions):
+            execution = ExerciseExecution(
+                prescription_id=prescriptions[i % 2].id,
+                patient_id=patient.id,
+                execution_date=now - timedelta(days=i % 25, minutes=i),
+                completion_rate=50.0 + i % 50,
+                was_completed=i % 3 == 0,
+            )
+            session.add(execution)
+            session.commit()
+            session.add_all([
+                PainLevel(execution_id=execution.id, pain_level=i % 10, reported_at=now - timedelta(minutes=i)),
+                PainLevel(execution_id=execution.id, pain_level=(i + 1) % 10, reported_at=now - timedelta(minutes=i, seconds=30)),
+                Feedback(execution_id=execution.id, patient_id=patient.id, feedback_type="positive", content=f"ok {i}"),
+            ])
+        session.commit()
+        return patient.id
+
+
+def _report_with_query_count(engine, patient_id):
+    statements = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        with Session(engine) as session:
+            report = ReportService.generate_report(
+                session, ReportRequest(patient_id=patient_id, period_filter=PeriodFilter.LAST_MONTH)
+            )
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return report, len(statements)
+
+
+def test_report_query_count_does_not_grow_with_executions():
+    small_engine, big_engine = _engine(), _engine()
+    small, small_queries = _report_with_query_count(small_engine, _seed(small_engine, 3))
+    big, big_queries = _report_with_query_count(big_engine, _seed(big_engine, 60))
+
+    assert len(small.executions) == 3 and len(big.executions) == 60
+    assert big_queries == small_queries <= 6
+
+
+def test_report_groups_pain_and_feedback_per_execution():
+    engine = _engine()
+    patient_id = _seed(engine, 4)
+    report, _ = _report_with_query_count(engine, patient_id)
+
+    assert [e.execution_date for e in report.executions] == sorted(
+        (e.execution_date for e in report.executions), reverse=True
+    )
+    assert {e.exercise.name for e in report.executions} == {"Agachamento", "Ponte"}
+    by_id = {e.id: e for e in report.executions}
+    with Session(engine) as session:
+        for execution_id, detail in by_id.items():
+            pains = session.exec(
+                select(PainLevel).where(PainLevel.execution_id == execution_id).order_by(PainLevel.reported_at.desc())
+            ).all()
+            feedbacks = session.exec(select(Feedback).where(Feedback.execution_id == execution_id)).all()
+            assert [p.id for p in detail.pain_levels] == [p.id for p in pains]
+            assert [f.id for f in detail.feedbacks] == [f.id for f in feedbacks]
+    # dor média: níveis (i, i+1) para i = 0..3
+    assert report.progress.pain_level_avg == pytest.approx(sum([0, 1, 1, 2, 2, 3, 3, 4]) / 8)
+    assert report.progress.total_executions == 4 and report.progress.exercises_prescribed == 2
+    assert sorted(e.name for e in report.prescribed_exercises) == ["Agachamento", "Ponte"]
@@ -1,10 +1,22 @@
+import pytest
 from fastapi.testclient import TestClient
+
+from app.analysis import runtime
+from app.core import uploads
 from app.main import app
 
 
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def upload_root(monkeypatch, tmp_path):
+    # uploads (blobs, .part) e o log de análises em tmp_path, fora de app/uploads
+    monkeypatch.setattr(uploads, "UPLOAD_ROOT", tmp_path)
+    monkeypatch.setattr(runtime, "submit_analysis", lambda *args, **kwargs: None)
+    return tmp_path
+
+
 def test_upload_video():
     file_content = b"fake video content"
     files = {"file": ("test.mp4", file_content, "video/mp4")}
@@ -15,3 +27,29 @@ def test_upload_video():
     data = resp.json()
     assert "filename" in data
     assert data["filename"].endswith(".mp4") or data["filename"] != ""
+
+
+def test_upload_video_streams_to_disk_with_hash():
+    import hashlib
+    from pathlib import Path
+
+    file_content = b"x" * (3 * 1024 * 1024 + 17)  # vários blocos de 1 MiB
+    files = {"file": ("big.mp4", file_content, "video/mp4")}
+    resp = client.post("/api/upload/video", files=files, data={"patient_id": "test_p", "exercise_id": "test_ex"})
+    assert resp.status_code == 201
+    body = resp.json()
+    assert body["size_bytes"] == len(file_content)
+    assert body["sha256"] == hashlib.sha256(file_content).hexdigest()
+    saved = Path(body["saved_path"])
+    assert saved.read_bytes() == file_content
+    assert not list(saved.parent.glob(".*.part"))
+
+
+def test_upload_video_over_limit_is_rejected(monkeypatch, upload_root):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_MB", 1)
+    files = {"file": ("big.mp4", b"x" * (1024 * 1024 + 1), "video/mp4")}
+    resp = client.post("/api/upload/video", files=files, data={"patient_id": "test_p", "exercise_id": "test_ex"})
+    assert resp.status_code == 413
+    assert not list(upload_root.glob(".*.part"))
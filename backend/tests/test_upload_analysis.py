@@ -1,7 +1,10 @@
 import io
+import time
 from fastapi.testclient import TestClient
 from unittest import mock
 
+from app.analysis import storage
+from app.core import uploads
 from app.main import app
 
 
@@ -19,8 +22,9 @@ def fake_detect(self, video_path: str, joint: str = "knee"):
     ]
 
 
-def test_upload_and_analysis_endpoint(monkeypatch):
+def test_upload_and_analysis_endpoint(monkeypatch, tmp_path):
     monkeypatch.setattr("app.analysis.processor.YOLOPoseWrapper.detect_joint_angles", fake_detect, raising=True)
+    monkeypatch.setattr(uploads, "UPLOAD_ROOT", tmp_path)
 
     file_bytes = io.BytesIO(b"fake video content")
     files = {"file": ("test.mp4", file_bytes, "video/mp4")}
@@ -34,5 +38,13 @@ def test_upload_and_analysis_endpoint(monkeypatch):
     assert analysis["ID_Paciente"] == "test_patient"
     assert analysis["ID_Exercicio"] == "squat"
     assert analysis["Status_Execucao"] in ("Sucesso", "Falha", "Pendente", "Erro")
+
+    # a análise roda em segundo plano (fila de jobs): espera o feedback final
+    deadline = time.monotonic() + 10
+    final = analysis
+    while final.get("Status_Execucao") == "Pendente" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        final = storage.load_feedback("test_patient", body["filename"]) or analysis
     # since our fake returns 2 reps, we expect Sucesso
-    assert analysis["Repetitions"] >= 2
+    assert final["Status_Execucao"] == "Sucesso"
+    assert final["Repetitions"] >= 2
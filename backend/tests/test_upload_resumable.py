@@ -0,0 +1,112 @@
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.analysis import runtime
+from app.core import uploads
+from app.core.database import get_session
+from app.main import app
+from app.models.upload_session import UploadSession
+from app.services.upload_session_service import UploadSessionService
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'uploads.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine, tables=[UploadSession.__table__])
+
+    def _session():
+        with Session(engine) as session:
+            yield session
+
+    submitted = []
+    # blocos parciais (partial/) e blobs finalizados em tmp_path, fora de app/uploads
+    monkeypatch.setattr(uploads, "UPLOAD_ROOT", tmp_path / "uploads")
+    monkeypatch.setattr(runtime, "submit_analysis", lambda *args, **kwargs: submitted.append(args) or 42)
+    app.dependency_overrides[get_session] = _session
+    client = TestClient(app)
+    client.engine = engine
+    client.submitted = submitted
+    yield client
+    app.dependency_overrides.pop(get_session, None)
+
+
+def _create(client, content, **extra):
+    payload = {"patient_id": "p1", "exercise_id": "ex1", "length": len(content), "filename": "treino.mp4", **extra}
+    resp = client.post("/api/upload/sessions", json=payload)
+    assert resp.status_code == 201
+    return resp.json()["upload_id"]
+
+
+def test_resumable_upload_resumes_from_server_offset_and_finalizes(client):
+    content = bytes(range(256)) * 1000
+    upload_id = _create(client, content, sha256=hashlib.sha256(content).hexdigest())
+    url = f"/api/upload/sessions/{upload_id}"
+
+    resp = client.patch(url, content=content[:100_000], headers={"Upload-Offset": "0"})
+    assert resp.status_code == 204 and resp.headers["Upload-Offset"] == "100000"
+
+    # reenvio com offset errado (ex.: cliente perdeu a resposta) -> 409 com o offset do servidor
+    resp = client.patch(url, content=content[50_000:], headers={"Upload-Offset": "50000"})
+    assert resp.status_code == 409 and resp.headers["Upload-Offset"] == "100000"
+
+    offset = int(client.head(url).headers["Upload-Offset"])
+    assert client.post(f"{url}/finalize").status_code == 409  # ainda incompleto
+
+    resp = client.patch(url, content=content[offset:], headers={"Upload-Offset": str(offset)})
+    assert resp.headers["Upload-Offset"] == str(len(content))
+
+    resp = client.post(f"{url}/finalize")
+    assert resp.status_code == 201
+    body = resp.json()
+    assert body["job_id"] == 42 and body["filename"].endswith(".mp4")
+    assert body["sha256"] == hashlib.sha256(content).hexdigest()
+    with open(body["saved_path"], "rb") as f:
+        assert f.read() == content
+    assert client.submitted[0][:2] == ("p1", "ex1")
+    assert not UploadSessionService.partial_path(upload_id).exists()
+    assert client.get(url).json()["status"] == "finalized"
+    assert client.patch(url, content=b"x", headers={"Upload-Offset": "0"}).status_code == 410
+
+
+def test_finalize_uses_the_hash_summed_while_receiving(client, monkeypatch):
+    content = b"moveon" * 50_000
+    upload_id = _create(client, content, sha256=hashlib.sha256(content).hexdigest())
+    url = f"/api/upload/sessions/{upload_id}"
+    for start in range(0, len(content), 100_000):
+        client.patch(url, content=content[start:start + 100_000], headers={"Upload-Offset": str(start)})
+
+    def _reread(path):
+        raise AssertionError("finalize releu o upload inteiro")
+
+    monkeypatch.setattr(uploads, "sha256_file", _reread)
+    resp = client.post(f"{url}/finalize")
+    assert resp.status_code == 201 and resp.json()["sha256"] == hashlib.sha256(content).hexdigest()
+
+
+def test_resumable_upload_rejects_wrong_hash_and_oversized_chunks(client):
+    content = b"abc" * 1000
+    upload_id = _create(client, content, sha256="0" * 64)
+    url = f"/api/upload/sessions/{upload_id}"
+
+    assert client.patch(url, content=content + b"extra", headers={"Upload-Offset": "0"}).status_code == 413
+    offset = int(client.head(url).headers["Upload-Offset"])
+    client.patch(url, content=content[offset:], headers={"Upload-Offset": str(offset)})
+
+    assert client.post(f"{url}/finalize").status_code == 422
+    assert client.submitted == []
+    assert not UploadSessionService.partial_path(upload_id).exists()
+
+
+def test_stale_partial_uploads_expire(client):
+    upload_id = _create(client, b"x" * 10)
+    client.patch(f"/api/upload/sessions/{upload_id}", content=b"x" * 4, headers={"Upload-Offset": "0"})
+
+    with Session(client.engine) as session:
+        expired = UploadSessionService.expire_stale(session, now=datetime.utcnow() + timedelta(days=2))
+    assert expired == 1
+    assert not UploadSessionService.partial_path(upload_id).exists()
+    assert client.head(f"/api/upload/sessions/{upload_id}").status_code == 410
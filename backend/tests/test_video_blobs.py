@@ -0,0 +1,107 @@
+import hashlib
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, create_engine
+
+from app.analysis import blobs, cache, runtime, storage
+from app.core import database, uploads
+from app.main import app
+from app.models.video_blob import VideoBlob
+
+_submit_analysis = runtime.submit_analysis
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'blobs.db'}", connect_args={"check_same_thread": False})
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(uploads, "UPLOAD_ROOT", tmp_path / "uploads")
+    monkeypatch.setattr(storage, "_logs_path", lambda: tmp_path / "analysis_logs.jsonl")
+    submitted = []
+    monkeypatch.setattr(runtime, "submit_analysis", lambda *args, **kwargs: submitted.append(args) or len(submitted))
+    runtime._ensure_table()
+    engine.submitted = submitted
+    return engine
+
+
+def _upload(patient_id, content, exercise_id="1"):
+    files = {"file": ("Treino.MP4", content, "video/mp4")}
+    resp = TestClient(app).post("/api/upload/video", files=files, data={"patient_id": patient_id, "exercise_id": exercise_id})
+    assert resp.status_code == 201
+    return resp.json()
+
+
+def test_duplicate_upload_reuses_blob_and_cached_analysis(db):
+    content = b"mesmo video" * 1000
+    sha = hashlib.sha256(content).hexdigest()
+
+    first = _upload("1", content)
+    assert first["filename"] == f"{sha}.mp4" and first["job_id"] == 1
+
+    # análise concluída -> resultado entra no cache
+    with Session(db) as session:
+        cache.store(session, runtime._cache_key(sha), {"Status_Execucao": "Sucesso", "Repetitions": 4, "ID_Paciente": "1"})
+
+    second = _upload("2", content)
+    assert second["filename"] == first["filename"]
+    assert second["job_id"] is None and len(db.submitted) == 1
+    assert second["analysis"]["cached"] is True and second["analysis"]["Repetitions"] == 4
+    assert second["analysis"]["ID_Paciente"] == "2"
+    assert storage.load_feedback("2", first["filename"])["Status_Execucao"] == "Sucesso"
+
+    # outra configuração de análise não reaproveita o cache
+    with Session(db) as session:
+        other = runtime._cache_key(sha)._replace(model_name="yolov8s-pose")
+        assert cache.lookup(session, other) is None
+    key = runtime._cache_key(sha)
+    for env, value in (("MOVEON_YOLO_ROI", "1"), ("MOVEON_ANALYSIS_MAX_SIDE", "320"), ("MOVEON_RENDITIONS", "0")):
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setenv(env, value)
+            assert runtime._cache_key(sha) != key, env
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(runtime.engine, "ANALYSIS_VERSION", runtime.engine.ANALYSIS_VERSION + 1)
+        assert runtime._cache_key(sha) != key
+
+    with Session(db) as session:
+        assert session.get(VideoBlob, sha).refcount == 2
+
+
+def test_same_video_for_two_exercises_gets_two_jobs_and_two_results(db, monkeypatch):
+    monkeypatch.setattr(runtime, "submit_analysis", _submit_analysis)
+    # sem dispatcher: os jobs ficam na fila (um dispatcher de outro teste não deve consumi-los)
+    monkeypatch.setattr(runtime, "_ensure_dispatcher", lambda: None)
+    monkeypatch.setattr(runtime, "_dispatch_once", lambda max_running: None)
+    content = b"agachamento ou ponte" * 500
+
+    squat = _upload("1", content, exercise_id="1")
+    bridge = _upload("1", content, exercise_id="2")
+    assert squat["filename"] == bridge["filename"]
+    assert squat["job_id"] != bridge["job_id"]
+    assert _upload("1", content, exercise_id="2")["job_id"] == bridge["job_id"]  # reenvio: mesmo job
+
+    for exercise_id, reps in (("1", 5), ("2", 8)):
+        storage.save_feedback({
+            "ID_Paciente": "1", "ID_Exercicio": exercise_id, "Timestamp": "2025-01-01T10:00:00Z",
+            "Status_Execucao": "Correto", "Repetitions": reps, "video_filename": squat["filename"],
+        })
+    stored = storage.load_feedbacks("1")
+    assert sorted((f["ID_Exercicio"], f["Repetitions"]) for f in stored) == [("1", 5), ("2", 8)]
+    assert storage.load_feedback("1", squat["filename"], "2")["Repetitions"] == 8
+
+
+def test_unreferenced_blobs_are_collected(db):
+    content = b"video para apagar" * 100
+    sha = hashlib.sha256(content).hexdigest()
+    _upload("1", content)
+    _upload("1", content)  # toque duplo: mesma referência
+    path = blobs.blob_path(sha, ".mp4")
+    assert path.exists()
+
+    with Session(db) as session:
+        assert session.get(VideoBlob, sha).refcount == 1
+        assert blobs.gc(session, grace_seconds=0) == []
+        blobs.release_owner(session, "patient:1")
+        session.commit()
+        assert blobs.gc(session, grace_seconds=0) == [sha]
+    assert not path.exists()
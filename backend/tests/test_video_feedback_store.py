@@ -0,0 +1,229 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.analysis import storage
+from app.api import routes_video_feedback
+from app.core import database
+from app.main import app
+from app.models.exercise_library import ExerciseLibrary
+from app.models.video_feedback import VideoFeedback
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'feedbacks.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine, tables=[VideoFeedback.__table__, ExerciseLibrary.__table__])
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(routes_video_feedback, "engine", engine)
+    monkeypatch.setattr(storage, "_logs_path", lambda: tmp_path / "analysis_logs.jsonl")
+    return engine
+
+
+def _feedback(patient_id, video, status, progress=None, ts="2025-01-01T10:00:00"):
+    return {
+        "ID_Paciente": patient_id,
+        "ID_Exercicio": "1",
+        "Timestamp": ts,
+        "Status_Execucao": status,
+        "progress": progress,
+        "video_filename": video,
+    }
+
+
+def test_save_feedback_keeps_latest_state_per_video(db):
+    storage.save_feedback(_feedback("7", "a.mp4", "Processando", 10))
+    storage.save_feedback(_feedback("7", "a.mp4", "Processando", 60))
+    storage.save_feedback(_feedback("7", "a.mp4", "Correto", 100, ts="2025-01-01T10:05:00"))
+    storage.save_feedback(_feedback("7", "b.mp4", "Pendente", ts="2025-01-02T09:00:00"))
+    storage.save_feedback(_feedback("8", "a.mp4", "Correto"))
+
+    with Session(db) as session:
+        assert len(session.exec(select(VideoFeedback)).all()) == 3
+
+    loaded = storage.load_feedbacks(7)
+    assert [(f["video_filename"], f["Status_Execucao"]) for f in loaded] == [("b.mp4", "Pendente"), ("a.mp4", "Correto")]
+    # o JSONL continua recebendo todas as linhas para inspeção
+    assert len(storage._logs_path().read_text(encoding="utf-8").splitlines()) == 5
+
+
+def test_import_jsonl_and_endpoint_reads_only_patient_rows(db, tmp_path):
+    with Session(db) as session:
+        session.add(ExerciseLibrary(id=1, name="Agachamento"))
+        session.commit()
+
+    legacy = tmp_path / "legacy.jsonl"
+    lines = [
+        _feedback("7", "a.mp4", "Processando", 50),
+        _feedback("7", "a.mp4", "Correto", 100, ts="2025-01-01T10:05:00"),
+        _feedback("9", "z.mp4", "Correto"),
+        {"ID_Paciente": "7", "ID_Exercicio": "1", "Timestamp": "2024-12-31T08:00:00", "Status_Execucao": "Correto"},
+    ]
+    legacy.write_text("\n".join(json.dumps(l) for l in lines) + "\nnão é json\n", encoding="utf-8")
+
+    assert storage.import_jsonl(legacy) == 4
+
+    client = TestClient(app)
+    response = client.get("/api/patients/7/video-feedbacks")
+    assert response.status_code == 200
+    data = response.json()
+    assert [(f["video_filename"], f["status"]) for f in data] == [("a.mp4", "Correto"), (None, "Correto")]
+    assert data[0]["exercise_name"] == "Agachamento"
+    assert data[0]["video_url"] == "/api/videos/a.mp4"
+    assert data[0]["playback_url"] == "/api/videos/a.mp4/playback"
+
+
+def test_endpoint_overlays_in_memory_progress_on_stored_state(db):
+    from app.analysis import progress
+
+    progress.clear()
+    storage.save_feedback(_feedback("7", "a.mp4", "Correto", 100))
+    storage.save_feedback(_feedback("7", "b.mp4", "Correto", 100))
+    # reanálise de a.mp4 em andamento
+    progress.publish(_feedback("7", "a.mp4", "Pendente", 40, ts="2025-01-03T10:00:00"))
+
+    data = TestClient(app).get("/api/patients/7/video-feedbacks").json()
+    assert [(f["video_filename"], f["status"], f["progress"]) for f in data] == [
+        ("a.mp4", "Pendente", 40),
+        ("b.mp4", "Correto", 100),
+    ]
+    progress.clear()
+
+
+def test_terminal_state_saved_elsewhere_replaces_stale_progress(db):
+    from app.analysis import progress
+
+    progress.clear()
+    progress.publish(_feedback("7", "a.mp4", "Pendente", 40, ts="2025-01-03T10:00:00"))
+    # concluída em outro processo: este nunca recebe o `progress.finish`
+    storage.save_feedback(_feedback("7", "a.mp4", "Correto", 100, ts="2025-01-03T10:02:00Z"))
+
+    data = TestClient(app).get("/api/patients/7/video-feedbacks").json()
+    assert [(f["video_filename"], f["status"], f["progress"]) for f in data] == [("a.mp4", "Correto", 100)]
+    assert progress.get("7", "a.mp4") is None
+
+
+def test_watchers_share_one_channel_and_stop_after_terminal_state():
+    import asyncio
+    import threading
+
+    from app.analysis import progress
+
+    progress.clear()
+
+    async def _collect(out):
+        async for item in progress.watch("7", "c.mp4", heartbeat=5):
+            out.append(item)
+
+    async def _main():
+        first, second = [], []
+        tasks = [asyncio.create_task(_collect(first)), asyncio.create_task(_collect(second))]
+        await asyncio.sleep(0.05)
+        assert progress.subscriber_count("7", "c.mp4") == 2
+
+        def _worker():
+            progress.publish(_feedback("7", "c.mp4", "Pendente", 30))
+            progress.finish(_feedback("7", "c.mp4", "Correto", 100))
+
+        threading.Thread(target=_worker).start()
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+        return first, second
+
+    first, second = asyncio.run(_main())
+    for items in (first, second):
+        # o estado intermediário pode ser sobrescrito pelo final antes de o cliente acordar
+        assert items[-1][0]["Status_Execucao"] == "Correto" and items[-1][1] is True
+        assert all(not terminal for _, terminal in items[:-1])
+    assert progress.subscriber_count("7", "c.mp4") == 0
+    assert progress.get("7", "c.mp4") is None
+
+
+def test_watch_polls_the_stored_state_when_analysis_ends_elsewhere():
+    import asyncio
+
+    from app.analysis import progress
+
+    progress.clear()
+    progress.publish(_feedback("7", "d.mp4", "Pendente", 30, ts="2025-01-03T10:00:00Z"))
+    # nenhum `finish` neste processo: o estado final só aparece no storage
+    answers = iter([None, None, _feedback("7", "d.mp4", "Erro", ts="2025-01-03T10:05:00Z")])
+
+    async def _collect():
+        return [item async for item in progress.watch("7", "d.mp4", stored=lambda: next(answers), heartbeat=5, poll=0.01)]
+
+    items = asyncio.run(asyncio.wait_for(_collect(), timeout=5))
+    assert [(f["Status_Execucao"], terminal) for f, terminal in items] == [("Pendente", False), ("Erro", True)]
+    assert progress.get("7", "d.mp4") is None
+
+
+def test_event_stream_returns_stored_result_when_analysis_is_finished(db):
+    storage.save_feedback(_feedback("7", "a.mp4", "Correto", 100))
+
+    with TestClient(app).stream("GET", "/api/patients/7/video-feedbacks/a.mp4/events") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+
+    event, data = body.strip().split("\n")
+    assert event == "event: result"
+    assert json.loads(data[len("data: "):])["Status_Execucao"] == "Correto"
+
+
+def _save_squat_keypoints(path, reps, fps=30.0, bottom=60.0):
+    import numpy as np
+
+    from app.analysis import keypoints
+
+    n = int(reps * 2 * fps)
+    i = np.arange(n)
+    theta = np.radians(175.0 - (175.0 - bottom) * (1 - np.cos(2 * np.pi * i / (2 * fps))) / 2)
+    xy = np.zeros((n, 17, 2), dtype=np.float32)
+    xy[:, 11] = xy[:, 12] = (0.0, 1.0)  # quadris
+    xy[:, 15, 0] = xy[:, 16, 0] = np.sin(theta)  # tornozelos
+    xy[:, 15, 1] = xy[:, 16, 1] = np.cos(theta)
+    keypoints.save(
+        path, i.astype(np.int32), (i / fps).astype(np.float32), xy, np.full((n, 17), 0.9), np.ones(n, bool), fps=fps
+    )
+
+
+def test_bulk_rescore_streams_new_thresholds_into_store(db, monkeypatch, tmp_path):
+    from concurrent.futures import ProcessPoolExecutor
+
+    from app.analysis import keypoints, reanalysis
+    from app.core import uploads
+
+    monkeypatch.setattr(uploads, "UPLOAD_ROOT", tmp_path)
+    storage.save_feedback(dict(_feedback("7", "a.mp4", "Sucesso", 100), Repetitions=3))
+    storage.save_feedback(dict(_feedback("7", "b.mp4", "Sucesso", 100, ts="2025-01-03T10:00:00"), Repetitions=2))
+    storage.save_feedback(dict(_feedback("8", "c.mp4", "Sucesso", 100), Repetitions=3))
+    storage.save_feedback(_feedback("8", "old.mp4", "Sucesso", 100))  # analisado antes dos keypoints
+    _save_squat_keypoints(keypoints.path_for("a.mp4"), reps=3, bottom=60.0)
+    _save_squat_keypoints(keypoints.path_for("b.mp4"), reps=2, bottom=85.0)
+    _save_squat_keypoints(keypoints.path_for("c.mp4"), reps=3, bottom=60.0)
+
+    items = reanalysis.targets()
+    assert sorted(t.video_filename for t in items) == ["a.mp4", "b.mp4", "c.mp4"]
+    assert [t.video_filename for t in reanalysis.targets("8")] == ["c.mp4"]
+
+    seen = []
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        stats = reanalysis.run(
+            items,
+            chunk_size=1,
+            executor=pool,
+            on_result=lambda target, feedback, s: seen.append((target.video_filename, s.videos)),
+            down_threshold=70.0,
+        )
+
+    assert (stats.videos, stats.failed, stats.frames) == (3, 0, 180 + 120 + 180)
+    assert stats.videos_per_s > 0 and sorted(n for _, n in seen) == [1, 2, 3]
+    # b.mp4 só desce até 85°: com o novo limiar (70°) não conta repetições
+    by_video = {f["video_filename"]: f for f in storage.load_feedbacks(7)}
+    assert by_video["a.mp4"]["Repetitions"] == 3
+    assert by_video["b.mp4"]["Repetitions"] == 0 and by_video["b.mp4"]["Status_Execucao"] == "Falha"
+    assert by_video["b.mp4"]["rules"]["down_threshold"] == 70.0
+    # o Timestamp original é mantido, então a ordem da lista do paciente não muda
+    assert [f["video_filename"] for f in storage.load_feedbacks(7)] == ["b.mp4", "a.mp4"]
+    assert storage.load_feedback(8, "old.mp4")["Status_Execucao"] == "Sucesso"